@@ -1,9 +1,7 @@
-import matplotlib
-matplotlib.use('Agg')
-
 import base64
-from io import BytesIO
+import math
 from flask import Flask, render_template, jsonify, request
+from flask_socketio import SocketIO, emit, join_room, leave_room
 import threading
 import time
 from datetime import datetime
@@ -11,13 +9,20 @@ import os
 import webbrowser
 from threading import Timer
 from app.config import *
-import matplotlib.pyplot as plt
 import sys
 from app.telegram_notifier import TelegramNotifier
 from exchanges.exchange_factory import ExchangeFactory
 import json
 from threading import Lock
 from app.language import get_current_language, save_language
+from app.screener import screen_tickers
+from app.sparkline import SparklineCache
+from app.http_pool import pool_stats
+from app.scheduler import create_scheduler, daily_trigger
+from app.cache import get_cache, cleanup_all, stats_all
+from app.positions_snapshot import SnapshotHolder
+from app.http_cache import make_etag, conditional_response, hashed_json_response
+from app.serialization import FastJSONProvider, compress_response
 import concurrent.futures
 from functools import partial
 
@@ -25,26 +30,8 @@ from functools import partial
 class DEFAULTS:
     PNL_THRESHOLD = 100
 
-# Глобальные переменные для хранения данных
-positions_data = {
-    'high_profitable': [],
-    'profitable': [],
-    'losing': [],
-    'last_update': None,
-    'closed_pnl': [],
-    'total_trades': 0,
-    'rapid_growth': [],
-    'stats': {
-        'total_pnl': 0,
-        'total_profit': 0,
-        'total_loss': 0,
-        'high_profitable_count': 0,
-        'profitable_count': 0,
-        'losing_count': 0,
-        'top_profitable': [],
-        'top_losing': []
-    }
-}
+# Снимок позиций, который отдает /get_positions (публикует background_update)
+positions_snapshot = SnapshotHolder(POSITIONS_DIFF['HISTORY_SIZE'])
 
 # Глобальные переменные для максимальных значений
 max_profit_values = {}
@@ -54,6 +41,13 @@ app = Flask(__name__, static_folder='static')
 app.config['DEBUG'] = APP_DEBUG
 app.config['TEMPLATES_AUTO_RELOAD'] = True
 app.config['SEND_FILE_MAX_AGE_DEFAULT'] = 0
+app.json = FastJSONProvider(app)
+app.after_request(compress_response)
+
+# Push-канал: новые снимки позиций рассылаются всем открытым дашбордам
+socketio = SocketIO(app, async_mode='threading', cors_allowed_origins=SOCKETIO_CORS_ORIGINS)
+push_subscribers = {}  # sid клиента -> порог PnL
+push_lock = Lock()
 
 telegram = TelegramNotifier()
 
@@ -96,109 +90,111 @@ def format_stats(stats):
         f"\nTOP-3 losing:\n{format_positions(stats['top_losing'])}"
     )
 
-stats_lock = Lock()
+def parse_pnl_threshold(value):
+    """Порог PnL из параметра клиента
+
+    Некорректное значение заменяется порогом по умолчанию, корректное
+    округляется до центов, чтобы одинаковые пороги в разной записи
+    попадали в одну комнату Socket.IO и один кэш тела ответа.
+    """
+    try:
+        threshold = float(value)
+    except (ValueError, TypeError):
+        return DEFAULTS.PNL_THRESHOLD
+    if not math.isfinite(threshold):
+        return DEFAULTS.PNL_THRESHOLD
+    return round(threshold, 2)
+
+def positions_room(pnl_threshold):
+    """Комната Socket.IO для клиентов с одинаковым порогом PnL"""
+    return f'positions:{pnl_threshold}'
+
+@socketio.on('subscribe_positions')
+def subscribe_positions(params=None):
+    """Подписка на снимки позиций; сразу отправляет изменения с версии клиента"""
+    params = params if isinstance(params, dict) else {}
+    pnl_threshold = parse_pnl_threshold(params.get('pnl_threshold'))
+    since = params.get('since')
+    with push_lock:
+        previous = push_subscribers.get(request.sid)
+        push_subscribers[request.sid] = pnl_threshold
+    if previous is not None and previous != pnl_threshold:
+        leave_room(positions_room(previous))
+    join_room(positions_room(pnl_threshold))
+    emit('positions', positions_snapshot.response_json(pnl_threshold, GROWTH_MULTIPLIER, since))
+
+@socketio.on('disconnect')
+def unsubscribe_positions(*args):
+    with push_lock:
+        push_subscribers.pop(request.sid, None)
+
+def broadcast_positions(previous, snapshot):
+    """Рассылка дельты нового снимка
+
+    Тело считается один раз на порог (и кэшируется в снимке), а не на
+    каждого клиента.
+    """
+    with push_lock:
+        thresholds = set(push_subscribers.values())
+    for pnl_threshold in thresholds:
+        socketio.emit(
+            'positions',
+            snapshot.diff_json(previous, pnl_threshold, GROWTH_MULTIPLIER),
+            to=positions_room(pnl_threshold)
+        )
+
+def publish_positions(positions, rapid_growth, last_update):
+    """Публикация снимка позиций, рассылка дельты подписчикам и проверка алертов
+
+    Пустой снимок тоже проверяется - так снимаются алерты закрытых позиций.
+
+    Returns:
+        tuple: (предыдущий снимок, текущий снимок) - совпадают, если данные не изменились
+    """
+    previous_snapshot = positions_snapshot.current
+    snapshot = positions_snapshot.publish(positions, rapid_growth, exchange.get_all_pairs(), last_update)
+    if snapshot is not previous_snapshot:
+        try:
+            broadcast_positions(previous_snapshot, snapshot)
+        except Exception as e:
+            print(f"Error broadcasting positions: {e}")
+        # Алерты по порогам - один проход по всему снимку
+        try:
+            telegram.check_positions(snapshot)
+        except Exception as e:
+            print(f"Error checking alerts: {e}")
+    return previous_snapshot, snapshot
 
 def background_update():
-    global positions_data, last_stats_time
     last_log_minute = -1
-    last_stats_time = None
     thread_id = threading.get_ident()
+    empty_polls = 0
     
     while True:
         try:
-            current_time = time.time()
-            
-            with stats_lock:
-                should_send_stats = (
-                    TELEGRAM_NOTIFY.get('STATISTICS', False) and 
-                    (last_stats_time is None or 
-                     current_time - last_stats_time >= TELEGRAM_NOTIFY['STATISTICS_INTERVAL'] + 1)
-                )
-
             positions, rapid_growth = exchange.get_positions()
             if not positions:
-                time.sleep(2)
+                # Все позиции закрыты: заменяем снимок пустым, иначе отчеты
+                # и клиенты продолжат видеть закрытые позиции
+                empty_polls += 1
+                if empty_polls == EMPTY_POSITIONS_CONFIRM:
+                    publish_positions([], [], datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+                exchange.wait_positions_update(2)
                 continue
+            empty_polls = 0
 
-            # Добавляем проверку каждой позиции для уведомлений
-            for position in positions:
-                telegram.check_position_notifications(position)
+            # Котировки открытых позиций держим в памяти (get_ticker, закрытие, пересчет PnL)
+            exchange.watch_symbols(position['symbol'] for position in positions)
 
             # Проверяем быстрорастущие позиции
             if rapid_growth:
                 telegram.check_rapid_growth(rapid_growth)
 
-            high_profitable = []
-            profitable = []
-            losing = []
-            
-            total_profit = 0
-            total_loss = 0
-            
-            # Обновляем общее количество сделок
-            positions_data['total_trades'] = len(positions)
-            positions_data['rapid_growth'] = rapid_growth
-            
-            # Распределяем позиции по категориям
-            for position in positions:
-                pnl = position['pnl']
-                if pnl > 0:
-                    if pnl >= 100:
-                        high_profitable.append(position)
-                    else:
-                        profitable.append(position)
-                    total_profit += pnl
-                elif pnl < 0:
-                    losing.append(position)
-                    total_loss += pnl
-            
-            # Сортировка позиций
-            high_profitable.sort(key=lambda x: x['pnl'], reverse=True)
-            profitable.sort(key=lambda x: x['pnl'], reverse=True)
-            losing.sort(key=lambda x: x['pnl'])
-            
-            # Получаем TOP-3
-            all_profitable = high_profitable + profitable
-            all_profitable.sort(key=lambda x: x['pnl'], reverse=True)
-            top_profitable = all_profitable[:3] if all_profitable else []
-            top_losing = losing[:3] if losing else []
-            
-            # Обновляем positions_data
-            stats = {
-                'total_pnl': total_profit + total_loss,
-                'total_profit': total_profit,
-                'total_loss': total_loss,
-                'high_profitable_count': len(high_profitable),
-                'profitable_count': len(high_profitable) + len(profitable),
-                'losing_count': len(losing),
-                'top_profitable': top_profitable,
-                'top_losing': top_losing,
-                'total_trades': len(positions)
-            }
-            
-            positions_data.update({
-                'high_profitable': high_profitable,
-                'profitable': profitable,
-                'losing': losing,
-                'stats': stats,
-                'last_update': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            })
-
-            # Отправка статистики в Telegram только если нужно
-            if should_send_stats:
-                try:
-                    with stats_lock:
-                        print(f"[Thread {thread_id}] Acquired stats_lock for sending")
-                        print(f"[Thread {thread_id}] Sending statistics...")
-                        telegram.send_statistics(positions_data['stats'])
-                        last_stats_time = current_time
-                        print(f"[Thread {thread_id}] Stats sent at {datetime.fromtimestamp(current_time).strftime('%H:%M:%S.%f')}")
-                        print(f"[Thread {thread_id}] Released stats_lock after sending")
-                except Exception as e:
-                    print(f"[Thread {thread_id}] Error sending statistics: {e}")
+            publish_positions(positions, rapid_growth, datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
 
-            print(f"[Thread {thread_id}] Updated positions: {positions_data['total_trades']} ...")
-            time.sleep(2)
+            print(f"[Thread {thread_id}] Updated positions: {len(positions)} ...")
+            # В режиме WebSocket просыпаемся по дельте, иначе - каждые 2 секунды
+            exchange.wait_positions_update(2)
             
         except Exception as e:
             print(f"Error in background_update: {str(e)}")
@@ -251,100 +247,19 @@ def analyze_pairs_parallel(pairs, max_workers=10):
 
 @app.route('/get_positions')
 def get_positions():
-    pnl_threshold = float(request.args.get('pnl_threshold', 100))
-    
-    try:
-        all_available_pairs = exchange.get_all_pairs()
-    except Exception as e:
-        print(f"Ошибка при получении списка пар: {str(e)}")
-        all_available_pairs = []
-    
-    if not positions_data['high_profitable'] and not positions_data['profitable'] and not positions_data['losing']:
-        return jsonify({
-            'high_profitable': [],
-            'profitable': [],
-            'losing': [],
-            'stats': {
-                'total_pnl': 0,
-                'total_profit': 0,
-                'total_loss': 0,
-                'high_profitable_count': 0,
-                'profitable_count': 0,
-                'losing_count': 0,
-                'top_profitable': [],
-                'top_losing': [],
-                'total_trades': 0
-            },
-            'rapid_growth': [],
-            'last_update': time.strftime('%Y-%m-%d %H:%M:%S'),
-            'growth_multiplier': GROWTH_MULTIPLIER,
-            'all_pairs': []
-        })
-
-    # Получаем все позиции
-    all_positions = (positions_data['high_profitable'] + 
-                    positions_data['profitable'] + 
-                    positions_data['losing'])
-    
-    # Создаем множество символов из активных позиций
-    active_position_symbols = set(position['symbol'] for position in all_positions)
-    
-    # Фильтруем доступные пары
-    available_pairs = [pair for pair in all_available_pairs if pair not in active_position_symbols]
+    pnl_threshold = parse_pnl_threshold(request.args.get('pnl_threshold'))
+    since = request.args.get('since')
     
-    # Распределяем позиции по категориям
-    high_profitable = []
-    profitable = []
-    losing = []
-    total_profit = 0
-    total_loss = 0
-    
-    for position in all_positions:
-        pnl = position['pnl']
-        if pnl > 0:
-            if pnl >= pnl_threshold:
-                high_profitable.append(position)
-            else:
-                profitable.append(position)
-            total_profit += pnl
-        elif pnl < 0:
-            losing.append(position)
-            total_loss += pnl
-
-    # Сортируем позиции
-    high_profitable.sort(key=lambda x: x['pnl'], reverse=True)
-    profitable.sort(key=lambda x: x['pnl'], reverse=True)
-    losing.sort(key=lambda x: x['pnl'])
-    
-    # Получаем TOP-3
-    all_profitable = high_profitable + profitable
-    all_profitable.sort(key=lambda x: x['pnl'], reverse=True)
-    top_profitable = all_profitable[:3] if all_profitable else []
-    top_losing = losing[:3] if losing else []
-
-    # Формируем статистику
-    stats = {
-        'total_pnl': total_profit + total_loss,
-        'total_profit': total_profit,
-        'total_loss': total_loss,
-        'high_profitable_count': len(high_profitable),
-        'profitable_count': len(profitable),
-        'losing_count': len(losing),
-        'top_profitable': top_profitable,
-        'top_losing': top_losing,
-        'total_trades': len(all_positions)
-    }
-    
-    return jsonify({
-        'high_profitable': high_profitable,
-        'profitable': profitable,
-        'losing': losing,
-        'stats': stats,
-        'rapid_growth': positions_data['rapid_growth'],
-        'last_update': positions_data['last_update'],
-        'growth_multiplier': GROWTH_MULTIPLIER,
-        'all_pairs': available_pairs
-    })
+    # Ответ собирается из готового снимка без обращений к бирже;
+    # с since=<версия> отдаются только изменения с этой версии
+    snapshot = positions_snapshot.current
+    return conditional_response(
+        make_etag('positions', snapshot.token, since, pnl_threshold, GROWTH_MULTIPLIER),
+        lambda: app.response_class(
+            positions_snapshot.response_json(pnl_threshold, GROWTH_MULTIPLIER, since, snapshot),
+            mimetype='application/json'
+        )
+    )
 
 @app.route('/api/positions')
 def api_positions():
@@ -365,7 +280,7 @@ def get_closed_pnl():
         closed_pnl = exchange.get_closed_pnl(sort_by)
         print(f"[API] Found {len(closed_pnl)} closed positions")
         
-        return jsonify({
+        return hashed_json_response({
             'success': True,
             'closed_pnl': closed_pnl,
             'wallet_data': {
@@ -383,74 +298,16 @@ def get_closed_pnl():
 
 class MiniChartService:
     def __init__(self):
-        self.charts_cache = {}
-        self.update_interval = 300
-        # Устанвливаем бэкенд для всех графиков
-        matplotlib.use('Agg', force=True)
+        self.charts_cache = SparklineCache(get_cache('sparklines'))
 
     def generate_chart(self, symbol, data, theme='dark'):
+        """Спарклайн символа (SVG в base64) и его ETag"""
         try:
-            plt.style.use('dark_background' if theme == 'dark' else 'default')
-            
-            # Создаем новую фигуру для каждого графика
-            fig = plt.figure(figsize=(2, 0.75))
-            ax = fig.add_subplot(111)
-            
-            # Определяем тренд
-            trend_color = CHART_COLORS['POSITIVE']['BORDER'] if data[-1] > data[0] else CHART_COLORS['NEGATIVE']['BORDER']
-            
-            # Настройки в зависимости от темы
-            if theme == 'dark':
-                ax.plot(data, color=trend_color, linewidth=1)
-                fig.patch.set_facecolor('#2d2d2d')
-                ax.set_facecolor('#2d2d2d')
-                ax.tick_params(colors='white')
-            else:
-                ax.plot(data, color=trend_color, linewidth=1)
-                fig.patch.set_facecolor('#ffffff')
-                ax.set_facecolor('#ffffff')
-                ax.tick_params(colors='black')
-            
-            ax.axis('off')
-            plt.margins(0)
-            
-            buffer = BytesIO()
-            fig.savefig(buffer, 
-                       format='png', 
-                       dpi=72, 
-                       bbox_inches='tight', 
-                       pad_inches=0, 
-                       facecolor=fig.get_facecolor(),
-                       edgecolor='none',
-                       transparent=False)
-            plt.close(fig)  # Важно закрывать фигуру
-            
-            buffer.seek(0)
-            image_base64 = base64.b64encode(buffer.getvalue()).decode()
-            buffer.close()
-            
-            return image_base64
+            svg, etag = self.charts_cache.get_or_render(symbol, data, theme)
+            return base64.b64encode(svg.encode()).decode(), etag
         except Exception as e:
             print(f"Error generating chart: {e}")
-            return ''
-
-    def get_symbol_chart_data(self, symbol):
-        """Получает исторические данные для графика"""
-        try:
-            response = self.client.get_kline(
-                category="linear",
-                symbol=f"{symbol}USDT",
-                interval="5",  # 5 минут
-                limit=24  # 2 часа данных
-            )
-            if response['retCode'] == 0:
-                prices = [float(k[4]) for k in response['result']['list']]  # Берем цены закрытия
-                if len(prices) >= 2:  # Проверяем, что есть хотя бы 2 точки для определения тренда
-                    return prices
-            return []
-        except Exception as e:
-            print(f"Error getting chart data for {symbol}: {e}")
-            return []
+            return '', None
 
 # Создаем экземпляр сервиса
 mini_chart_service = MiniChartService()
@@ -464,16 +321,10 @@ def get_symbol_chart(symbol):
         if not data:
             return jsonify({'chart': ''})
         
-        chart_base64 = mini_chart_service.generate_chart(symbol, data, theme)
-        
-        # Кируе дл обеих тем
-        cache_key = f"{symbol}_{theme}"
-        mini_chart_service.charts_cache[cache_key] = {
-            'data': chart_base64,
-            'timestamp': datetime.now()
-        }
-        
-        return jsonify({'chart': chart_base64})
+        chart_base64, etag = mini_chart_service.generate_chart(symbol, data, theme)
+        if not etag:
+            return jsonify({'chart': chart_base64})
+        return conditional_response(etag, lambda: {'chart': chart_base64})
     except Exception as e:
         print(f"Error in get_symbol_chart: {e}")
         return jsonify({'chart': ''})
@@ -489,47 +340,70 @@ def get_sma200_position(symbol):
         print(f"Error in get_sma200_position for {symbol}: {e}")
         return jsonify({'above_sma200': None})
 
-def calculate_statistics(positions):
-    """Calculates statistics for positions"""
-    total_profit = 0
-    total_loss = 0
-    high_profitable = []
-    profitable = []
-    losing = []
-
-    for position in positions:
-        pnl = position['pnl']
-        if pnl > 0:
-            if pnl >= 100:
-                high_profitable.append(position)
-            else:
-                profitable.append(position)
-            total_profit += pnl
-        else:
-            losing.append(position)
-            total_loss += pnl
-
+def build_ticker_widgets(symbol, theme):
+    """Миниграфик и положение относительно SMA200 для одного символа"""
+    chart = ''
+    data = exchange.get_symbol_chart_data(symbol)
+    if data:
+        chart, _ = mini_chart_service.generate_chart(symbol, data, theme)
     return {
-        'total_pnl': total_profit + total_loss,
-        'total_profit': total_profit,
-        'total_loss': total_loss,
-        'total_trades': len(positions),
-        'profitable_count': len(high_profitable) + len(profitable),
-        'losing_count': len(losing),
-        'top_profitable': sorted(high_profitable + profitable, key=lambda x: x['pnl'], reverse=True)[:3],
-        'top_losing': sorted(losing, key=lambda x: x['pnl'])[:3]
+        'chart': chart,
+        'above_sma200': exchange.get_sma200_position(symbol)
     }
 
-def send_daily_report():
-    """Отправка ежедневного отчета"""
-    while True:
-        now = datetime.now()
-        if now.strftime('%H:%M') == TELEGRAM_NOTIFY['DAILY_REPORT_TIME']:
-            positions, _ = exchange.get_positions()
-            if positions:
-                stats = calculate_statistics(positions)
-                telegram.send_daily_report(stats)
-        time.sleep(60)  # Проверяем каждую минуту
+@app.route('/api/sparklines', methods=['POST'])
+def get_sparklines():
+    """Миниграфики и SMA200 для всех символов одним запросом
+
+    Тело запроса: {"symbols": [...], "theme": "dark"}. Символы
+    обрабатываются параллельно, свечи берутся из локального хранилища.
+    """
+    try:
+        params = request.get_json(silent=True) or {}
+        theme = params.get('theme', 'dark')
+        symbols = list(dict.fromkeys(s for s in params.get('symbols', []) if s))
+        if not symbols:
+            return jsonify({'success': True, 'data': {}})
+        
+        data = {}
+        with concurrent.futures.ThreadPoolExecutor(max_workers=10) as executor:
+            futures = {
+                executor.submit(build_ticker_widgets, symbol, theme): symbol
+                for symbol in symbols
+            }
+            for future in concurrent.futures.as_completed(futures):
+                symbol = futures[future]
+                try:
+                    data[symbol] = future.result()
+                except Exception as e:
+                    print(f"Error building sparkline for {symbol}: {e}")
+                    data[symbol] = {'chart': '', 'above_sma200': None}
+        
+        return jsonify({'success': True, 'data': data})
+    except Exception as e:
+        print(f"Error in get_sparklines: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+def snapshot_statistics():
+    """Статистика по последнему опубликованному снимку (формат отчетов Telegram)"""
+    snapshot = positions_snapshot.current
+    if snapshot is None or not snapshot.positions:
+        return None
+    stats = snapshot.stats(DEFAULT_PNL_THRESHOLD)
+    stats['profitable_count'] += stats.pop('high_profitable_count')
+    return stats
+
+def send_daily_report_job():
+    """Ежедневный отчет (задача планировщика)"""
+    stats = snapshot_statistics()
+    if stats:
+        telegram.send_daily_report(stats)
+
+def send_statistics_job():
+    """Статистика в Telegram (задача планировщика)"""
+    stats = snapshot_statistics()
+    if stats:
+        telegram.send_statistics(stats)
 
 # Глобальная переменная для хранения текущей биржи
 current_exchange = None
@@ -715,10 +589,11 @@ def get_language():
 def get_pairs():
     """Получение списка всех доступных пар"""
     try:
-        pairs = exchange.get_all_pairs()
-        return jsonify({
+        # Список меняется только при обновлении справочника инструментов
+        etag = make_etag('pairs', exchange.EXCHANGE_NAME, exchange.instruments.last_update)
+        return conditional_response(etag, lambda: {
             'success': True,
-            'pairs': pairs
+            'pairs': exchange.get_all_pairs()
         })
     except Exception as e:
         return jsonify({
@@ -728,16 +603,32 @@ def get_pairs():
 
 @app.route('/api/chart/<symbol>')
 def get_chart_data(symbol):
+    """Свечи для графика
+
+    Параметр format: rows (по умолчанию, список свечей), columns (массивы
+    times/open/high/low/close/volume) или binary (те же столбцы подряд
+    как little-endian float64, количество свечей - в X-Candle-Count).
+    """
     try:
         timeframe = request.args.get('timeframe', '1h')
         period = request.args.get('period', '1w')
+        layout = request.args.get('format', 'rows')
+        if layout not in ('rows', 'columns', 'binary'):
+            return jsonify({'success': False, 'error': f'Неизвестный формат: {layout}'}), 400
         
         # Используем глобальную переменную exchange
-        data = exchange.get_chart_data(symbol, timeframe, period)
+        data = exchange.get_chart_data(symbol, timeframe, period, layout)
         
         # Проверяем успешность ответа
         if not data.get('success'):
             return jsonify(data), 500
+        
+        if layout == 'binary':
+            body = data['data']['candles']
+            response = app.response_class(body, mimetype='application/octet-stream')
+            response.headers['X-Candle-Count'] = str(len(body) // (8 * len(exchange.CANDLE_COLUMNS)))
+            response.headers['X-Candle-Columns'] = ','.join(exchange.CANDLE_COLUMNS)
+            return response
             
         # Возвращаем данные без дополнительного оборачивания
         return jsonify(data)
@@ -768,6 +659,31 @@ def get_indicators(symbol):
             'error': str(e)
         }), 500
 
+@app.route('/api/indicators/batch')
+def get_indicators_batch():
+    """Индикаторы для нескольких символов одним запросом
+
+    Параметры: symbols - символы через запятую (по умолчанию все пары),
+    timeframe - таймфрейм. Данные по каждому символу в том же формате,
+    что и /api/indicators/<symbol>.
+    """
+    try:
+        timeframe = request.args.get('timeframe', '1h')
+        symbols = [s for s in request.args.get('symbols', '').upper().split(',') if s]
+        if not symbols:
+            symbols = exchange.get_all_pairs()
+        
+        data = exchange.get_indicators_batch(symbols, timeframe)
+        if not data.get('success'):
+            return jsonify(data), 400
+        return jsonify(data)
+    except Exception as e:
+        app.logger.error(f'Error getting batch indicators: {str(e)}')
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
 @app.route('/api/blacklist', methods=['POST'])
 def manage_blacklist():
     """Управление черным списком"""
@@ -813,112 +729,38 @@ def manage_blacklist():
         }), 500
 
 # Добавляем глобальные переменные для кэширования
-ticker_analysis_cache = {}
-CACHE_TIMEOUT = 300  # 5 минут
+ticker_analysis_cache = get_cache('ticker_analysis')
+
+def analyze_trend_and_position(symbol):
+    """Тренд и позиция цены по дневным свечам (те же правила, что и в скринере)"""
+    rows = screen_tickers([symbol], [exchange.get_candles(symbol, '1d', SCREENER['CANDLES'])])
+    if not rows:
+        return None
+    return {
+        'trend': rows[0]['trend'],
+        'position_percent': rows[0]['position_percent'],
+        'state': rows[0]['state']
+    }
 
 def determine_trend_and_position(symbol, force_update=False):
-    """Определяет тренд и позицию цены на графике с кэшированием"""
-    global ticker_analysis_cache
-    current_time = time.time()
-    
-    # Проверяем кэш, если не требуется принудительное обновление
-    if not force_update and symbol in ticker_analysis_cache:
-        cached_data = ticker_analysis_cache[symbol]
-        if current_time - cached_data['timestamp'] < CACHE_TIMEOUT:
-            return cached_data['data']
-    
+    """Определяет тренд и позицию цены на графике с кэшированием
+
+    Устаревший результат отдается сразу и обновляется в фоне
+    (stale-while-revalidate), запрос ждет биржу только при пустом кэше.
+    """
     try:
-        # Получаем исторические данные
-        data = exchange.get_chart_data(symbol, '1d', '1M')
-        if not data.get('success'):
-            return None
-            
-        candles = data.get('data', {}).get('candles', [])
-        if not candles:
-            return None
-            
-        # Находим минимальную и максимальную цену
-        min_price = min(float(candle['low']) for candle in candles)
-        max_price = max(float(candle['high']) for candle in candles)
-        current_price = float(candles[-1]['close'])
-        
-        # Определяем позицию цены в процентах от диапазона
-        price_range = max_price - min_price
-        if price_range == 0:
-            return None
-            
-        position_percent = ((current_price - min_price) / price_range) * 100
-        
-        # Определяем тренд
-        period = 14  # период для определения тренда
-        if len(candles) < period:
-            return None
-            
-        recent_prices = [float(candle['close']) for candle in candles[-period:]]
-        first_half = sum(recent_prices[:period//2]) / (period//2)
-        second_half = sum(recent_prices[period//2:]) / (period//2)
-        
-        if second_half > first_half * 1.02:  # 2% разница для определения роста
-            trend = 'рост'
-        elif first_half > second_half * 1.02:  # 2% разница для определения падения
-            trend = 'падение'
-        else:
-            trend = 'флэт'
-            
-        # Определяем состояние тикера
-        state = None
-        if 0 <= position_percent <= 10:
-            if trend in ['флэт', 'рост']:
-                state = 'дно рынка'
-            else:
-                state = 'падение'
-        elif 10 < position_percent <= 40:
-            state = trend
-        elif 40 < position_percent <= 60:
-            state = trend
-        elif 60 < position_percent <= 90:
-            if trend == 'флэт':
-                state = 'диапазон распродажи'
-            elif trend == 'падение':
-                state = 'диапазон падения'
-            else:
-                state = 'рост'
-        elif 90 < position_percent <= 100:
-            if trend == 'флэт':
-                state = 'хай рынка'
-            elif trend == 'падение':
-                state = 'падение'
-            else:
-                state = 'диапазон распродажи'
-        
-        result = {
-            'trend': trend,
-            'position_percent': position_percent,
-            'state': state
-        }
+        if force_update:
+            result = analyze_trend_and_position(symbol)
+            if result is not None:
+                ticker_analysis_cache.set(symbol, result)
+            return result
         
-        # Сохраняем результат в кэш
-        ticker_analysis_cache[symbol] = {
-            'data': result,
-            'timestamp': current_time
-        }
-        
-        return result
+        entry = ticker_analysis_cache.get_or_refresh(symbol, partial(analyze_trend_and_position, symbol))
+        return entry[0] if entry else None
         
     except Exception:
         return None
 
-def clear_old_cache():
-    """Очищает устаревшие данные из кэша"""
-    global ticker_analysis_cache
-    current_time = time.time()
-    expired_symbols = [
-        symbol for symbol, data in ticker_analysis_cache.items()
-        if current_time - data['timestamp'] >= CACHE_TIMEOUT
-    ]
-    for symbol in expired_symbols:
-        del ticker_analysis_cache[symbol]
-
 @app.route('/api/ticker_analysis/<symbol>')
 def get_ticker_analysis(symbol):
     """Получение анализа тикера (тренд и позиция на графике)"""
@@ -926,11 +768,17 @@ def get_ticker_analysis(symbol):
         force_update = request.args.get('force_update', '0') == '1'
         analysis = determine_trend_and_position(symbol, force_update)
         if analysis:
-            return jsonify({
-                'success': True,
-                'data': analysis,
-                'cached': not force_update and symbol in ticker_analysis_cache
-            })
+            # Версия - время записи анализа в кэш
+            entry = ticker_analysis_cache.peek(symbol)
+            cached_at = entry[1] if entry else None
+            return conditional_response(
+                make_etag('ticker_analysis', symbol, cached_at, force_update),
+                lambda: {
+                    'success': True,
+                    'data': analysis,
+                    'cached': not force_update and symbol in ticker_analysis_cache
+                }
+            )
         return jsonify({
             'success': False,
             'error': 'Could not analyze ticker'
@@ -941,65 +789,113 @@ def get_ticker_analysis(symbol):
             'error': str(e)
         }), 500
 
-def background_cache_cleanup():
-    """Фоновая очистка кэша"""
-    while True:
-        try:
-            clear_old_cache()
-        except Exception as e:
-            print(f"Error in cache cleanup: {str(e)}")
-        time.sleep(60)  # Проверяем каждую минуту
+# Кэш результатов скринера (одна запись)
+screener_cache = get_cache('screener')
+screener_lock = Lock()
+
+@app.route('/api/screener')
+def get_screener():
+    """Анализ всех пар одним запросом (тренд, положение цены, состояние, RSI, объем)
+
+    Параметры: state - вернуть только пары с указанным состоянием,
+    force_update=1 - пересчитать, не дожидаясь истечения кэша.
+    """
+    try:
+        force_update = request.args.get('force_update', '0') == '1'
+        state = request.args.get('state')
+        
+        with screener_lock:
+            entry = None if force_update else screener_cache.get_entry('all')
+            if entry is None:
+                symbols = exchange.get_all_pairs()
+                series = exchange.get_candles_batch(
+                    symbols, '1d', SCREENER['CANDLES'], SCREENER['MAX_WORKERS']
+                )
+                rows = screen_tickers(symbols, series)
+                entry = (rows, screener_cache.set('all', rows))
+            rows, timestamp = entry
+        
+        if state:
+            rows = [row for row in rows if row['state'] == state]
+        return jsonify({
+            'success': True,
+            'data': rows,
+            'timestamp': int(timestamp * 1000)
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
 
 # Кэш для хранения данных свечей
-candles_cache = {}
-CACHE_TIMEOUT = 300  # 5 минут
+candles_cache = get_cache('candles')
+
+def load_daily_candles(symbol):
+    """Дневные свечи за последний месяц или None при ошибке"""
+    data = exchange.get_chart_data(symbol, '1d', '1M')
+    return data if data.get('success') else None
 
 @app.route('/api/candles/<symbol>')
 def get_candles(symbol):
     """Получение свечей для расчета тренда на клиенте"""
-    current_time = time.time()
-    
-    # Проверяем кэш
-    if symbol in candles_cache:
-        cached_data = candles_cache[symbol]
-        if current_time - cached_data['timestamp'] < CACHE_TIMEOUT:
-            return jsonify(cached_data['data'])
-    
     try:
-        # Получаем данные за последний месяц
-        data = exchange.get_chart_data(symbol, '1d', '1M')
-        if not data.get('success'):
+        # Устаревшие свечи отдаются сразу и обновляются в фоне;
+        # версия ответа - время записи в кэш
+        entry = candles_cache.get_or_refresh(symbol, partial(load_daily_candles, symbol))
+        if entry is None:
             return jsonify({'success': False, 'error': 'Не удалось получить данные'})
         
-        # Сохраняем в кэш
-        candles_cache[symbol] = {
-            'data': data,
-            'timestamp': current_time
-        }
-        
-        return jsonify(data)
+        data, cached_at = entry
+        return conditional_response(make_etag('candles', symbol, cached_at), lambda: data)
         
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
-def clear_old_cache():
-    """Очистка устаревших данных из кэша"""
-    current_time = time.time()
-    expired_symbols = [
-        symbol for symbol, data in candles_cache.items()
-        if current_time - data['timestamp'] >= CACHE_TIMEOUT
-    ]
-    for symbol in expired_symbols:
-        del candles_cache[symbol]
-
-def background_cache_cleanup():
-    """Фоновая очистка кэша"""
-    while True:
-        try:
-            clear_old_cache()
-        except Exception:
-            pass
-        time.sleep(60)  # Проверяем каждую минуту
+def cache_cleanup_job():
+    """Очистка просроченных записей всех кэшей (задача планировщика)"""
+    try:
+        cleanup_all()
+    except Exception as e:
+        print(f"Error in cache cleanup: {str(e)}")
+
+def start_scheduler():
+    """Запуск периодических задач в общем планировщике"""
+    scheduler = create_scheduler()
+    
+    # Справочник инструментов: первая загрузка сразу, далее по REFRESH_INTERVAL
+    scheduler.add_job(
+        exchange.instruments.refresh_if_due, 'interval',
+        seconds=SCHEDULER['INSTRUMENTS_CHECK_INTERVAL'],
+        next_run_time=datetime.now(), id='instruments'
+    )
+    scheduler.add_job(cache_cleanup_job, 'interval', seconds=SCHEDULER['CACHE_CLEANUP_INTERVAL'], id='cache_cleanup')
+    
+    if TELEGRAM_NOTIFY['DAILY_REPORT']:
+        scheduler.add_job(send_daily_report_job, daily_trigger(TELEGRAM_NOTIFY['DAILY_REPORT_TIME']), id='daily_report')
+    
+    if TELEGRAM_NOTIFY.get('STATISTICS', False):
+        if TELEGRAM_NOTIFY.get('STATISTICS_INTERVAL_ENABLED', True):
+            scheduler.add_job(
+                send_statistics_job, 'interval',
+                seconds=TELEGRAM_NOTIFY['STATISTICS_INTERVAL'], id='statistics'
+            )
+        if TELEGRAM_NOTIFY.get('STATISTICS_TIME_ENABLED', False):
+            for time_str in TELEGRAM_NOTIFY['STATISTICS_TIME']:
+                scheduler.add_job(send_statistics_job, daily_trigger(time_str), id=f'statistics_{time_str}')
+    
+    scheduler.start()
+    return scheduler
+
+@app.route('/api/cache_stats')
+def get_cache_stats():
+    """Статистика кэшей (записи, объем, попадания, промахи, вытеснения)"""
+    return jsonify({'success': True, 'data': stats_all()})
+
+@app.route('/api/http_pool_stats')
+def get_http_pool_stats():
+    """Статистика пула HTTP-соединений по хостам (запросы, ошибки, соединения)"""
+    return jsonify({'success': True, 'data': pool_stats()})
 
 if __name__ == '__main__':
     # Создаем директорию для логов
@@ -1011,20 +907,17 @@ if __name__ == '__main__':
         Timer(1.5, open_browser).start()
     else:
         # Запускаем фоновые процессы только в дочернем процессе
+        if POSITION_STREAM['ENABLED']:
+            exchange.start_position_stream()
+        if MARKET_DATA['ENABLED']:
+            exchange.start_market_data()
+        
         update_thread = threading.Thread(target=background_update)
         update_thread.daemon = True
         update_thread.start()
         
-        # Запускаем поток для отправки дневного отчета
-        if TELEGRAM_NOTIFY['DAILY_REPORT']:
-            daily_report_thread = threading.Thread(target=send_daily_report)
-            daily_report_thread.daemon = True
-            daily_report_thread.start()
-            
-        # Запускаем поток очистки кэша
-        cache_cleanup_thread = threading.Thread(target=background_cache_cleanup)
-        cache_cleanup_thread.daemon = True
-        cache_cleanup_thread.start()
+        # Отчеты, статистика, очистка кэша и справочник инструментов
+        start_scheduler()
     
     # Запускаем Flask-сервер
-    app.run(debug=APP_DEBUG, host=APP_HOST, port=APP_PORT, use_reloader=True) 
\ No newline at end of file
+    socketio.run(app, debug=APP_DEBUG, host=APP_HOST, port=APP_PORT, use_reloader=True, allow_unsafe_werkzeug=True) 
\ No newline at end of file
@@ -0,0 +1,80 @@
+from collections import namedtuple
+import numpy as np
+
+AlertRule = namedtuple('AlertRule', ['name', 'field', 'op', 'threshold', 'hysteresis'])
+
+# Направление сравнения: '>=' - алерт при росте до порога, '<=' - при падении
+OPS = {'>=': 1.0, '<=': -1.0}
+
+def load_rules(settings):
+    """Правила из настроек ALERT_RULES"""
+    return [
+        AlertRule(rule['NAME'], rule['FIELD'], rule['OP'], rule['THRESHOLD'], rule.get('HYSTERESIS', 0))
+        for rule in settings
+    ]
+
+class AlertEngine:
+    """Проверка всех пороговых правил по всем позициям за один проход
+
+    Значения позиций берутся столбцами из снимка (PositionsSnapshot.column),
+    правила складываются в матрицу правила x позиции. Алерт срабатывает,
+    когда значение достигает порога, и снимается, только когда отойдет от
+    порога дальше гистерезиса - так PnL, колеблющийся у порога, не дает
+    повторных уведомлений.
+
+    Состояние (символы с активным алертом по каждому правилу) хранит
+    вызывающий; evaluate возвращает только переходы.
+
+    Args:
+        rules (list): Список AlertRule
+    """
+
+    def __init__(self, rules):
+        for rule in rules:
+            if rule.op not in OPS:
+                raise ValueError(f"Unknown alert operator {rule.op!r} in rule {rule.name}")
+        self.rules = list(rules)
+        self.fields = sorted(set(rule.field for rule in self.rules))
+        field_index = {field: i for i, field in enumerate(self.fields)}
+        self._field_rows = np.array([field_index[rule.field] for rule in self.rules], dtype=int)
+        # Приводим все правила к виду sign * value >= порог
+        sign = np.array([OPS[rule.op] for rule in self.rules])
+        threshold = np.array([rule.threshold for rule in self.rules], dtype=float)
+        hysteresis = np.array([rule.hysteresis for rule in self.rules], dtype=float)
+        self._sign = sign[:, None]
+        self._enter = (sign * threshold)[:, None]
+        self._keep = (sign * threshold - hysteresis)[:, None]
+
+    def evaluate(self, snapshot, active):
+        """Проверка правил по снимку позиций
+
+        Args:
+            snapshot (PositionsSnapshot): Снимок позиций
+            active (dict): Имя правила -> множество символов с активным алертом
+
+        Returns:
+            tuple: (новое active, сработавшие {правило: [позиции]},
+                    снятые {правило: множество символов})
+        """
+        new_active, entered, exited = {}, {}, {}
+        if not self.rules:
+            return new_active, entered, exited
+
+        symbols = snapshot.column('symbol', str)
+        values = np.vstack([snapshot.column(field) for field in self.fields])[self._field_rows] * self._sign
+        previous = np.vstack([
+            np.isin(symbols, list(active.get(rule.name, ()))) for rule in self.rules
+        ]).reshape(len(self.rules), len(symbols))
+        current = (values >= self._enter) | (previous & (values >= self._keep))
+        triggered = current & ~previous
+
+        for row, rule in enumerate(self.rules):
+            before = set(active.get(rule.name, ()))
+            now = set(symbols[current[row]].tolist())
+            new_active[rule.name] = now
+            # Закрытые позиции тоже снимаются (разность множеств)
+            exited[rule.name] = before - now
+            indexes = np.flatnonzero(triggered[row])
+            if len(indexes):
+                entered[rule.name] = [snapshot.positions[i] for i in indexes]
+        return new_active, entered, exited
@@ -0,0 +1,213 @@
+import concurrent.futures
+import sys
+import threading
+import time
+from collections import OrderedDict
+from app.config import CACHES
+
+# Фоновое обновление устаревших записей (stale-while-revalidate)
+_refresh_executor = concurrent.futures.ThreadPoolExecutor(max_workers=4, thread_name_prefix='cache-refresh')
+
+def estimate_size(value, _depth=0):
+    """Приблизительный размер значения в байтах (для ограничения MAX_BYTES)"""
+    if isinstance(value, (str, bytes, bytearray)):
+        return len(value)
+    size = sys.getsizeof(value)
+    if _depth >= 4:
+        return size
+    if isinstance(value, dict):
+        size += sum(estimate_size(k, _depth + 1) + estimate_size(v, _depth + 1) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set)):
+        size += sum(estimate_size(item, _depth + 1) for item in value)
+    return size
+
+class TTLCache:
+    """Потокобезопасный кэш с временем жизни и вытеснением LRU
+
+    Размер ограничен количеством записей и (приблизительно) объемом в
+    байтах. Просроченные записи удаляются при чтении и в cleanup().
+
+    Со stale_ttl запись после истечения ttl еще stale_ttl секунд может
+    отдаваться через get_or_refresh, пока она обновляется в фоне.
+
+    Args:
+        name (str): Имя пространства кэша (для статистики)
+        ttl (float): Время жизни записи (сек)
+        max_entries (int): Максимум записей
+        max_bytes (int, optional): Максимальный суммарный размер значений
+        stale_ttl (float): Сколько еще можно отдавать устаревшую запись (сек)
+    """
+
+    def __init__(self, name, ttl, max_entries, max_bytes=None, stale_ttl=0):
+        self.name = name
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._refreshing = set()
+        self._items = OrderedDict()  # key -> (value, stored_at, size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.stale_hits = 0
+        self.refreshes = 0
+
+    def _remove(self, key):
+        _, _, size = self._items.pop(key)
+        self._bytes -= size
+
+    def _lookup(self, key, now):
+        """Запись и ее возраст; слишком старая запись удаляется (вызывать под блокировкой)"""
+        item = self._items.get(key)
+        if item is None:
+            return None, None
+        age = now - item[1]
+        if age >= self.ttl + self.stale_ttl:
+            self._remove(key)
+            self.expirations += 1
+            return None, None
+        return item, age
+
+    def get_entry(self, key):
+        """Запись (value, stored_at) или None, если ее нет или она устарела"""
+        with self._lock:
+            item, age = self._lookup(key, time.time())
+            if item is None or age >= self.ttl:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return item[0], item[1]
+
+    def peek(self, key):
+        """Запись (value, stored_at), в том числе устаревшая, без учета в статистике"""
+        with self._lock:
+            item, _ = self._lookup(key, time.time())
+            return (item[0], item[1]) if item else None
+
+    def get_or_refresh(self, key, loader):
+        """Запись с загрузкой при отсутствии (stale-while-revalidate)
+
+        Свежая запись отдается сразу. Устаревшая, но моложе ttl + stale_ttl,
+        тоже отдается сразу, а loader запускается в фоне. Иначе loader
+        вызывается синхронно. Если loader вернул None, ничего не кэшируется.
+
+        Args:
+            loader (callable): Загрузка значения без аргументов
+
+        Returns:
+            tuple: (value, stored_at) или None
+        """
+        with self._lock:
+            item, age = self._lookup(key, time.time())
+            if item is not None:
+                self._items.move_to_end(key)
+                if age < self.ttl:
+                    self.hits += 1
+                    return item[0], item[1]
+                self.stale_hits += 1
+                if key not in self._refreshing:
+                    self._refreshing.add(key)
+                    _refresh_executor.submit(self._refresh, key, loader)
+                return item[0], item[1]
+            self.misses += 1
+
+        value = loader()
+        if value is None:
+            return None
+        return value, self.set(key, value)
+
+    def _refresh(self, key, loader):
+        """Фоновое обновление устаревшей записи"""
+        try:
+            value = loader()
+            if value is not None:
+                self.set(key, value)
+                self.refreshes += 1
+        except Exception as e:
+            print(f"[CACHE] Ошибка фонового обновления {self.name}/{key}: {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def get(self, key, default=None):
+        entry = self.get_entry(key)
+        return entry[0] if entry is not None else default
+
+    def set(self, key, value):
+        """Сохранение значения; возвращает время записи"""
+        size = estimate_size(value) if self.max_bytes else 0
+        now = time.time()
+        with self._lock:
+            if key in self._items:
+                self._remove(key)
+            self._items[key] = (value, now, size)
+            self._bytes += size
+            # Вытесняем давно не использованные записи
+            while self._items and (
+                len(self._items) > self.max_entries
+                or (self.max_bytes and self._bytes > self.max_bytes and len(self._items) > 1)
+            ):
+                self._remove(next(iter(self._items)))
+                self.evictions += 1
+        return now
+
+    def pop(self, key):
+        with self._lock:
+            if key in self._items:
+                self._remove(key)
+
+    def __contains__(self, key):
+        """Есть ли актуальная запись (без учета в статистике)"""
+        item = self._items.get(key)
+        return item is not None and time.time() - item[1] < self.ttl
+
+    def cleanup(self):
+        """Удаление просроченных записей; возвращает их количество"""
+        now = time.time()
+        with self._lock:
+            max_age = self.ttl + self.stale_ttl
+            expired = [key for key, item in self._items.items() if now - item[1] >= max_age]
+            for key in expired:
+                self._remove(key)
+            self.expirations += len(expired)
+        return len(expired)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._items),
+                'bytes': self._bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'stale_hits': self.stale_hits,
+                'refreshes': self.refreshes
+            }
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+def get_cache(name):
+    """Кэш пространства name с настройками из CACHES (создается при первом обращении)"""
+    with _caches_lock:
+        cache = _caches.get(name)
+        if cache is None:
+            settings = CACHES[name]
+            cache = _caches[name] = TTLCache(
+                name, settings['TTL'], settings['MAX_ENTRIES'],
+                settings.get('MAX_BYTES'), settings.get('STALE_TTL', 0)
+            )
+        return cache
+
+def cleanup_all():
+    """Удаление просроченных записей во всех кэшах"""
+    return sum(cache.cleanup() for cache in list(_caches.values()))
+
+def stats_all():
+    """Статистика всех кэшей по именам"""
+    return {name: cache.stats() for name, cache in list(_caches.items())}
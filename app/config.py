@@ -5,6 +5,10 @@ APP_HOST = 'localhost'
 APP_PORT = 5000
 APP_DEBUG = True
 
+# Разрешенные origin для Socket.IO (None - только тот же origin, что у дашборда).
+# Не используйте '*': любой открытый сайт сможет читать позиции.
+SOCKETIO_CORS_ORIGINS = None
+
 # Активная биржа
 ACTIVE_EXCHANGE = 'BYBIT'
 
@@ -14,12 +18,87 @@ DEFAULT_PNL_THRESHOLD = 1000
 MIN_PNL_THRESHOLD = 5
 HIGH_ROI_THRESHOLD = 100
 HIGH_LOSS_THRESHOLD = -40
+# Пустой список позиций бывает и при ошибке запроса: пустой снимок
+# публикуется, только если пустой ответ повторился столько раз подряд
+EMPTY_POSITIONS_CONFIRM = 2
+
+# Правила алертов в Telegram: поле позиции, условие, порог и гистерезис
+# (алерт снимается, когда значение отойдет от порога дальше гистерезиса).
+# Встроенные правила включаются флагами TELEGRAM_NOTIFY, свои - всегда.
+ALERT_RULES = [
+    {'NAME': 'high_pnl', 'FIELD': 'pnl', 'OP': '>=', 'THRESHOLD': DEFAULT_PNL_THRESHOLD, 'HYSTERESIS': 100},
+    {'NAME': 'high_roi', 'FIELD': 'roi', 'OP': '>=', 'THRESHOLD': HIGH_ROI_THRESHOLD, 'HYSTERESIS': 10},
+    {'NAME': 'high_loss', 'FIELD': 'pnl', 'OP': '<=', 'THRESHOLD': HIGH_LOSS_THRESHOLD, 'HYSTERESIS': 5}
+]
+
+# Сжатие ответов (brotli, если установлен, иначе gzip)
+COMPRESSION = {
+    'ENABLED': True,
+    'MIN_SIZE': 1024,             # Минимальный размер ответа для сжатия (байт)
+    'GZIP_LEVEL': 6,
+    'BROTLI_LEVEL': 4
+}
+
+# Общий пул HTTP-соединений (Telegram и REST-клиенты бирж)
+HTTP_POOL = {
+    'POOL_CONNECTIONS': 10,       # Количество хостов с отдельным пулом
+    'POOL_MAXSIZE': 20,           # Соединений keep-alive на хост
+    'CONNECT_TIMEOUT': 5,         # Таймаут соединения (сек)
+    'READ_TIMEOUT': 30,           # Таймаут ответа по умолчанию (сек)
+    'RETRIES': 2,                 # Повторы идемпотентных запросов при сбоях
+    'RETRY_BACKOFF': 0.5          # Пауза между повторами (сек), далее x2
+}
 
 # Настройки обновления данных
 UPDATE_INTERVAL = 2000  # Интервал обновления основных данных (мс)
 CHART_UPDATE_INTERVAL = 60000  # Интервал обновления графика (мс)
 CLOSED_PNL_UPDATE_INTERVAL = 10000  # Интервал обновления закрытых позиций (мс)
 
+# Настройки потока позиций (WebSocket)
+POSITION_STREAM = {
+    'ENABLED': True,              # Получать позиции через WebSocket вместо опроса REST
+    'RECONCILE_INTERVAL': 60,     # Интервал сверки книги позиций с REST (сек)
+    'MIN_UPDATE_INTERVAL': 0.5    # Минимальный интервал обработки дельт (сек)
+}
+
+# Настройки потока рыночных данных (котировки через WebSocket)
+MARKET_DATA = {
+    'ENABLED': True,              # Подписка на тикеры открытых позиций и запрошенных символов
+    'MAX_QUOTE_AGE': 5            # Максимальный возраст котировки, после которого используется REST (сек)
+}
+
+# Локальное хранилище свечей
+CANDLE_STORE = {
+    'ENABLED': True,
+    'PATH': 'data/candles.db',    # Файл базы данных SQLite
+    'MAX_CANDLES': 2000,          # Максимум свечей в одной серии (биржа/символ/таймфрейм)
+    'MIN_SYNC_INTERVAL': 10       # Минимальный интервал между запросами новых свечей серии (сек)
+}
+
+# Дельты позиций (/api/positions?since=<версия>)
+POSITIONS_DIFF = {
+    'HISTORY_SIZE': 30            # Сколько последних версий снимка хранить для дельт
+}
+
+# Справочник инструментов биржи (список пар, шаг цены и количества)
+INSTRUMENTS = {
+    'REFRESH_INTERVAL': 3600      # Интервал фонового обновления справочника (сек)
+}
+
+# Настройки индикаторов (/api/indicators)
+INDICATORS = {
+    'CANDLES': 100,               # Количество свечей для расчета индикаторов
+    'SR_LOOKBACK': 100,           # Количество свечей для поиска уровней поддержки/сопротивления
+    'SR_TOLERANCE': 0.005,        # Погрешность кластеризации цен (0.5%)
+    'SR_MIN_TOUCHES': 2           # Минимум точек в кластере, чтобы считать его уровнем
+}
+
+# Настройки скринера (/api/screener)
+SCREENER = {
+    'CANDLES': 1000,              # Количество дневных свечей для анализа
+    'MAX_WORKERS': 8              # Потоки для догрузки свечей
+}
+
 # Настройки графиков
 CHART_MAX_POINTS = 30  # Максимальное количество точек на графике
 CHART_COLORS = {
@@ -33,6 +112,15 @@ CHART_COLORS = {
     }
 }
 
+# Кэши (TTL - время жизни записи в секундах, MAX_BYTES - приблизительный объем,
+# STALE_TTL - сколько еще отдавать устаревшую запись, обновляя ее в фоне)
+CACHES = {
+    'ticker_analysis': {'TTL': 300, 'STALE_TTL': 3600, 'MAX_ENTRIES': 2000, 'MAX_BYTES': 4 * 1024 * 1024},
+    'candles': {'TTL': 300, 'STALE_TTL': 3600, 'MAX_ENTRIES': 500, 'MAX_BYTES': 64 * 1024 * 1024},
+    'sparklines': {'TTL': 300, 'MAX_ENTRIES': 1000, 'MAX_BYTES': 16 * 1024 * 1024},
+    'screener': {'TTL': 300, 'MAX_ENTRIES': 1}
+}
+
 # Настройки графика статистики
 STATISTICS_CHART = {
     'type': 'line',
@@ -101,9 +189,31 @@ LOG_DIR = 'logs'
 LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 LOG_LEVEL = 'INFO'
 
+# Планировщик фоновых задач (отчеты, статистика, очистка кэша, справочник инструментов)
+SCHEDULER = {
+    'MISFIRE_GRACE_TIME': 60,     # Допустимое опоздание запуска (сек)
+    'CACHE_CLEANUP_INTERVAL': 60, # Очистка просроченных записей кэшей (сек)
+    'INSTRUMENTS_CHECK_INTERVAL': 30  # Проверка, пора ли обновить справочник (сек)
+}
+
 # Telegram settings
 TELEGRAM_NOTIFICATIONS_ENABLED = True
 
+# Состояния алертов сохраняются не чаще раза в указанный интервал (сек)
+TELEGRAM_STATES_FLUSH_INTERVAL = 5
+
+# Очередь отправки в Telegram
+TELEGRAM_QUEUE = {
+    'MAX_SIZE': 1000,           # Максимум сообщений в очереди
+    'COALESCE_WINDOW': 1.0,     # Сообщения за это время (сек) склеиваются в одно
+    'RATE_PER_MINUTE': 20,      # Лимит сообщений в чат в минуту
+    'BURST': 3,                 # Сообщений подряд без паузы
+    'MAX_RETRIES': 5,           # Попыток отправки одного сообщения
+    'RETRY_DELAY': 2,           # Первая пауза между попытками (сек), далее x2
+    'REQUEST_TIMEOUT': 10,      # Таймаут запроса к Telegram (сек)
+    'FLUSH_TIMEOUT': 5          # Ожидание отправки очереди при завершении (сек)
+}
+
 # Notification settings
 TELEGRAM_NOTIFY = {
     'ERRORS': True,              # Уведомления об ошибках
@@ -0,0 +1,40 @@
+import hashlib
+from flask import current_app, jsonify, request
+
+def make_etag(*parts):
+    """ETag из версии источника данных (номер снимка, время записи кэша и т.п.)"""
+    key = '|'.join(str(part) for part in parts)
+    return hashlib.blake2b(key.encode(), digest_size=8).hexdigest()
+
+def conditional_response(etag, build):
+    """Условный ответ по If-None-Match
+
+    Если у клиента уже есть эта версия, возвращается пустой 304 и тело
+    не собирается вообще. Иначе вызывается build() (Response или данные
+    для jsonify).
+
+    Args:
+        etag (str): Версия данных (см. make_etag)
+        build (callable): Построение ответа
+    """
+    # Слабое сравнение: после сжатия клиент возвращает W/"..."
+    if request.if_none_match.contains_weak(etag):
+        response = current_app.response_class(status=304)
+    else:
+        response = build()
+        if not isinstance(response, current_app.response_class):
+            response = jsonify(response)
+    # Браузер перепроверяет данные по ETag при каждом запросе
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+def hashed_json_response(data):
+    """jsonify с ETag по хэшу тела (когда у источника нет версии)
+
+    Тело все равно сериализуется, но неизменившийся ответ не передается.
+    """
+    response = jsonify(data)
+    response.add_etag()
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
@@ -0,0 +1,104 @@
+import threading
+import time
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from app.config import HTTP_POOL
+
+class MeteredAdapter(HTTPAdapter):
+    """HTTPAdapter с таймаутом по умолчанию и счетчиками запросов по хостам"""
+
+    def __init__(self, timeout, **kwargs):
+        self.timeout = timeout
+        self._metrics = {}
+        self._metrics_lock = threading.Lock()
+        super().__init__(**kwargs)
+
+    def send(self, request, timeout=None, **kwargs):
+        if timeout is None:
+            timeout = self.timeout
+        host = urlsplit(request.url).netloc
+        started = time.perf_counter()
+        try:
+            response = super().send(request, timeout=timeout, **kwargs)
+        except Exception:
+            self._record(host, started, True)
+            raise
+        self._record(host, started, response.status_code >= 500)
+        return response
+
+    def _record(self, host, started, error):
+        elapsed = time.perf_counter() - started
+        with self._metrics_lock:
+            metrics = self._metrics.setdefault(host, {'requests': 0, 'errors': 0, 'total_time': 0.0})
+            metrics['requests'] += 1
+            metrics['total_time'] += elapsed
+            if error:
+                metrics['errors'] += 1
+
+    def stats(self):
+        """Запросы, ошибки, среднее время и соединения пула по хостам"""
+        with self._metrics_lock:
+            result = {
+                host: {
+                    'requests': metrics['requests'],
+                    'errors': metrics['errors'],
+                    'avg_ms': round(metrics['total_time'] / metrics['requests'] * 1000, 1)
+                }
+                for host, metrics in self._metrics.items()
+            }
+        # Соединения из пулов urllib3: открыто всего и простаивает сейчас
+        pools = self.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            host = pool.host if pool.port in (None, 80, 443) else f"{pool.host}:{pool.port}"
+            entry = result.setdefault(host, {'requests': 0, 'errors': 0, 'avg_ms': 0})
+            entry['connections_opened'] = entry.get('connections_opened', 0) + pool.num_connections
+            entry['pool_requests'] = entry.get('pool_requests', 0) + pool.num_requests
+            entry['idle_connections'] = entry.get('idle_connections', 0) + (pool.pool.qsize() if pool.pool else 0)
+        return result
+
+_adapter = None
+_adapter_lock = threading.Lock()
+
+def get_adapter():
+    """Общий адаптер (пул соединений) для всех сессий"""
+    global _adapter
+    with _adapter_lock:
+        if _adapter is None:
+            # Повторяются только идемпотентные запросы (POST с ордерами - нет)
+            retry = Retry(
+                total=HTTP_POOL['RETRIES'],
+                backoff_factor=HTTP_POOL['RETRY_BACKOFF'],
+                status_forcelist=(502, 503, 504),
+                raise_on_status=False
+            )
+            _adapter = MeteredAdapter(
+                timeout=(HTTP_POOL['CONNECT_TIMEOUT'], HTTP_POOL['READ_TIMEOUT']),
+                pool_connections=HTTP_POOL['POOL_CONNECTIONS'],
+                pool_maxsize=HTTP_POOL['POOL_MAXSIZE'],
+                max_retries=retry
+            )
+        return _adapter
+
+def mount(session):
+    """Подключение общего пула к существующей сессии (например, клиента биржи)
+
+    Объекты, не являющиеся requests.Session, возвращаются без изменений.
+    """
+    if isinstance(session, requests.Session):
+        adapter = get_adapter()
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+    return session
+
+def new_session():
+    """Новая сессия поверх общего пула соединений"""
+    return mount(requests.Session())
+
+def pool_stats():
+    """Статистика пула по хостам"""
+    return _adapter.stats() if _adapter is not None else {}
@@ -7,6 +7,7 @@ TELEGRAM_MESSAGES = {
         'high_roi': '🎯 <b>High ROI Alert</b>\n\nSymbol: {symbol}\nROI: {roi}%\nPnL: {pnl} USDT',
         'high_loss': '⚠️ <b>High Loss Alert</b>\n\nSymbol: {symbol}\nPnL: {pnl} USDT\nROI: {roi}%',
         'high_pnl': '💰 <b>High PnL Alert</b>\n\nSymbol: {symbol}\nPnL: {pnl} USDT\nROI: {roi}%',
+        'custom_alert': '🔔 <b>{name}</b>\n\nSymbol: {symbol}\n{field}: {value}\nPnL: {pnl} USDT\nROI: {roi}%',
         'daily_report': '📊 <b>Daily Report</b> ({date})\n\n💰 Total PnL: {total_pnl} USDT\n📈 Total Profit: {total_profit} USDT\n📉 Total Loss: {total_loss} USDT\n\n📊 Statistics:\n- Total Trades: {total_trades}\n- Profitable: {profitable_count}\n- Losing: {losing_count}\n\n🏆 TOP-3 Profitable:\n{top_profitable}\n\n💔 TOP-3 Losing:\n{top_losing}',
         'statistics': '📊 Statistics Report\nTime: {time}\n\n💰 Total PnL: {total_pnl} USDT\n📈 Total Profit: {total_profit} USDT\n📉 Total Loss: {total_loss} USDT\n\n📊 Positions:\n• Total: {total_trades}\n• Profitable: {profitable_count}\n• Losing: {losing_count}\n\n🏆 TOP-3 Profitable:\n{top_profitable}\n\n💔 TOP-3 Losing:\n{top_losing}',
         'noPositions': 'No positions',
@@ -17,6 +18,7 @@ TELEGRAM_MESSAGES = {
         'high_roi': '🎯 <b>Высокий ROI</b>\n\nСимвол: {symbol}\nROI: {roi}%\nPnL: {pnl} USDT',
         'high_loss': '⚠️ <b>Большой Убыток</b>\n\nСимвол: {symbol}\nPnL: {pnl} USDT\nROI: {roi}%',
         'high_pnl': '💰 <b>Высокий PnL</b>\n\nСимвол: {symbol}\nPnL: {pnl} USDT\nROI: {roi}%',
+        'custom_alert': '🔔 <b>{name}</b>\n\nСимвол: {symbol}\n{field}: {value}\nPnL: {pnl} USDT\nROI: {roi}%',
         'daily_report': '📊 <b>Дневной Отчет</b> ({date})\n\n💰 Общий PnL: {total_pnl} USDT\n📈 Общая прибыль: {total_profit} USDT\n📉 Общий убыток: {total_loss} USDT\n\n📊 Статистика:\n- Всего сделок: {total_trades}\n- Прибыльных: {profitable_count}\n- Убыточных: {losing_count}\n\n🏆 ТОП-3 прибыльных:\n{top_profitable}\n\n💔 ТОП-3 убыточных:\n{top_losing}',
         'statistics': '📊 Статистика\nВремя: {time}\n\n💰 Общий PnL: {total_pnl} USDT\n📈 Общая прибыль: {total_profit} USDT\n📉 Общий убыток: {total_loss} USDT\n\n📊 Позиции:\n• Всего: {total_trades}\n• Прибыльных: {profitable_count}\n• Убыточных: {losing_count}\n\n🏆 ТОП-3 прибыльных:\n{top_profitable}\n\n💔 ТОП-3 убыточных:\n{top_losing}',
         'noPositions': 'Нет позиций',
@@ -0,0 +1,253 @@
+import secrets
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+import numpy as np
+from app.serialization import dumps
+
+MAX_CACHED_BODIES = 16  # Сколько ответов (по разным порогам) хранить в снимке
+
+def position_key(position):
+    """Ключ позиции в дельтах (символ + сторона)"""
+    return f"{position['symbol']}_{position.get('side', '')}"
+
+class PositionsSnapshot:
+    """Неизменяемый снимок позиций для /get_positions
+
+    Снимок собирается фоновым потоком один раз на обновление: позиции
+    сортируются по PnL, считаются префиксные суммы, каждая позиция
+    сериализуется в JSON заранее. Обработчик запроса только находит
+    границы категорий бинарным поиском и склеивает готовые фрагменты.
+
+    Args:
+        positions (list): Открытые позиции
+        rapid_growth (list): Быстрорастущие позиции
+        all_pairs (list): Все доступные пары биржи
+        version (int): Номер снимка
+        last_update (str): Время обновления
+        epoch (str): Идентификатор запуска сервера (входит в token)
+    """
+
+    def __init__(self, positions, rapid_growth, all_pairs, version, last_update, epoch=''):
+        self.version = version
+        # Версия для клиентов: номера снимков разных запусков не пересекаются
+        self.token = f"{epoch}-{version}"
+        self.last_update = last_update
+        # По убыванию PnL: сначала прибыльные, в конце убыточные
+        self.positions = tuple(sorted(positions, key=lambda x: x['pnl'], reverse=True))
+        self._keys = [-position['pnl'] for position in self.positions]
+        self._prefix = [0]
+        for position in self.positions:
+            self._prefix.append(self._prefix[-1] + position['pnl'])
+        self._fragments = [dumps(position) for position in self.positions]
+        self._by_key = {
+            position_key(position): (position, fragment)
+            for position, fragment in zip(self.positions, self._fragments)
+        }
+
+        active_symbols = set(position['symbol'] for position in self.positions)
+        self._rapid_growth = dumps(rapid_growth)
+        self._all_pairs = dumps([pair for pair in all_pairs if pair not in active_symbols])
+        self._last_update = dumps(last_update)
+
+        # Границы: [0, profit_end) - PnL > 0, [loss_start, n) - PnL < 0
+        self._profit_end = bisect_left(self._keys, 0)
+        self._loss_start = bisect_right(self._keys, 0)
+        self._bodies = {}
+        self._bodies_lock = threading.Lock()
+        self._columns = {}
+
+    def _bounds(self, pnl_threshold):
+        """Конец высокоприбыльных позиций (PnL >= порога) в отсортированном списке"""
+        return min(bisect_right(self._keys, -pnl_threshold), self._profit_end)
+
+    def categories(self, pnl_threshold):
+        """Высокоприбыльные, прибыльные и убыточные позиции для порога"""
+        high_end = self._bounds(pnl_threshold)
+        return (
+            list(self.positions[:high_end]),
+            list(self.positions[high_end:self._profit_end]),
+            list(reversed(self.positions[self._loss_start:]))
+        )
+
+    def stats(self, pnl_threshold):
+        """Статистика для порога (формат get_positions)"""
+        high_end = self._bounds(pnl_threshold)
+        total_profit = self._prefix[self._profit_end]
+        total_loss = self._prefix[-1] - self._prefix[self._loss_start]
+        return {
+            'total_pnl': total_profit + total_loss,
+            'total_profit': total_profit,
+            'total_loss': total_loss,
+            'high_profitable_count': high_end,
+            'profitable_count': self._profit_end - high_end,
+            'losing_count': len(self.positions) - self._loss_start,
+            'top_profitable': list(self.positions[:min(3, self._profit_end)]),
+            'top_losing': list(reversed(self.positions[max(self._loss_start, len(self.positions) - 3):])),
+            'total_trades': len(self.positions)
+        }
+
+    def column(self, field, dtype=float):
+        """Поле всех позиций массивом numpy в порядке снимка (кэшируется)"""
+        array = self._columns.get(field)
+        if array is None:
+            if dtype is float:
+                values = [position.get(field) or 0 for position in self.positions]
+            else:
+                values = [position.get(field, '') for position in self.positions]
+            array = self._columns[field] = np.array(values, dtype=dtype)
+        return array
+
+    def same_data(self, other):
+        """Совпадают ли позиции, быстрорастущие позиции и список пар"""
+        return (
+            self._fragments == other._fragments
+            and self._rapid_growth == other._rapid_growth
+            and self._all_pairs == other._all_pairs
+        )
+
+    def _cache_body(self, key, body):
+        with self._bodies_lock:
+            if len(self._bodies) >= MAX_CACHED_BODIES:
+                self._bodies.clear()
+            self._bodies[key] = body
+        return body
+
+    def to_json(self, pnl_threshold, growth_multiplier):
+        """Тело ответа /get_positions (кэшируется по порогу)"""
+        key = (pnl_threshold, growth_multiplier)
+        body = self._bodies.get(key)
+        if body is not None:
+            return body
+
+        high_end = self._bounds(pnl_threshold)
+        fragments = self._fragments
+        body = ''.join([
+            '{"high_profitable":[', ','.join(fragments[:high_end]),
+            '],"profitable":[', ','.join(fragments[high_end:self._profit_end]),
+            '],"losing":[', ','.join(reversed(fragments[self._loss_start:])),
+            '],"stats":', dumps(self.stats(pnl_threshold)),
+            ',"rapid_growth":', self._rapid_growth,
+            ',"last_update":', self._last_update,
+            ',"growth_multiplier":', dumps(growth_multiplier),
+            ',"all_pairs":', self._all_pairs,
+            ',"version":', dumps(self.token),
+            '}'
+        ])
+        return self._cache_body(key, body)
+
+    def diff_json(self, previous, pnl_threshold, growth_multiplier):
+        """Изменения относительно предыдущего снимка
+
+        Возвращает добавленные позиции целиком, ключи закрытых позиций и
+        только изменившиеся поля остальных. Статистика отдается полностью
+        (она небольшая), список пар - только если он изменился.
+
+        Args:
+            previous (PositionsSnapshot): Снимок, который уже есть у клиента
+        """
+        key = (pnl_threshold, growth_multiplier, previous.version)
+        body = self._bodies.get(key)
+        if body is not None:
+            return body
+
+        added = []
+        changed = []
+        for position_id, (position, fragment) in self._by_key.items():
+            old = previous._by_key.get(position_id)
+            if old is None:
+                added.append(fragment)
+            elif old[1] != fragment:
+                fields = {
+                    field: value for field, value in position.items()
+                    if old[0].get(field) != value
+                }
+                fields['key'] = position_id
+                changed.append(dumps(fields))
+        removed = [position_id for position_id in previous._by_key if position_id not in self._by_key]
+
+        parts = [
+            '{"diff":true,"since":', dumps(previous.token),
+            ',"version":', dumps(self.token),
+            ',"added":[', ','.join(added),
+            '],"changed":[', ','.join(changed),
+            '],"removed":', dumps(removed),
+            ',"stats":', dumps(self.stats(pnl_threshold)),
+            ',"rapid_growth":', self._rapid_growth,
+            ',"last_update":', self._last_update,
+            ',"growth_multiplier":', dumps(growth_multiplier)
+        ]
+        if self._all_pairs != previous._all_pairs:
+            parts += [',"all_pairs":', self._all_pairs]
+        parts.append('}')
+        return self._cache_body(key, ''.join(parts))
+
+class SnapshotHolder:
+    """Текущий снимок позиций и кольцевой буфер последних версий
+
+    Фоновый поток публикует новый снимок заменой ссылки, читатели
+    берут ссылку без блокировок и работают с ней до конца запроса.
+    Последние history_size снимков хранятся для ответов since=<версия>.
+
+    Клиентам отдается token "<epoch>-<номер>", где epoch случаен для
+    каждого запуска: после перезапуска сервера старая версия клиента не
+    совпадет с новыми снимками, и он получит полный снимок.
+    """
+
+    def __init__(self, history_size=30):
+        self._lock = threading.Lock()
+        self._version = 0
+        self.epoch = secrets.token_hex(4)
+        self.current = PositionsSnapshot([], [], [], 0, time.strftime('%Y-%m-%d %H:%M:%S'), self.epoch)
+        self._history = OrderedDict([(0, self.current)])
+        self.history_size = history_size
+
+    def get(self, version):
+        """Снимок указанной версии или None, если он уже вытеснен"""
+        return self._history.get(version)
+
+    def get_by_token(self, token):
+        """Снимок по версии клиента или None (чужой запуск, вытеснен, мусор)"""
+        epoch, _, version = str(token).rpartition('-')
+        if epoch != self.epoch or not version.isdigit():
+            return None
+        return self.get(int(version))
+
+    def response_json(self, pnl_threshold, growth_multiplier, since=None, snapshot=None):
+        """Полный ответ или дельта от версии since
+
+        Если версия клиента неизвестна (вытеснена из буфера или из
+        предыдущего запуска - другой epoch), отдается полный снимок.
+
+        Args:
+            since (str, optional): token версии, которая уже есть у клиента
+            snapshot (PositionsSnapshot, optional): Снимок, от которого строится ответ (по умолчанию текущий)
+        """
+        snapshot = snapshot or self.current
+        previous = self.get_by_token(since) if since is not None else None
+        if previous is None or previous.version > snapshot.version:
+            return snapshot.to_json(pnl_threshold, growth_multiplier)
+        return snapshot.diff_json(previous, pnl_threshold, growth_multiplier)
+
+    def publish(self, positions, rapid_growth, all_pairs, last_update):
+        """Сборка и публикация нового снимка
+
+        Если данные не изменились, остается текущий снимок и его версия,
+        чтобы клиенты получали 304 и пустые дельты не рассылались.
+        """
+        with self._lock:
+            snapshot = PositionsSnapshot(
+                positions, rapid_growth, all_pairs, self._version + 1, last_update, self.epoch
+            )
+            if snapshot.same_data(self.current):
+                return self.current
+            self._version += 1
+            history = OrderedDict(self._history)
+            history[snapshot.version] = snapshot
+            while len(history) > self.history_size:
+                history.popitem(last=False)
+            # Буфер тоже заменяется целиком, чтобы читатели не видели его посреди изменения
+            self._history = history
+            self.current = snapshot
+        return snapshot
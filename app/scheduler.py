@@ -0,0 +1,24 @@
+from apscheduler.schedulers.background import BackgroundScheduler
+from apscheduler.triggers.cron import CronTrigger
+from app.config import SCHEDULER
+
+def create_scheduler():
+    """Общий планировщик фоновых задач
+
+    Пропущенные запуски схлопываются в один (coalesce), одна задача не
+    выполняется параллельно сама с собой, опоздание до MISFIRE_GRACE_TIME
+    секунд не приводит к пропуску запуска.
+    """
+    return BackgroundScheduler(
+        daemon=True,
+        job_defaults={
+            'coalesce': True,
+            'max_instances': 1,
+            'misfire_grace_time': SCHEDULER['MISFIRE_GRACE_TIME']
+        }
+    )
+
+def daily_trigger(time_str):
+    """Ежедневный запуск во время 'HH:MM' (локальное время)"""
+    hour, minute = time_str.split(':')
+    return CronTrigger(hour=int(hour), minute=int(minute))
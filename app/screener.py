@@ -0,0 +1,119 @@
+import numpy as np
+from exchanges.indicators import rsi
+
+TREND_PERIOD = 14  # Период для определения тренда
+TREND_THRESHOLD = 1.02  # 2% разница для определения роста/падения
+RSI_PERIOD = 14
+VOLUME_MA_PERIOD = 20
+
+def build_matrix(series, column):
+    """Матрица значений столбца свечей (строка - символ)
+
+    Серии разной длины выравниваются по последней свече, пустые
+    ячейки в начале заполняются NaN.
+
+    Args:
+        series (list): Списки свечей (time, open, high, low, close, volume) по возрастанию времени
+        column (int): Индекс столбца
+    """
+    length = max((len(candles) for candles in series), default=0)
+    matrix = np.full((len(series), length), np.nan)
+    for row, candles in enumerate(series):
+        if candles:
+            matrix[row, length - len(candles):] = [candle[column] for candle in candles]
+    return matrix
+
+def _last_rsi(closes, period=RSI_PERIOD):
+    """Последнее значение RSI для каждой строки (indicators.rsi)
+
+    Строки выровнены по последней свече, поэтому строки с одинаковым
+    числом свечей считаются одной матрицей, как в compute_indicators_batch.
+    """
+    result = np.full(closes.shape[0], np.nan)
+    lengths = np.sum(~np.isnan(closes), axis=1)
+    for length in np.unique(lengths):
+        # Для RSI нужно хотя бы period изменений цены
+        if length <= period:
+            continue
+        rows = np.flatnonzero(lengths == length)
+        result[rows] = rsi(closes[rows, closes.shape[1] - length:], period)[:, -1]
+    return result
+
+def screen_tickers(symbols, series):
+    """Тренд, положение цены в диапазоне и состояние для всех символов за один проход
+
+    Правила совпадают с determine_trend_and_position.
+
+    Args:
+        symbols (list): Символы
+        series (list): Дневные свечи каждого символа (см. build_matrix)
+
+    Returns:
+        list: Строки с полями symbol, trend, state, position_percent, rsi, volume_strength
+            (символы без достаточной истории пропускаются)
+    """
+    if not symbols:
+        return []
+    highs = build_matrix(series, 2)
+    lows = build_matrix(series, 3)
+    closes = build_matrix(series, 4)
+    volumes = build_matrix(series, 5)
+    if closes.shape[1] < TREND_PERIOD:
+        return []
+
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        # Позиция цены в процентах от диапазона
+        min_price = np.min(np.where(np.isnan(lows), np.inf, lows), axis=1)
+        max_price = np.max(np.where(np.isnan(highs), -np.inf, highs), axis=1)
+        current_price = closes[:, -1]
+        price_range = max_price - min_price
+        position_percent = (current_price - min_price) / price_range * 100
+
+        # Тренд: сравнение средних двух половин последних TREND_PERIOD свечей
+        half = TREND_PERIOD // 2
+        recent = closes[:, -TREND_PERIOD:]
+        first_half = recent[:, :half].mean(axis=1)
+        second_half = recent[:, half:].mean(axis=1)
+        trend = np.select(
+            [second_half > first_half * TREND_THRESHOLD, first_half > second_half * TREND_THRESHOLD],
+            ['рост', 'падение'],
+            'флэт'
+        ).astype(object)
+
+        # Сила объема: текущий объем относительно средней за VOLUME_MA_PERIOD свечей
+        volume_strength = volumes[:, -1] / volumes[:, -VOLUME_MA_PERIOD:].mean(axis=1)
+        volume_strength = np.where(np.isfinite(volume_strength), volume_strength, 1.0)
+
+    is_flat = trend == 'флэт'
+    is_falling = trend == 'падение'
+    state = np.select(
+        [
+            position_percent <= 10,
+            position_percent <= 60,
+            position_percent <= 90,
+            position_percent <= 100
+        ],
+        [
+            np.where(is_falling, 'падение', 'дно рынка'),
+            trend,
+            np.where(is_flat, 'диапазон распродажи', np.where(is_falling, 'диапазон падения', 'рост')),
+            np.where(is_flat, 'хай рынка', np.where(is_falling, 'падение', 'диапазон распродажи'))
+        ],
+        None
+    )
+    rsi_values = _last_rsi(closes)
+
+    # Нужна полная история для тренда и ненулевой диапазон цен
+    usable = ~np.isnan(recent).any(axis=1) & (price_range > 0) & np.isfinite(price_range)
+
+    result = []
+    for row in np.flatnonzero(usable):
+        result.append({
+            'symbol': symbols[row],
+            'trend': trend[row],
+            'state': state[row],
+            'position_percent': round(float(position_percent[row]), 2),
+            'rsi': None if np.isnan(rsi_values[row]) else round(float(rsi_values[row]), 2),
+            'volume_strength': round(float(volume_strength[row]), 3)
+        })
+    return result
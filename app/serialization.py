@@ -0,0 +1,108 @@
+import gzip
+import json
+from flask import request
+from flask.json.provider import DefaultJSONProvider
+from app.config import COMPRESSION
+
+# Необязательные ускорители: без них используется stdlib json и только gzip
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = {
+    'application/json', 'application/octet-stream', 'text/html', 'text/plain',
+    'text/css', 'application/javascript', 'image/svg+xml'
+}
+
+def _orjson_default(obj):
+    """Типы, которые orjson не сериализует сам (Decimal, set и т.п.)"""
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    return str(obj)
+
+def dumps(obj, sort_keys=False, indent=None):
+    """Сериализация в JSON-строку (orjson, если установлен)
+
+    По умолчанию компактно; indent - отступ (orjson поддерживает только 2).
+    """
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        try:
+            return orjson.dumps(obj, default=_orjson_default, option=option).decode()
+        except TypeError:
+            # Например, целые больше 64 бит - отдаем stdlib
+            pass
+    if indent:
+        return json.dumps(obj, indent=indent, sort_keys=sort_keys, default=str)
+    return json.dumps(obj, separators=(',', ':'), sort_keys=sort_keys, default=str)
+
+# Аргументы, которые передает DefaultJSONProvider.response() (jsonify)
+COMPACT_SEPARATORS = (',', ':')
+
+class FastJSONProvider(DefaultJSONProvider):
+    """JSON-провайдер Flask для jsonify на базе orjson (fallback - stdlib)
+
+    jsonify всегда передает либо indent=2 (режим отладки), либо компактные
+    separators - оба варианта обрабатывает orjson. Прочие аргументы
+    отдаются stdlib.
+    """
+
+    def dumps(self, obj, **kwargs):
+        indent = kwargs.pop('indent', None)
+        separators = kwargs.pop('separators', None)
+        if (orjson is None or kwargs
+                or indent not in (None, 2)
+                or separators not in (None, COMPACT_SEPARATORS)):
+            if indent is not None:
+                kwargs['indent'] = indent
+            if separators is not None:
+                kwargs['separators'] = separators
+            return super().dumps(obj, **kwargs)
+        return dumps(obj, sort_keys=self.sort_keys, indent=indent)
+
+def compress_response(response):
+    """Сжатие ответа (brotli или gzip по Accept-Encoding) для after_request
+
+    Сжимаются только успешные ответы текстовых типов больше MIN_SIZE.
+    ETag сжатого ответа становится слабым, как у nginx.
+    """
+    if not COMPRESSION['ENABLED']:
+        return response
+    if (response.status_code != 200
+            or response.direct_passthrough
+            or response.is_streamed
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    accept = request.accept_encodings
+    data = response.get_data()
+    if len(data) < COMPRESSION['MIN_SIZE']:
+        return response
+
+    if brotli is not None and accept['br']:
+        compressed = brotli.compress(data, quality=COMPRESSION['BROTLI_LEVEL'])
+        encoding = 'br'
+    elif accept['gzip']:
+        compressed = gzip.compress(data, compresslevel=COMPRESSION['GZIP_LEVEL'])
+        encoding = 'gzip'
+    else:
+        return response
+
+    response.set_data(compressed)
+    response.headers['Content-Encoding'] = encoding
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
@@ -0,0 +1,79 @@
+import hashlib
+from app.config import CHART_COLORS
+
+# Размер как у прежних PNG (2 x 0.75 дюйма при 72 dpi)
+SPARKLINE_WIDTH = 144
+SPARKLINE_HEIGHT = 54
+SPARKLINE_BACKGROUNDS = {
+    'dark': '#2d2d2d',
+    'light': '#ffffff'
+}
+
+def render_sparkline(data, theme='dark', width=SPARKLINE_WIDTH, height=SPARKLINE_HEIGHT):
+    """Спарклайн цен в виде SVG (одна ломаная без осей)
+
+    Args:
+        data (list): Цены по возрастанию времени
+        theme (str): Тема ('dark' или 'light')
+
+    Returns:
+        str: SVG-документ или пустая строка, если точек меньше двух
+    """
+    if len(data) < 2:
+        return ''
+
+    # Цвет по тренду: рост - зеленый, падение - красный
+    color = CHART_COLORS['POSITIVE']['BORDER'] if data[-1] > data[0] else CHART_COLORS['NEGATIVE']['BORDER']
+    background = SPARKLINE_BACKGROUNDS.get(theme, SPARKLINE_BACKGROUNDS['dark'])
+
+    low = min(data)
+    span = max(data) - low
+    step = (width - 2) / (len(data) - 1)
+    if span > 0:
+        scale = (height - 2) / span
+        points = ' '.join(
+            f'{1 + i * step:.1f},{height - 1 - (price - low) * scale:.1f}'
+            for i, price in enumerate(data)
+        )
+    else:
+        points = f'1,{height / 2:.1f} {width - 1},{height / 2:.1f}'
+
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+        f'viewBox="0 0 {width} {height}">'
+        f'<rect width="{width}" height="{height}" fill="{background}"/>'
+        f'<polyline points="{points}" fill="none" stroke="{color}" stroke-width="1" '
+        f'stroke-linejoin="round"/>'
+        f'</svg>'
+    )
+
+def series_hash(data):
+    """Короткий хэш ряда цен (одинаковые данные - одинаковый хэш)"""
+    return hashlib.blake2b(repr(list(data)).encode(), digest_size=8).hexdigest()
+
+class SparklineCache:
+    """Кэш готовых спарклайнов
+
+    Ключ - (символ, тема, хэш ряда цен), поэтому при неизменных данных
+    график не перерисовывается, а хэш служит ETag.
+
+    Args:
+        cache (TTLCache): Хранилище (время жизни и вытеснение LRU)
+    """
+
+    def __init__(self, cache):
+        self.cache = cache
+
+    def get_or_render(self, symbol, data, theme='dark'):
+        """Спарклайн из кэша или новый
+
+        Returns:
+            tuple: (SVG, ETag)
+        """
+        etag = f"{theme}-{series_hash(data)}"
+        key = (symbol, theme, etag)
+        svg = self.cache.get(key)
+        if svg is None:
+            svg = render_sparkline(data, theme)
+            self.cache.set(key, svg)
+        return svg, etag
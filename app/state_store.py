@@ -0,0 +1,73 @@
+import json
+import os
+import tempfile
+import threading
+
+class JSONStateStore:
+    """Отложенное атомарное сохранение состояния в JSON-файл
+
+    mark_dirty() только помечает состояние измененным; файл записывается
+    не чаще раза в interval секунд (и при flush() на завершении). Запись
+    идет во временный файл в той же директории с последующим os.replace,
+    поэтому при сбое на диске остается либо старая, либо новая версия.
+
+    Args:
+        path (str): Путь к файлу
+        build (callable): Построение данных для сохранения
+        interval (float): Минимальный интервал между записями (сек)
+        logger (logging.Logger): Логгер
+    """
+
+    def __init__(self, path, build, interval, logger):
+        self.path = path
+        self._build = build
+        self.interval = interval
+        self.logger = logger
+        self._dirty = False
+        self._timer = None
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+
+    def mark_dirty(self):
+        """Пометка об изменении; запись запланируется через interval"""
+        with self._lock:
+            self._dirty = True
+            if self._timer is None:
+                self._timer = threading.Timer(self.interval, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self):
+        """Немедленная запись, если есть несохраненные изменения"""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._dirty:
+                return
+            self._dirty = False
+
+        with self._write_lock:
+            try:
+                self._write(self._build())
+            except Exception as e:
+                self.logger.error(f"Error saving states: {e}")
+                # Повторим через interval
+                self.mark_dirty()
+
+    def _write(self, data):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp_', suffix='.json')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(data, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+        except Exception:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
@@ -1,4 +1,3 @@
-import requests
 from datetime import datetime
 import logging
 from app.config import *
@@ -9,6 +8,9 @@ import atexit
 import sys
 from threading import Lock
 from app.language import get_current_language, get_telegram_message
+from app.telegram_queue import TelegramQueue
+from app.state_store import JSONStateStore
+from app.alerts import AlertEngine, load_rules
 
 class TelegramNotifier:
     def __init__(self):
@@ -29,11 +31,17 @@ class TelegramNotifier:
         self.api_url = f"https://api.telegram.org/bot{self.bot_token}"
         self.enabled = TELEGRAM_NOTIFICATIONS_ENABLED
         
+        # Сообщения отправляются отдельным потоком через очередь
+        self.outbox = TelegramQueue(self.api_url, self.chat_id, self.logger)
+        
         # Добавляем текущий язык
         self.language = get_current_language()
         
         # Обновляем путь к файлу состояний
         self.states_file = 'app/telegram_states.json'
+        self.states_store = JSONStateStore(
+            self.states_file, self._build_states, TELEGRAM_STATES_FLUSH_INTERVAL, self.logger
+        )
         
         # Добавляем словари для отслеживания
         self.last_notification_time = {}
@@ -48,6 +56,9 @@ class TelegramNotifier:
             'rapid_growth': GROWTH_MULTIPLIER    # 2.0
         }
         
+        # Пороговые алерты по всем позициям снимка
+        self.alert_engine = AlertEngine(load_rules(ALERT_RULES))
+        
         # Загружаем сохраненные состояния или создаем новые
         if os.path.exists(self.states_file):
             try:
@@ -63,6 +74,9 @@ class TelegramNotifier:
                             self.high_loss_positions = set(states.get('high_loss', []))
                             self.rapid_growth_positions = set(states.get('rapid_growth', []))
                             self.high_pnl_positions = set(states.get('high_pnl', []))
+                            self.custom_alert_positions = {
+                                name: set(symbols) for name, symbols in states.get('custom', {}).items()
+                            }
                     else:
                         self._init_empty_states()
             except Exception as e:
@@ -80,6 +94,8 @@ class TelegramNotifier:
     def cleanup(self):
         """Очистка ресурсов при завершении"""
         try:
+            self.states_store.flush()
+            self.outbox.flush(TELEGRAM_QUEUE['FLUSH_TIMEOUT'])
             with self.print_lock:
                 sys.stdout.flush()
         except:
@@ -100,54 +116,38 @@ class TelegramNotifier:
         self.high_loss_positions = set()
         self.rapid_growth_positions = set()
         self.high_pnl_positions = set()
+        self.custom_alert_positions = {}  # Свои правила из ALERT_RULES
         
-        # Удаляем существующий файл состояний
-        if os.path.exists(self.states_file):
-            os.remove(self.states_file)
-        
-        # Сохраняем пустые состояния
+        # Сохраняем пустые состояния (файл перезапишется целиком)
         self._save_states()
 
-    def _save_states(self):
-        """Сохранение состояний в файл"""
-        states = {
+    def _build_states(self):
+        """Состояния для записи в файл
+
+        Вызывается из потока JSONStateStore, поэтому множества состояний
+        никогда не изменяются на месте - писатели заменяют их новыми, и
+        здесь копируется целостное множество.
+        """
+        return {
             'high_roi': list(self.high_roi_positions),
             'high_loss': list(self.high_loss_positions),
             'rapid_growth': list(self.rapid_growth_positions),
             'high_pnl': list(self.high_pnl_positions),
+            'custom': {name: list(symbols) for name, symbols in self.custom_alert_positions.items()},
             'last_update': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         }
-        try:
-            # Создаем директорию app, если её нет
-            os.makedirs('app', exist_ok=True)
-            
-            with open(self.states_file, 'w') as f:
-                json.dump(states, f, indent=2)
-            self.logger.info(f"States saved successfully: {states}")
-        except Exception as e:
-            self.logger.error(f"Error saving states: {e}")
+
+    def _save_states(self):
+        """Сохранение состояний в файл (отложенное, см. JSONStateStore)"""
+        self.states_store.mark_dirty()
 
     def send_message(self, message, parse_mode='HTML'):
-        """Отправка сообщения в Telegram"""
+        """Отправка сообщения в Telegram (через очередь, без ожидания)"""
         
         if not self.enabled:
             return
         
-        try:
-            url = f"{self.api_url}/sendMessage"
-            data = {
-                "chat_id": self.chat_id,
-                "text": message,
-                "parse_mode": parse_mode
-            }
-            
-            response = requests.post(url, data=data)
-            
-            if not response.ok:
-                self.logger.error(f"Failed to send message: {response.text}")
-            
-        except Exception as e:
-            self.logger.error(f"Error sending message: {str(e)}")
+        self.outbox.put(message, parse_mode)
 
     def send_error(self, error):
         if not TELEGRAM_NOTIFY.get('ERRORS', False):
@@ -230,7 +230,7 @@ class TelegramNotifier:
             if symbol in self.rapid_growth_positions:
                 self.logger.info(f"Rapid growth alert for {symbol} already sent")
                 return
-            self.rapid_growth_positions.add(symbol)
+            self.rapid_growth_positions = self.rapid_growth_positions | {symbol}
             self._save_states()
             message = (
                 f"📈 <b>Rapid Growth Alert</b>\n\n"
@@ -244,7 +244,7 @@ class TelegramNotifier:
             if symbol in self.high_roi_positions:
                 self.logger.info(f"High ROI alert for {symbol} already sent and still above threshold")
                 return
-            self.high_roi_positions.add(symbol)
+            self.high_roi_positions = self.high_roi_positions | {symbol}
             self._save_states()
             message = (
                 f"🎯 <b>High ROI Alert</b>\n\n"
@@ -257,7 +257,7 @@ class TelegramNotifier:
             if symbol in self.high_loss_positions:
                 self.logger.info(f"High loss alert for {symbol} already sent and still below threshold")
                 return
-            self.high_loss_positions.add(symbol)
+            self.high_loss_positions = self.high_loss_positions | {symbol}
             self._save_states()
             message = (
                 f"⚠️ <b>High Loss Alert</b>\n\n"
@@ -269,7 +269,7 @@ class TelegramNotifier:
             if symbol in self.high_pnl_positions:
                 self.logger.info(f"High PnL alert for {symbol} already sent and still above threshold")
                 return
-            self.high_pnl_positions.add(symbol)
+            self.high_pnl_positions = self.high_pnl_positions | {symbol}
             self._save_states()
             message = (
                 f"💰 <b>High PnL Alert</b>\n\n"
@@ -284,71 +284,10 @@ class TelegramNotifier:
         # Отправляем сообщение
         self.send_message(message)
 
-    def update_position_states(self, positions, daily_pnl):
-        """Обновляет состояния позиций и удаляет те, что вышли из своих состояний"""
-        changed = False  # Флаг для отслеживания изменений
-        current_symbols = set()
-        
-        for position in positions:
-            symbol = position['symbol']
-            current_symbols.add(symbol)
-            
-            # Проверяем и обновляем состояния
-            if symbol in self.high_roi_positions:
-                if position['roi'] <= HIGH_ROI_THRESHOLD:
-                    self.high_roi_positions.remove(symbol)
-                    self.logger.info(f"{symbol} removed from high ROI positions (ROI: {position['roi']}%)")
-                    changed = True
-            
-            if symbol in self.high_loss_positions:
-                if position['pnl'] > HIGH_LOSS_THRESHOLD:
-                    self.high_loss_positions.remove(symbol)
-                    self.logger.info(f"{symbol} removed from high loss positions (PnL: {position['pnl']} USDT)")
-                    changed = True
-            
-            # Для rapid growth проверяем соотношение роста
-            if symbol in self.rapid_growth_positions:
-                if symbol in daily_pnl:
-                    current_pnl = position['pnl']
-                    start_pnl = daily_pnl[symbol]
-                    if start_pnl > 0 and current_pnl > 0:
-                        growth_ratio = current_pnl / start_pnl
-                        if growth_ratio < GROWTH_MULTIPLIER:
-                            self.rapid_growth_positions.remove(symbol)
-                            self.logger.info(f"{symbol} removed from rapid growth positions (ratio: {growth_ratio:.2f})")
-                            changed = True
-                    else:
-                        self.rapid_growth_positions.remove(symbol)
-                        self.logger.info(f"{symbol} removed from rapid growth positions (negative PnL)")
-                        changed = True
-            
-            # Проверяем high_pnl позиции
-            if symbol in self.high_pnl_positions:
-                if position['pnl'] <= DEFAULT_PNL_THRESHOLD:
-                    self.high_pnl_positions.remove(symbol)
-                    self.logger.info(f"{symbol} removed from high PnL positions (PnL: {position['pnl']:.2f} USDT)")
-                    changed = True
-        
-        # Удаляем позиции, которых больше нет в списке
-        for symbol_set in [self.high_roi_positions, self.high_loss_positions, self.rapid_growth_positions, self.high_pnl_positions]:
-            symbols_to_remove = symbol_set - current_symbols
-            for symbol in symbols_to_remove:
-                symbol_set.remove(symbol)
-                self.logger.info(f"Removed closed position {symbol} from tracking")
-        
-        # Сохраняем состояния только если были изменения
-        if changed:
-            self._save_states()
-
     def send_daily_report(self, stats):
         if not TELEGRAM_NOTIFY.get('DAILY_REPORT', False):
             self.logger.info("Daily report disabled, skipping")
             return
-        
-        current_time = datetime.now().strftime('%H:%M')
-        if current_time != TELEGRAM_NOTIFY['DAILY_REPORT_TIME']:
-            self.logger.info(f"Not time for daily report (current: {current_time}, scheduled: {TELEGRAM_NOTIFY['DAILY_REPORT_TIME']})")
-            return
 
         top_profitable = '\n'.join([
             f"• {pos['symbol']}: {pos['pnl']:.2f} USDT"
@@ -407,50 +346,62 @@ class TelegramNotifier:
         except Exception as e:
             self.logger.error(f"Error in send_statistics: {str(e)}")
 
-    def check_position_notifications(self, position):
-        """Проверяет позицию на различные условия для отправки уведомлений"""
-        symbol = position['symbol']
-        pnl = position['pnl']
-        roi = position['roi']
+    def check_positions(self, snapshot):
+        """Проверяет все позиции снимка по правилам ALERT_RULES
+
+        Уведомления отправляются только при пересечении порога; алерт
+        снимается по гистерезису или при закрытии позиции.
+        """
+        builtin = {
+            'high_pnl': self.high_pnl_positions,
+            'high_roi': self.high_roi_positions,
+            'high_loss': self.high_loss_positions
+        }
+        active = dict(self.custom_alert_positions)
+        active.update(builtin)
         
-        # Проверка на высокий PnL
-        if (TELEGRAM_NOTIFY.get('HIGH_PNL') and 
-            pnl >= DEFAULT_PNL_THRESHOLD and 
-            symbol not in self.high_pnl_positions):
-            self.high_pnl_positions.add(symbol)
-            self._save_states()
-            message = get_telegram_message('high_pnl', self.language).format(
-                symbol=symbol,
-                pnl=f"{pnl:.2f}",
-                roi=f"{roi:.2f}"
-            )
-            self.send_message(message)
+        new_active, entered, exited = self.alert_engine.evaluate(snapshot, active)
         
-        # Проверка на высокий ROI
-        if (TELEGRAM_NOTIFY.get('HIGH_ROI') and 
-            roi >= HIGH_ROI_THRESHOLD and 
-            symbol not in self.high_roi_positions):
-            self.high_roi_positions.add(symbol)
-            self._save_states()
-            message = get_telegram_message('high_roi', self.language).format(
-                symbol=symbol,
-                roi=f"{roi:.2f}",
-                pnl=f"{pnl:.2f}"
-            )
-            self.send_message(message)
+        for name, symbols in exited.items():
+            for symbol in symbols:
+                self.logger.info(f"{symbol} removed from {name} positions")
+        
+        for rule in self.alert_engine.rules:
+            positions = entered.get(rule.name)
+            if not positions:
+                continue
+            # Выключенный тип уведомлений не запоминаем, как и раньше
+            if rule.name in builtin and not TELEGRAM_NOTIFY.get(rule.name.upper()):
+                new_active[rule.name] -= set(position['symbol'] for position in positions)
+                continue
+            for position in positions:
+                self.send_message(self._format_alert(rule, position))
         
-        # Проверка на большой убыток
-        if (TELEGRAM_NOTIFY.get('HIGH_LOSS') and 
-            pnl <= HIGH_LOSS_THRESHOLD and 
-            symbol not in self.high_loss_positions):
-            self.high_loss_positions.add(symbol)
+        if new_active != active:
+            self.high_pnl_positions = new_active.get('high_pnl', set())
+            self.high_roi_positions = new_active.get('high_roi', set())
+            self.high_loss_positions = new_active.get('high_loss', set())
+            self.custom_alert_positions = {
+                name: symbols for name, symbols in new_active.items() if name not in builtin
+            }
             self._save_states()
-            message = get_telegram_message('high_loss', self.language).format(
-                symbol=symbol,
-                pnl=f"{pnl:.2f}",
-                roi=f"{roi:.2f}"
+
+    def _format_alert(self, rule, position):
+        """Текст уведомления по правилу"""
+        pnl = f"{position.get('pnl') or 0:.2f}"
+        roi = f"{position.get('roi') or 0:.2f}"
+        if rule.name in ('high_pnl', 'high_roi', 'high_loss'):
+            return get_telegram_message(rule.name, self.language).format(
+                symbol=position['symbol'], pnl=pnl, roi=roi
             )
-            self.send_message(message)
+        return get_telegram_message('custom_alert', self.language).format(
+            name=rule.name,
+            symbol=position['symbol'],
+            field=rule.field,
+            value=position.get(rule.field),
+            pnl=pnl,
+            roi=roi
+        )
 
     def check_rapid_growth(self, rapid_growth_positions):
         """Проверяет позиции на быстрый рост"""
@@ -463,7 +414,7 @@ class TelegramNotifier:
                 growth_rate = position.get('growth_ratio')
                 pnl = position.get('current_pnl')
                 
-                self.rapid_growth_positions.add(symbol)
+                self.rapid_growth_positions = self.rapid_growth_positions | {symbol}
                 self._save_states()
                 message = get_telegram_message('rapid_growth', self.language).format(
                     symbol=symbol,
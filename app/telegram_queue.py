@@ -0,0 +1,178 @@
+import queue
+import threading
+import time
+import requests
+from urllib3.exceptions import NewConnectionError
+from app.config import TELEGRAM_QUEUE
+from app.http_pool import new_session
+
+MAX_MESSAGE_LENGTH = 4096  # Ограничение Telegram на длину сообщения
+MAX_RETRY_DELAY = 60       # Верхняя граница паузы между повторами (сек)
+
+def _failed_before_send(error):
+    """Ошибка произошла до отправки запроса (соединение не установлено)"""
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    if isinstance(error, requests.ConnectionError) and error.args:
+        return isinstance(getattr(error.args[0], 'reason', None), NewConnectionError)
+    return False
+
+class TokenBucket:
+    """Ограничение частоты: rate токенов в секунду, не больше capacity подряд"""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Ожидание свободного токена"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+class TelegramQueue:
+    """Очередь исходящих сообщений Telegram с отдельным потоком отправки
+
+    put() только кладет сообщение в очередь, поэтому мониторинг позиций не
+    ждет Telegram. Поток отправки склеивает сообщения, пришедшие в течение
+    COALESCE_WINDOW (например, все алерты одного обновления), в одно,
+    соблюдает лимит чата через TokenBucket и повторяет неудачные отправки
+    с экспоненциальной паузой (при 429 - с паузой из retry_after).
+    sendMessage не идемпотентен, поэтому повторяются только 429, 5xx и
+    ошибки соединения до отправки; таймаут чтения ответа не повторяется.
+
+    Args:
+        api_url (str): URL Bot API с токеном
+        chat_id (str): Чат получателя
+        logger (logging.Logger): Логгер уведомлений
+    """
+
+    def __init__(self, api_url, chat_id, logger):
+        self.api_url = api_url
+        self.chat_id = chat_id
+        self.logger = logger
+        self._queue = queue.Queue(maxsize=TELEGRAM_QUEUE['MAX_SIZE'])
+        self._bucket = TokenBucket(TELEGRAM_QUEUE['RATE_PER_MINUTE'] / 60, TELEGRAM_QUEUE['BURST'])
+        self._session = new_session()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self.sent = 0     # Отправленные сообщения (после склейки)
+        self.dropped = 0  # Отброшенные из-за переполнения очереди
+        self.failed = 0   # Не доставленные после всех попыток
+
+    def _ensure_started(self):
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+
+    def put(self, text, parse_mode='HTML'):
+        """Постановка сообщения в очередь (не блокирует)"""
+        self._ensure_started()
+        try:
+            self._queue.put_nowait((text, parse_mode))
+        except queue.Full:
+            self.dropped += 1
+            self.logger.error("Telegram queue is full, message dropped")
+
+    def flush(self, timeout):
+        """Ожидание отправки очереди (не дольше timeout секунд)"""
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.1)
+
+    def _collect(self):
+        """Первое сообщение и все, что пришли за COALESCE_WINDOW после него"""
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + TELEGRAM_QUEUE['COALESCE_WINDOW']
+        while True:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+        return batch
+
+    @staticmethod
+    def _coalesce(batch):
+        """Склейка сообщений подряд с одинаковым parse_mode в пределах MAX_MESSAGE_LENGTH"""
+        messages = []
+        for text, parse_mode in batch:
+            if messages:
+                last_text, last_mode = messages[-1]
+                if last_mode == parse_mode and len(last_text) + 2 + len(text) <= MAX_MESSAGE_LENGTH:
+                    messages[-1] = (f"{last_text}\n\n{text}", parse_mode)
+                    continue
+            messages.append((text, parse_mode))
+        return messages
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            try:
+                for text, parse_mode in self._coalesce(batch):
+                    self._deliver(text, parse_mode)
+            except Exception as e:
+                self.logger.error(f"Error in Telegram queue: {str(e)}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _deliver(self, text, parse_mode):
+        """Отправка одного сообщения с повторами"""
+        data = {
+            "chat_id": self.chat_id,
+            "text": text,
+            "parse_mode": parse_mode
+        }
+        delay = TELEGRAM_QUEUE['RETRY_DELAY']
+        for attempt in range(1, TELEGRAM_QUEUE['MAX_RETRIES'] + 1):
+            self._bucket.acquire()
+            retry_after = None
+            try:
+                response = self._session.post(
+                    f"{self.api_url}/sendMessage", data=data, timeout=TELEGRAM_QUEUE['REQUEST_TIMEOUT']
+                )
+            except requests.RequestException as e:
+                if not _failed_before_send(e):
+                    # Сообщение могло дойти - повтор дал бы дубликат
+                    self.failed += 1
+                    self.logger.error(f"Failed to send message (not retried): {e}")
+                    return False
+                error = str(e)
+            else:
+                if response.ok:
+                    self.sent += 1
+                    return True
+                error = response.text
+                if response.status_code == 429:
+                    try:
+                        retry_after = response.json().get('parameters', {}).get('retry_after')
+                    except ValueError:
+                        pass
+                elif response.status_code < 500:
+                    # Ошибка в самом запросе - повтор не поможет
+                    self.failed += 1
+                    self.logger.error(f"Failed to send message: {error}")
+                    return False
+
+            self.logger.warning(f"Telegram send attempt {attempt} failed: {error}")
+            if attempt < TELEGRAM_QUEUE['MAX_RETRIES']:
+                time.sleep(retry_after or delay)
+                delay = min(delay * 2, MAX_RETRY_DELAY)
+
+        self.failed += 1
+        self.logger.error(f"Failed to send message after {TELEGRAM_QUEUE['MAX_RETRIES']} attempts")
+        return False
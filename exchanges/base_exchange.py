@@ -1,6 +1,42 @@
 from abc import ABC, abstractmethod
+import concurrent.futures
+import threading
+import time
+import numpy as np
+from app.config import POSITION_STREAM, MARKET_DATA, CANDLE_STORE, INDICATORS, INSTRUMENTS
+from .market_data import QuoteTable
+from .candle_store import CandleStore
+from .instruments import InstrumentCatalog
+from .single_flight import SingleFlight
+from . import indicators
+
+_candle_stores = {}
+
+def get_candle_store():
+    """Общее хранилище свечей (одно на файл базы данных)"""
+    path = CANDLE_STORE['PATH']
+    if path not in _candle_stores:
+        _candle_stores[path] = CandleStore(path, CANDLE_STORE['MAX_CANDLES'])
+    return _candle_stores[path]
 
 class BaseExchange(ABC):
+    EXCHANGE_NAME = None  # Ключ биржи в хранилище свечей
+    KLINE_INTERVALS = {}  # Таймфрейм ('1m', '1h', '1d', ...) -> интервал API биржи
+    KLINE_FETCH_LIMIT = 1000  # Максимум свечей в одном запросе к API
+
+    # Длительность свечи в мс (для месяца берется минимальная, чтобы не недобрать свечи)
+    CANDLE_INTERVAL_MS = {
+        '1m': 60 * 1000,
+        '5m': 5 * 60 * 1000,
+        '15m': 15 * 60 * 1000,
+        '30m': 30 * 60 * 1000,
+        '1h': 60 * 60 * 1000,
+        '4h': 4 * 60 * 60 * 1000,
+        '1d': 24 * 60 * 60 * 1000,
+        '1w': 7 * 24 * 60 * 60 * 1000,
+        '1M': 28 * 24 * 60 * 60 * 1000
+    }
+
     def __init__(self, api_key, api_secret, position_mode='Hedge', limit_order_offset=0.01):
         self.api_key = api_key
         self.api_secret = api_secret
@@ -9,12 +45,249 @@ class BaseExchange(ABC):
         self.max_profit_values = {}
         self.max_loss_values = {}
         self.daily_pnl = {}
+        self.position_book = None  # Книга позиций WebSocket (создается в start_position_stream)
+        self._positions_version = 0
+        self.quotes = QuoteTable()  # Последние котировки из публичных потоков
+        self._market_data_started = False
+        self._watch_lock = threading.Lock()
+        self.candle_store = None
+        if CANDLE_STORE['ENABLED']:
+            try:
+                self.candle_store = get_candle_store()
+            except Exception as e:
+                print(f"Не удалось открыть хранилище свечей: {e}")
+        self._candle_locks = {}
+        self._candle_sync_times = {}
+        # Объединение одинаковых одновременных запросов к бирже (см. single_flight)
+        self._single_flight = SingleFlight()
+        # Справочник инструментов (фоновое обновление запускается из app.py)
+        self.instruments = InstrumentCatalog(
+            self.EXCHANGE_NAME, self._load_instruments, INSTRUMENTS['REFRESH_INTERVAL']
+        )
 
     @abstractmethod
     def get_positions(self):
         """Получение активных позиций"""
         pass
 
+    def start_position_stream(self):
+        """Запуск потока позиций через WebSocket
+
+        Returns:
+            bool: True, если биржа поддерживает поток и он запущен
+        """
+        return False
+
+    def _fetch_raw_positions(self):
+        """Получение сырых позиций через REST (снимок для книги позиций)"""
+        raise NotImplementedError
+
+    def _position_stream_alive(self):
+        """Активно ли соединение потока позиций"""
+        return self.position_book is not None and self.position_book.connected
+
+    def _get_raw_positions(self):
+        """Сырые позиции из книги WebSocket, либо REST-снимок, если поток недоступен"""
+        book = self.position_book
+        if book is None or not self._position_stream_alive():
+            if book is not None:
+                book.invalidate()
+            return self._fetch_raw_positions()
+
+        if book.needs_reconcile(POSITION_STREAM['RECONCILE_INTERVAL']):
+            # Дельты, пришедшие во время запроса, книга применит поверх снимка
+            requested_at = book.begin_snapshot()
+            try:
+                raw_positions = self._fetch_raw_positions()
+            except Exception:
+                book.cancel_snapshot()
+                raise
+            book.load_snapshot(raw_positions, requested_at)
+        self._positions_version = book.version
+        return [self._apply_mark_price(p) for p in book.positions()]
+
+    def _apply_mark_price(self, raw_position):
+        """Пересчет нереализованного PnL позиции по последней mark-цене
+
+        Нужен биржам, чей поток позиций не присылает изменения PnL при
+        движении цены. Должен возвращать новый dict, не изменяя книгу.
+        """
+        return raw_position
+
+    def wait_positions_update(self, timeout):
+        """Пауза между обновлениями позиций
+
+        В режиме потока возвращается сразу после прихода дельты (но не чаще
+        MIN_UPDATE_INTERVAL), иначе просто ждет timeout секунд.
+        """
+        book = self.position_book
+        if book is None or not book.is_live():
+            time.sleep(timeout)
+            return
+        min_interval = min(POSITION_STREAM['MIN_UPDATE_INTERVAL'], timeout)
+        time.sleep(min_interval)
+        book.wait_for_update(self._positions_version, timeout - min_interval)
+
+    def start_market_data(self):
+        """Запуск публичного потока котировок (ticker/bookTicker/mark price)
+
+        Returns:
+            bool: True, если биржа поддерживает поток и он запущен
+        """
+        return False
+
+    def _subscribe_quotes(self, symbols):
+        """Подписка потока котировок на новые символы"""
+        pass
+
+    def watch_symbols(self, symbols):
+        """Добавление символов (без USDT) в подписку на котировки"""
+        with self._watch_lock:
+            new_symbols = set(symbols) - self.quotes.watched
+            if not new_symbols:
+                return
+            self.quotes.watched.update(new_symbols)
+            if self._market_data_started:
+                self._subscribe_quotes(sorted(new_symbols))
+
+    def _watched_symbols(self):
+        """Копия списка отслеживаемых символов (для переподписки после переподключения)"""
+        with self._watch_lock:
+            return sorted(self.quotes.watched)
+
+    def _get_cached_ticker(self, symbol):
+        """Тикер из таблицы котировок без обращения к REST
+
+        Если котировки нет, символ добавляется в подписку, чтобы следующие
+        запросы обслуживались из памяти.
+        """
+        ticker = self.quotes.ticker(symbol, MARKET_DATA['MAX_QUOTE_AGE'])
+        if ticker is None:
+            self.watch_symbols([symbol])
+        return ticker
+
+    def _fetch_klines(self, symbol, timeframe, limit, end_time=None):
+        """Запрос последних limit свечей с временем открытия <= end_time (по умолчанию - до текущей)
+
+        Returns:
+            list: Кортежи (time, open, high, low, close, volume) по возрастанию времени
+        """
+        raise NotImplementedError
+
+    @staticmethod
+    def _parse_kline(kline):
+        """Свеча API (time, open, high, low, close, volume, ...) -> кортеж чисел"""
+        return (int(float(kline[0])),) + tuple(float(value) for value in kline[1:6])
+
+    CANDLE_COLUMNS = ('times', 'open', 'high', 'low', 'close', 'volume')
+
+    @staticmethod
+    def _format_candles(rows, layout='rows'):
+        """Кортежи свечей -> формат ответа get_chart_data
+
+        Args:
+            rows (list): Кортежи (time, open, high, low, close, volume) по возрастанию времени
+            layout (str): 'rows' - список словарей, 'columns' - словарь массивов
+                (times, open, high, low, close, volume), 'binary' - те же столбцы
+                подряд как little-endian float64 (для Float64Array)
+        """
+        if layout in ('columns', 'binary'):
+            matrix = np.asarray(rows, dtype=np.float64).reshape(-1, 6)
+            if layout == 'binary':
+                # Столбцы подряд: сначала все времена, затем open и т.д.
+                return np.ascontiguousarray(matrix.T, dtype='<f8').tobytes()
+            columns = {
+                name: matrix[:, index].tolist()
+                for index, name in enumerate(BaseExchange.CANDLE_COLUMNS)
+            }
+            columns['times'] = matrix[:, 0].astype(np.int64).tolist()
+            return columns
+        return [
+            {
+                'time': row[0],
+                'open': row[1],
+                'high': row[2],
+                'low': row[3],
+                'close': row[4],
+                'volume': row[5]
+            }
+            for row in rows
+        ]
+
+    def _fetch_klines_paged(self, symbol, timeframe, limit):
+        """Загрузка limit последних свечей несколькими запросами (от новых к старым)"""
+        rows = []
+        end_time = None
+        while len(rows) < limit:
+            request_limit = min(limit - len(rows), self.KLINE_FETCH_LIMIT)
+            batch = self._fetch_klines(symbol, timeframe, request_limit, end_time)
+            rows = batch + rows
+            if len(batch) < request_limit:
+                break  # Дошли до начала истории
+            end_time = batch[0][0] - 1
+        return rows
+
+    def get_candles(self, symbol, timeframe, limit):
+        """Последние limit свечей по возрастанию времени
+
+        Свечи берутся из локального хранилища; с биржи догружаются только
+        свечи новее последней сохраненной (последняя перезаписывается,
+        так как она могла быть не закрыта).
+
+        Returns:
+            list: Кортежи (time, open, high, low, close, volume)
+        """
+        if timeframe not in self.KLINE_INTERVALS:
+            raise ValueError(f'Неподдерживаемый таймфрейм: {timeframe}')
+        store = self.candle_store
+        if store is None:
+            return self._fetch_klines_paged(symbol, timeframe, limit)
+
+        limit = min(limit, store.max_candles)
+        key = (self.EXCHANGE_NAME, symbol, timeframe)
+        lock = self._candle_locks.setdefault(key, threading.Lock())
+        with lock:
+            last_sync = self._candle_sync_times.get(key)
+            if (last_sync is None or time.time() - last_sync >= CANDLE_STORE['MIN_SYNC_INTERVAL']
+                    or store.depth(*key) < limit):
+                self._sync_candles(key, limit)
+        return store.load(*key, limit)
+
+    def get_candles_batch(self, symbols, timeframe, limit, max_workers=8):
+        """Свечи для списка символов (синхронизация хранилища в нескольких потоках)
+
+        Returns:
+            list: Свечи каждого символа в порядке symbols (пустой список при ошибке)
+        """
+        def load(symbol):
+            try:
+                return self.get_candles(symbol, timeframe, limit)
+            except Exception as e:
+                print(f"[{self.EXCHANGE_NAME}] Ошибка получения свечей {symbol}: {str(e)}")
+                return []
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(load, symbols))
+
+    def _sync_candles(self, key, limit):
+        """Догрузка новых свечей серии в хранилище"""
+        store = self.candle_store
+        exchange, symbol, timeframe = key
+        now = time.time()
+        last_time = store.last_time(*key)
+        missing = None
+        if last_time is not None:
+            missing = int((now * 1000 - last_time) // self.CANDLE_INTERVAL_MS[timeframe]) + 1
+
+        if store.depth(*key) < limit or missing is None or missing > self.KLINE_FETCH_LIMIT:
+            # Первая загрузка, нужна более глубокая история или слишком длинный разрыв
+            if missing is not None and missing > self.KLINE_FETCH_LIMIT:
+                store.clear(*key)
+            store.save(*key, self._fetch_klines_paged(symbol, timeframe, limit), depth=limit)
+        else:
+            store.save(*key, self._fetch_klines(symbol, timeframe, missing))
+        self._candle_sync_times[key] = now
+
     @abstractmethod
     def get_closed_pnl(self, sort_by='time'):
         """Получение закрытых позиций"""
@@ -54,14 +327,89 @@ class BaseExchange(ABC):
         pass
 
     @abstractmethod
+    def _load_instruments(self):
+        """Загрузка бессрочных USDT-фьючерсов биржи
+
+        Returns:
+            list: Список Instrument (символ без USDT)
+        """
+        raise NotImplementedError
+
     def get_all_pairs(self):
-        """Получение списка всех доступных бессрочных фьючерсов"""
-        pass
+        """Получение списка всех доступных бессрочных фьючерсов (из справочника)"""
+        return self.instruments.pairs()
 
-    def get_chart_data(self, symbol, timeframe='1h', period='1w'):
-        """Получение данных для графика"""
+    def get_chart_data(self, symbol, timeframe='1h', period='1w', layout='rows'):
+        """Получение данных для графика (layout - формат свечей, см. _format_candles)"""
         raise NotImplementedError
 
     def get_indicators(self, symbol, timeframe='1h'):
-        """Получение значений индикаторов"""
-        raise NotImplementedError
\ No newline at end of file
+        """Получение значений индикаторов
+        
+        Args:
+            symbol (str): Символ торговой пары
+            timeframe (str): Таймфрейм
+            
+        Returns:
+            dict: Значения индикаторов
+        """
+        try:
+            print(f"[{self.EXCHANGE_NAME}] Запрос индикаторов для {symbol}, таймфрейм: {timeframe}")
+            
+            if timeframe not in self.KLINE_INTERVALS:
+                print(f"[{self.EXCHANGE_NAME}] Неподдерживаемый таймфрейм: {timeframe}")
+                return {
+                    'success': False,
+                    'error': f'Неподдерживаемый таймфрейм: {timeframe}'
+                }
+
+            # Свечей должно хватить и на индикаторы, и на поиск уровней
+            klines = self.get_candles(
+                symbol, timeframe, max(INDICATORS['CANDLES'], INDICATORS['SR_LOOKBACK'])
+            )
+            if not klines:
+                return {
+                    'success': False,
+                    'error': 'Нет данных свечей'
+                }
+
+            return {
+                'success': True,
+                'data': indicators.compute_indicators(klines)
+            }
+
+        except Exception as e:
+            print(f"[{self.EXCHANGE_NAME}] Ошибка при расчете индикаторов: {str(e)}")
+            return {
+                'success': False,
+                'error': str(e)
+            }
+
+    def get_indicators_batch(self, symbols, timeframe='1h'):
+        """Индикаторы (RSI, тренд, канал, объемы) сразу для многих символов
+
+        Returns:
+            dict: {'success': True, 'data': {символ: индикаторы}} (символы без свечей пропускаются)
+        """
+        try:
+            if timeframe not in self.KLINE_INTERVALS:
+                return {
+                    'success': False,
+                    'error': f'Неподдерживаемый таймфрейм: {timeframe}'
+                }
+
+            series = self.get_candles_batch(symbols, timeframe, INDICATORS['CANDLES'])
+            results = indicators.compute_indicators_batch(series)
+            return {
+                'success': True,
+                'data': {
+                    symbol: result for symbol, result in zip(symbols, results) if result is not None
+                }
+            }
+
+        except Exception as e:
+            print(f"[{self.EXCHANGE_NAME}] Ошибка при пакетном расчете индикаторов: {str(e)}")
+            return {
+                'success': False,
+                'error': str(e)
+            }
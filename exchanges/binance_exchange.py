@@ -1,18 +1,38 @@
 from binance.client import Client
 from .base_exchange import BaseExchange
+from .position_book import PositionBook
+from .single_flight import single_flight
+from .websocket_client import WebSocketWorker
+from .instruments import Instrument
+from app.config import MARKET_DATA
+from app import http_pool
 from datetime import datetime, timedelta
 import time
 import traceback
 import pandas as pd
-import numpy as np
 
 def clean_symbol(symbol):
     return symbol.replace('USDT', '')
 
 class BinanceExchange(BaseExchange):
+    FUTURES_WS_URL = 'wss://fstream.binance.com'
+    EXCHANGE_NAME = 'BINANCE'
+    KLINE_INTERVALS = {
+        '1m': Client.KLINE_INTERVAL_1MINUTE,
+        '5m': Client.KLINE_INTERVAL_5MINUTE,
+        '15m': Client.KLINE_INTERVAL_15MINUTE,
+        '30m': Client.KLINE_INTERVAL_30MINUTE,
+        '1h': Client.KLINE_INTERVAL_1HOUR,
+        '4h': Client.KLINE_INTERVAL_4HOUR,
+        '1d': Client.KLINE_INTERVAL_1DAY,
+        '1w': Client.KLINE_INTERVAL_1WEEK,
+        '1M': Client.KLINE_INTERVAL_1MONTH
+    }
+
     def __init__(self, api_key, api_secret, position_mode='Hedge', limit_order_offset=0.01):
         super().__init__(api_key, api_secret, position_mode, limit_order_offset)
         self.client = Client(api_key, api_secret)
+        http_pool.mount(getattr(self.client, 'session', None))
         self.daily_pnl = {}
         self.last_reset_day = None
         self.max_profit_values = {}
@@ -28,14 +48,118 @@ class BinanceExchange(BaseExchange):
             if "No need to change position side" not in str(e):
                 print(f"[BINANCE] Error setting position mode: {str(e)}")
 
+    def start_position_stream(self):
+        """Подписка на пользовательский поток фьючерсов Binance (ACCOUNT_UPDATE)"""
+        try:
+            self.position_book = PositionBook(
+                key_func=lambda p: (p['symbol'], p.get('positionSide', 'BOTH')),
+                is_active_func=lambda p: float(p['positionAmt']) != 0
+            )
+            self._listen_key = None
+            self._user_ws = WebSocketWorker(
+                'binance-user',
+                url=self._user_stream_url,
+                on_message=self._handle_user_message,
+                on_open=lambda: self.position_book.set_connected(True),
+                on_close=lambda: self.position_book.set_connected(False),
+                keepalive=lambda: self.client.futures_stream_keepalive(listenKey=self._listen_key),
+                keepalive_interval=30 * 60  # listenKey живет 60 минут без продления
+            )
+            self._user_ws.start()
+            print("[BINANCE] Поток позиций запущен")
+            return True
+        except Exception as e:
+            print(f"[BINANCE] Не удалось запустить поток позиций: {e}")
+            self.position_book = None
+            return False
+
+    def _user_stream_url(self):
+        # Новый listenKey при каждом подключении
+        self._listen_key = self.client.futures_stream_get_listen_key()
+        return f"{self.FUTURES_WS_URL}/ws/{self._listen_key}"
+
+    def _handle_user_message(self, message):
+        """Обработка событий пользовательского потока"""
+        event = message.get('e')
+        if event == 'listenKeyExpired':
+            self._user_ws.reconnect()
+            return
+        if event != 'ACCOUNT_UPDATE':
+            return
+        # Приводим позиции потока к формату futures_position_information
+        positions = [{
+            'symbol': p['s'],
+            'positionAmt': p['pa'],
+            'entryPrice': p['ep'],
+            'unRealizedProfit': p['up'],
+            'positionSide': p.get('ps', 'BOTH')
+        } for p in message.get('a', {}).get('P', [])]
+        if positions:
+            self.position_book.apply_delta(positions)
+
+    def _apply_mark_price(self, raw_position):
+        quote = self.quotes.get(clean_symbol(raw_position['symbol']), MARKET_DATA['MAX_QUOTE_AGE'])
+        if quote is None or quote.mark is None:
+            return raw_position
+        # ACCOUNT_UPDATE не приходит при движении цены, поэтому PnL считаем сами
+        position = dict(raw_position)
+        position['unRealizedProfit'] = (
+            float(raw_position['positionAmt']) * (quote.mark - float(raw_position['entryPrice']))
+        )
+        return position
+
+    def start_market_data(self):
+        """Подписка на mark price всех символов и bookTicker отслеживаемых символов"""
+        try:
+            self._market_ws = WebSocketWorker(
+                'binance-market',
+                url=f"{self.FUTURES_WS_URL}/ws",
+                on_message=self._handle_market_message,
+                on_open=self._resubscribe_quotes
+            )
+            with self._watch_lock:
+                self._market_data_started = True
+            self._market_ws.start()
+            print("[BINANCE] Поток котировок запущен")
+            return True
+        except Exception as e:
+            print(f"[BINANCE] Не удалось запустить поток котировок: {e}")
+            return False
+
+    def _resubscribe_quotes(self):
+        self._market_ws.send({'method': 'SUBSCRIBE', 'params': ['!markPrice@arr@1s'], 'id': 1})
+        self._subscribe_quotes(self._watched_symbols())
+
+    def _subscribe_quotes(self, symbols):
+        params = [f"{symbol.lower()}usdt@bookTicker" for symbol in symbols]
+        for i in range(0, len(params), 50):
+            self._market_ws.send({
+                'method': 'SUBSCRIBE',
+                'params': params[i:i + 50],
+                'id': int(time.time() * 1000) + i
+            })
+
+    def _handle_market_message(self, message):
+        """Обработка mark price (массив по всем символам) и bookTicker"""
+        if isinstance(message, list):
+            for item in message:
+                if item.get('e') == 'markPriceUpdate' and item['s'].endswith('USDT'):
+                    self.quotes.update(clean_symbol(item['s']), mark=item['p'], last=item['p'])
+            return
+        if message.get('e') == 'bookTicker':
+            self.quotes.update(clean_symbol(message['s']), bid=message['b'], ask=message['a'])
+
+    def _fetch_raw_positions(self):
+        """Получение открытых позиций через REST"""
+        positions = self.client.futures_position_information()
+        return [p for p in positions if float(p['positionAmt']) != 0]
+
     def get_positions(self):
         try:
-            positions = self.client.futures_position_information()
+            active_positions = self._get_raw_positions()
             processed_positions = []
             rapid_growth_positions = []
             
-            active_positions = [p for p in positions if float(p['positionAmt']) != 0]
-            
             for position in active_positions:
                 symbol = clean_symbol(position['symbol'])
                 current_pnl = float(position['unRealizedProfit'])
@@ -164,52 +288,39 @@ class BinanceExchange(BaseExchange):
         except Exception:
             return []
 
+    @single_flight
     def get_symbol_chart_data(self, symbol):
         try:
             # Преобразуем символ в формат Binance
             binance_symbol = f"{symbol}USDT"
             
-            # Проверяем, существует ли такой символ
-            exchange_info = self.client.futures_exchange_info()
-            valid_symbols = [s['symbol'] for s in exchange_info['symbols']]
-            
-            if binance_symbol not in valid_symbols:
+            # Проверяем, существует ли такой символ (по справочнику, без запроса к бирже)
+            if self.instruments.loaded and symbol not in self.instruments:
                 print(f"Symbol {binance_symbol} not found in Binance")
                 return []
             
-            klines = self.client.futures_klines(
-                symbol=binance_symbol,
-                interval=Client.KLINE_INTERVAL_5MINUTE,
-                limit=24
-            )
-            return [float(k[4]) for k in klines]  # Берем цены закрытия
+            candles = self.get_candles(symbol, '5m', 24)
+            return [candle[4] for candle in candles]  # Берем цены закрытия
         except Exception as e:
             print(f"Error getting Binance chart data for {symbol}: {e}")
             return []
 
+    @single_flight
     def get_sma200_position(self, symbol):
         try:
             # Преобразуем символ в формат Binance
             binance_symbol = f"{symbol}USDT"
             
-            # Проверяем, существует ли такой символ
-            exchange_info = self.client.futures_exchange_info()
-            valid_symbols = [s['symbol'] for s in exchange_info['symbols']]
-            
-            if binance_symbol not in valid_symbols:
+            # Проверяем, существует ли такой символ (по справочнику, без запроса к бирже)
+            if self.instruments.loaded and symbol not in self.instruments:
                 print(f"Symbol {binance_symbol} not found in Binance")
                 return None
             
-            klines = self.client.futures_klines(
-                symbol=binance_symbol,
-                interval=Client.KLINE_INTERVAL_1DAY,
-                limit=200
-            )
+            closes = [candle[4] for candle in self.get_candles(symbol, '1d', 200)]
             
-            if len(klines) >= 200:
-                closes = [float(k[4]) for k in klines]
-                sma200 = sum(closes[:200]) / 200
-                current_price = float(klines[0][4])
+            if len(closes) >= 200:
+                sma200 = sum(closes[-200:]) / 200
+                current_price = closes[-1]
                 return current_price > sma200
                 
             return None
@@ -218,9 +329,14 @@ class BinanceExchange(BaseExchange):
             print(f"Error getting Binance SMA200 for {symbol}: {e}")
             return None
 
+    @single_flight
     def get_ticker(self, symbol):
         """Получение текущих данных тикера"""
         try:
+            cached = self._get_cached_ticker(symbol)
+            if cached:
+                return cached
+            
             binance_symbol = f"{symbol}USDT"
             ticker = self.client.futures_orderbook_ticker(symbol=binance_symbol)
             mark_price = self.client.futures_mark_price(symbol=binance_symbol)
@@ -314,23 +430,26 @@ class BinanceExchange(BaseExchange):
                 'message': f'Error closing position: {str(e)}'
             }
 
-    def get_all_pairs(self):
-        """Получение списка всех доступных бессрочных фьючерсов"""
-        try:
-            exchange_info = self.client.futures_exchange_info()
-            
-            # Фильтруем только активные бессрочные контракты
-            pairs = [
-                clean_symbol(symbol['symbol'])  # Илуем существующую функцию clean_symbol
-                for symbol in exchange_info['symbols']
-                if symbol['status'] == 'TRADING' 
-                and symbol['contractType'] == 'PERPETUAL'
-                and symbol['symbol'].endswith('USDT')
-            ]
-            return sorted(pairs)
-        except Exception as e:
-            print(f"Error getting Binance pairs: {str(e)}")
-            return []
+    def _load_instruments(self):
+        """Загрузка активных бессрочных USDT-фьючерсов"""
+        exchange_info = self.client.futures_exchange_info()
+        instruments = []
+        for symbol in exchange_info['symbols']:
+            if (symbol['status'] != 'TRADING'
+                    or symbol['contractType'] != 'PERPETUAL'
+                    or not symbol['symbol'].endswith('USDT')):
+                continue
+            filters = {f['filterType']: f for f in symbol.get('filters', [])}
+            lot_filter = filters.get('LOT_SIZE', {})
+            instruments.append(Instrument(
+                symbol=clean_symbol(symbol['symbol']),
+                exchange_symbol=symbol['symbol'],
+                tick_size=float(filters.get('PRICE_FILTER', {}).get('tickSize', 0)),
+                lot_size=float(lot_filter.get('stepSize', 0)),
+                min_qty=float(lot_filter.get('minQty', 0)),
+                contract_type=symbol['contractType']
+            ))
+        return instruments
 
     def close_positions(self, positions_to_close):
         """Закрытие нескольких позиций
@@ -441,46 +560,33 @@ class BinanceExchange(BaseExchange):
                 'message': f'Error in close_positions: {str(e)}'
             } for position in positions_to_close]
 
-    def get_chart_data(self, symbol, timeframe='1h', period='1w'):
+    @single_flight
+    def get_chart_data(self, symbol, timeframe='1h', period='1w', layout='rows'):
         try:
             print(f"[BINANCE] Запрос данных для {symbol}, таймфрейм: {timeframe}, период: {period}")
             
             # Специальная обработка для таймфрейма "all"
             if timeframe == 'all':
                 # Последовательно пробуем разные интервалы
-                intervals = [
-                    (Client.KLINE_INTERVAL_1MINUTE, '1m'),
-                    (Client.KLINE_INTERVAL_5MINUTE, '5m'),
-                    (Client.KLINE_INTERVAL_15MINUTE, '15m'),
-                    (Client.KLINE_INTERVAL_30MINUTE, '30m'),
-                    (Client.KLINE_INTERVAL_1HOUR, '1h'),
-                    (Client.KLINE_INTERVAL_4HOUR, '4h'),
-                    (Client.KLINE_INTERVAL_1DAY, '1d'),
-                    (Client.KLINE_INTERVAL_1WEEK, '1w'),
-                    (Client.KLINE_INTERVAL_1MONTH, '1M')
-                ]
+                intervals = ['1m', '5m', '15m', '30m', '1h', '4h', '1d', '1w', '1M']
                 
                 selected_interval = None
                 selected_klines = None
                 
-                for interval, interval_name in intervals:
+                for interval_name in intervals:
                     try:
                         print(f"[BINANCE] Пробуем интервал {interval_name}")
-                        klines = self.client.futures_klines(
-                            symbol=f"{symbol}USDT",
-                            interval=interval,
-                            limit=1000
-                        )
+                        klines = self.get_candles(symbol, interval_name, 1000)
                         
                         if len(klines) <= 500:
-                            selected_interval = interval
+                            selected_interval = interval_name
                             selected_klines = klines
                             print(f"[BINANCE] Выбран интервал {interval_name} ({len(klines)} свечей)")
                             break
                         
                         # Если это последний интервал, используем его независимо от количества свечей
-                        if interval == Client.KLINE_INTERVAL_1MONTH:
-                            selected_interval = interval
+                        if interval_name == '1M':
+                            selected_interval = interval_name
                             selected_klines = klines
                             print(f"[BINANCE] Использован последний интервал {interval_name} ({len(klines)} свечей)")
                     except Exception as e:
@@ -493,50 +599,20 @@ class BinanceExchange(BaseExchange):
                     raise Exception("Не удалось получить данные ни для одного интервала")
             else:
                 # Стандартная обработка для конкретного таймфрейма
-                timeframe_map = {
-                    '1m': Client.KLINE_INTERVAL_1MINUTE,
-                    '5m': Client.KLINE_INTERVAL_5MINUTE,
-                    '15m': Client.KLINE_INTERVAL_15MINUTE,
-                    '30m': Client.KLINE_INTERVAL_30MINUTE,
-                    '1h': Client.KLINE_INTERVAL_1HOUR,
-                    '4h': Client.KLINE_INTERVAL_4HOUR,
-                    '1d': Client.KLINE_INTERVAL_1DAY,
-                    '1w': Client.KLINE_INTERVAL_1WEEK
-                }
-                
-                interval = timeframe_map.get(timeframe)
-                if not interval:
+                if timeframe not in self.KLINE_INTERVALS:
                     print(f"[BINANCE] Неподдерживаемый таймфрейм: {timeframe}")
                     return {
                         'success': False,
                         'error': f'Неподдерживаемый таймфрейм: {timeframe}'
                     }
                 
-                klines = self.client.futures_klines(
-                    symbol=f"{symbol}USDT",
-                    interval=interval,
-                    limit=1000
-                )
+                klines = self.get_candles(symbol, timeframe, 1000)
 
             print(f"[BINANCE] Получено {len(klines)} свечей")
             if klines:
                 print(f"[BINANCE] Пример первой свечи: {klines[0]}")
             
-            # Преобразуем данные в формат свечей
-            candles = []
-            for k in klines:
-                candle = {
-                    'time': int(k[0]),
-                    'open': float(k[1]),
-                    'high': float(k[2]),
-                    'low': float(k[3]),
-                    'close': float(k[4]),
-                    'volume': float(k[5])
-                }
-                candles.append(candle)
-            
-            # Сортируем свечи от старых к новым
-            candles.sort(key=lambda x: x['time'])
+            candles = self._format_candles(klines, layout)
             
             result = {
                 'success': True,
@@ -545,7 +621,7 @@ class BinanceExchange(BaseExchange):
                 }
             }
             
-            print(f"[BINANCE] Подготовлен ответ с {len(candles)} свечами")
+            print(f"[BINANCE] Подготовлен ответ с {len(klines)} свечами")
             return result
             
         except Exception as e:
@@ -556,327 +632,15 @@ class BinanceExchange(BaseExchange):
                 'error': str(e)
             }
 
-    def get_indicators(self, symbol, timeframe='1h'):
-        """Получение значений индикаторов
-        
-        Args:
-            symbol (str): Символ торговой пары
-            timeframe (str): Таймфрейм
-            
-        Returns:
-            dict: Значения индикаторов
-        """
-        try:
-            print(f"[BINANCE] Запрос индикаторов для {symbol}, таймфрейм: {timeframe}")
-            
-            # Конвертируем таймфрейм в формат Binance
-            timeframe_map = {
-                '1m': Client.KLINE_INTERVAL_1MINUTE,
-                '5m': Client.KLINE_INTERVAL_5MINUTE,
-                '15m': Client.KLINE_INTERVAL_15MINUTE,
-                '30m': Client.KLINE_INTERVAL_30MINUTE,
-                '1h': Client.KLINE_INTERVAL_1HOUR,
-                '4h': Client.KLINE_INTERVAL_4HOUR,
-                '1d': Client.KLINE_INTERVAL_1DAY,
-                '1w': Client.KLINE_INTERVAL_1WEEK
-            }
-            
-            interval = timeframe_map.get(timeframe)
-            if not interval:
-                print(f"[BINANCE] Неподдерживаемый таймфрейм: {timeframe}")
-                return {
-                    'success': False,
-                    'error': f'Неподдерживаемый таймфрейм: {timeframe}'
-                }
-
-            # Получаем последние 100 свечей для расчета индикаторов
-            klines = self.client.get_klines(
-                symbol=f"{symbol}USDT",
-                interval=interval,
-                limit=100
-            )
-
-            if not klines:
-                return {
-                    'success': False,
-                    'error': 'Не удалось получить данные свечей'
-                }
-
-            # Преобразуем данные в массивы для расчетов
-            closes = np.array([float(k[4]) for k in klines])  # Цены закрытия
-            highs = np.array([float(k[2]) for k in klines])   # Максимумы
-            lows = np.array([float(k[3]) for k in klines])    # Минимумы
-            volumes = np.array([float(k[5]) for k in klines])  # Объемы
-            timestamps = [int(k[0]) for k in klines]          # Временные метки
-
-            # 1. Расчет RSI
-            rsi = self._calculate_rsi(closes)
-            current_rsi = rsi[-1]
-            
-            # Определение состояния RSI
-            rsi_status = "Нейтральный"
-            if current_rsi >= 70:
-                rsi_status = "Перекуплен"
-            elif current_rsi <= 30:
-                rsi_status = "Перепродан"
-
-            # 2. Расчет тренда
-            trend_info = self._calculate_trend(closes)
-            
-            # 3. Расчет объемов
-            volume_info = self._calculate_volume_metrics(volumes)
-
-            # 4. Расчет уровней поддержки и сопротивления
-            support_resistance = self._calculate_support_resistance(highs, lows, closes)
-
-            # 5. Расчет точек входа/выхода
-            entry_exit = self._calculate_entry_exit_points(
-                closes[-1], 
-                support_resistance['support'], 
-                support_resistance['resistance'],
-                trend_info['direction']
-            )
-
-            # 6. Расчет торгового канала
-            channel = self._calculate_trading_channel(highs, lows)
-
-            # Формируем рекомендацию
-            recommendation = self._generate_recommendation(
-                current_rsi,
-                trend_info['direction'],
-                closes[-1],
-                support_resistance,
-                volume_info['volume_trend']
-            )
-
-            return {
-                'success': True,
-                'data': {
-                    'time': {
-                        'timestamp': timestamps[-1],
-                        'datetime': datetime.fromtimestamp(timestamps[-1]/1000).strftime('%Y-%m-%d %H:%M:%S')
-                    },
-                    'price': {
-                        'current': closes[-1],
-                        'high_24h': max(highs[-24:]) if len(highs) >= 24 else highs[-1],
-                        'low_24h': min(lows[-24:]) if len(lows) >= 24 else lows[-1]
-                    },
-                    'rsi': {
-                        'value': round(current_rsi, 2),
-                        'status': rsi_status
-                    },
-                    'trend': {
-                        'direction': trend_info['direction'],
-                        'strength': trend_info['strength']
-                    },
-                    'volume': {
-                        'current_24h': volume_info['current_24h'],
-                        'change_percent': volume_info['change_percent'],
-                        'trend': volume_info['volume_trend']
-                    },
-                    'levels': {
-                        'support': support_resistance['support'],
-                        'resistance': support_resistance['resistance']
-                    },
-                    'entry_exit': {
-                        'entry_point': entry_exit['entry_point'],
-                        'stop_loss': entry_exit['stop_loss'],
-                        'target': entry_exit['target']
-                    },
-                    'channel': {
-                        'upper': channel['upper'],
-                        'lower': channel['lower'],
-                        'position': channel['position']
-                    },
-                    'recommendation': recommendation
-                }
-            }
-
-        except Exception as e:
-            print(f"[BINANCE] Ошибка при расчете индикаторов: {str(e)}")
-            return {
-                'success': False,
-                'error': str(e)
-            }
-
-    def _calculate_rsi(self, closes, period=14):
-        """Расчет RSI"""
-        deltas = np.diff(closes)
-        seed = deltas[:period+1]
-        up = seed[seed >= 0].sum()/period
-        down = -seed[seed < 0].sum()/period
-        rs = up/down
-        rsi = np.zeros_like(closes)
-        rsi[:period] = 100. - 100./(1. + rs)
-
-        for i in range(period, len(closes)):
-            delta = deltas[i-1]
-            if delta > 0:
-                upval = delta
-                downval = 0.
-            else:
-                upval = 0.
-                downval = -delta
-
-            up = (up*(period-1) + upval)/period
-            down = (down*(period-1) + downval)/period
-            rs = up/down
-            rsi[i] = 100. - 100./(1. + rs)
-
-        return rsi
-
-    def _calculate_trend(self, closes):
-        """Расчет тренда и его силы"""
-        # Используем 20-периодную SMA для определения тренда
-        sma20 = np.mean(closes[-20:])
-        current_price = closes[-1]
-        
-        # Определяем направление тренда
-        if current_price > sma20 * 1.02:  # Цена выше SMA на 2%
-            direction = "Восходящий"
-        elif current_price < sma20 * 0.98:  # Цена ниже SMA на 2%
-            direction = "Нисходящий"
-        else:
-            direction = "Боковой"
-
-        # Рассчитываем силу тренда на основе отклонения от SMA
-        deviation = abs((current_price - sma20) / sma20 * 100)
-        if deviation < 2:
-            strength = "Слабый"
-        elif deviation < 5:
-            strength = "Умеренный"
-        else:
-            strength = "Сильный"
-
-        return {
-            'direction': direction,
-            'strength': strength
+    def _fetch_klines(self, symbol, timeframe, limit, end_time=None):
+        params = {
+            'symbol': f"{symbol}USDT",
+            'interval': self.KLINE_INTERVALS[timeframe],
+            'limit': limit
         }
-
-    def _calculate_volume_metrics(self, volumes):
-        """Расчет метрик объема"""
-        current_24h = sum(volumes[-24:]) if len(volumes) >= 24 else sum(volumes)
-        prev_24h = sum(volumes[-48:-24]) if len(volumes) >= 48 else sum(volumes)
-        
-        # Изменение объема
-        if prev_24h > 0:
-            change_percent = ((current_24h - prev_24h) / prev_24h) * 100
-        else:
-            change_percent = 0
-
-        # Определяем тренд объема
-        if change_percent > 10:
-            volume_trend = "Растущий"
-        elif change_percent < -10:
-            volume_trend = "Падающий"
-        else:
-            volume_trend = "Стабильный"
-
-        return {
-            'current_24h': current_24h,
-            'change_percent': round(change_percent, 2),
-            'volume_trend': volume_trend
-        }
-
-    def _calculate_support_resistance(self, highs, lows, closes):
-        """Расчет уровней поддержки и сопротивления"""
-        # Используем метод кластеризации цен
-        all_prices = np.concatenate([highs, lows, closes])
-        price_clusters = {}
-
-        # Группируем цены в кластеры с погрешностью 0.5%
-        for price in all_prices:
-            found_cluster = False
-            for cluster_price in list(price_clusters.keys()):
-                if abs(price - cluster_price) / cluster_price < 0.005:
-                    price_clusters[cluster_price] += 1
-                    found_cluster = True
-                    break
-            if not found_cluster:
-                price_clusters[price] = 1
-
-        # Сортируем кластеры по количеству точек
-        sorted_clusters = sorted(price_clusters.items(), key=lambda x: x[1], reverse=True)
-        
-        current_price = closes[-1]
-        support = current_price
-        resistance = current_price
-
-        # Находим ближайшие уровни поддержки и сопротивления
-        for price, _ in sorted_clusters:
-            if price < current_price and price > support:
-                support = price
-            elif price > current_price and price < resistance:
-                resistance = price
-
-        return {
-            'support': support,
-            'resistance': resistance
-        }
-
-    def _calculate_entry_exit_points(self, current_price, support, resistance, trend):
-        """Расчет точек входа, выхода и стоп-лосса"""
-        # Расчет точки входа
-        if trend == "Восходящий":
-            entry_point = support + (resistance - support) * 0.382  # Уровень Фибоначчи
-        else:
-            entry_point = resistance - (resistance - support) * 0.382
-
-        # Расчет стоп-лосса (2% от точки входа)
-        stop_loss = entry_point * 0.98 if trend == "Восходящий" else entry_point * 1.02
-
-        # Расчет целевой цены (соотношение риск/прибыль 1:2)
-        risk = abs(entry_point - stop_loss)
-        target = entry_point + (risk * 2) if trend == "Восходящий" else entry_point - (risk * 2)
-
-        return {
-            'entry_point': round(entry_point, 8),
-            'stop_loss': round(stop_loss, 8),
-            'target': round(target, 8)
-        }
-
-    def _calculate_trading_channel(self, highs, lows):
-        """Расчет торгового канала"""
-        # Используем последние 20 свечей для канала
-        period = 20
-        recent_highs = highs[-period:]
-        recent_lows = lows[-period:]
-
-        upper = np.max(recent_highs)
-        lower = np.min(recent_lows)
-        current = (highs[-1] + lows[-1]) / 2
-
-        # Определяем положение текущей цены в канале
-        channel_height = upper - lower
-        if channel_height > 0:
-            position_percent = ((current - lower) / channel_height) * 100
-            if position_percent < 25:
-                position = "Нижняя часть канала"
-            elif position_percent > 75:
-                position = "Верхняя часть канала"
-            else:
-                position = "Середина канала"
-        else:
-            position = "Неопределено"
-
-        return {
-            'upper': upper,
-            'lower': lower,
-            'position': position
-        }
-
-    def _generate_recommendation(self, rsi, trend_direction, current_price, support_resistance, volume_trend):
-        """Генерация торговой рекомендации"""
-        if rsi >= 70 and trend_direction == "Восходящий" and volume_trend == "Падающий":
-            return "Возможна коррекция - рекомендуется фиксация прибыли"
-        elif rsi <= 30 and trend_direction == "Нисходящий" and volume_trend == "Растущий":
-            return "Возможен отскок - рекомендуется поиск точки входа"
-        elif trend_direction == "Восходящий" and current_price < support_resistance['resistance']:
-            return "Восходящий тренд - рассмотреть покупку на откате"
-        elif trend_direction == "Нисходящий" and current_price > support_resistance['support']:
-            return "Нисходящий тренд - рассмотреть продажу на росте"
-        else:
-            return "Нейтральная ситуация - рекомендуется наблюдение"
+        if end_time is not None:
+            params['endTime'] = end_time
+        return [self._parse_kline(k) for k in self.client.futures_klines(**params)]
 
     def get_wallet_balance(self):
         """Получает общий баланс кошелька и реализованный PNL"""
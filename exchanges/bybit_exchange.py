@@ -1,5 +1,9 @@
-from pybit.unified_trading import HTTP
+from pybit.unified_trading import HTTP, WebSocket
 from .base_exchange import BaseExchange
+from .position_book import PositionBook
+from .single_flight import single_flight
+from .instruments import Instrument
+from app import http_pool
 from http.client import IncompleteRead, RemoteDisconnected
 import requests.exceptions
 import time
@@ -8,9 +12,9 @@ import sys
 from app.config import (
     GROWTH_MULTIPLIER,
     HIGH_ROI_THRESHOLD,
-    HIGH_LOSS_THRESHOLD
+    HIGH_LOSS_THRESHOLD,
+    MARKET_DATA
 )
-import numpy as np
 import pandas as pd
 import logging
 
@@ -23,6 +27,18 @@ def clean_symbol(symbol):
     return symbol.replace('USDT', '')
 
 class BybitExchange(BaseExchange):
+    EXCHANGE_NAME = 'BYBIT'
+    KLINE_INTERVALS = {
+        '1m': '1',
+        '5m': '5',
+        '15m': '15',
+        '30m': '30',
+        '1h': '60',
+        '4h': '240',
+        '1d': 'D',
+        '1w': 'W'
+    }
+
     def __init__(self, api_key, api_secret, test_server=False, position_mode='Hedge', limit_order_offset=0.1):
         super().__init__(api_key, api_secret)
         self.client = HTTP(
@@ -32,6 +48,11 @@ class BybitExchange(BaseExchange):
             timeout=30,
             recv_window=20000
         )
+        # REST-запросы pybit идут через общий пул соединений
+        http_pool.mount(getattr(self.client, 'client', None))
+        self.test_server = test_server
+        self._private_ws = None
+        self._public_ws = None
         self.position_mode = position_mode
         self.limit_order_offset = limit_order_offset  # Отсутп цены для лимитного ордера в процентах
         self.daily_pnl = {}
@@ -47,101 +68,226 @@ class BybitExchange(BaseExchange):
             self.daily_pnl[symbol] = float(position['unrealisedPnl'])
         self.last_reset_day = datetime.now().date()
 
-    def get_positions(self):
+    def start_position_stream(self):
+        """Подписка на приватный поток позиций Bybit"""
         try:
-            retries = 3
-            retry_delay = 5
-            
-            for attempt in range(retries):
-                try:
-                    all_positions = []
-                    cursor = None
-                    rapid_growth_positions = []
-                    
-                    while True:
-                        params = {
-                            "category": "linear",
-                            "settleCoin": "USDT",
-                            "limit": 100
-                        }
-                        if cursor:
-                            params["cursor"] = cursor
-                        
-                        try:
-                            response = self.client.get_positions(**params)
-                            positions = response['result']['list']
-                            
-                            active_positions = [p for p in positions if abs(float(p['size'])) > 0]
-                            all_positions.extend(active_positions)
-                            
-                            cursor = response['result'].get('nextPageCursor')
-                            if not cursor:
-                                break
-                                
-                        except (ConnectionError, IncompleteRead, RemoteDisconnected, requests.exceptions.ConnectionError) as e:
-                            print("Connection error on attempt {}: {}".format(attempt + 1, str(e)))
-                            if attempt < retries - 1:
-                                time.sleep(retry_delay)
-                                continue
-                            raise
-                    
-                    if not all_positions:
-                        print("No active positions")
-                        return [], []
+            self.position_book = PositionBook(
+                key_func=lambda p: (p['symbol'], p.get('positionIdx', 0)),
+                is_active_func=lambda p: abs(float(p.get('size') or 0)) > 0
+            )
+            self._private_ws = WebSocket(
+                testnet=self.test_server,
+                channel_type="private",
+                api_key=self.api_key,
+                api_secret=self.api_secret
+            )
+            self._hook_connection_state(self._private_ws, self.position_book)
+            self._private_ws.position_stream(callback=self._handle_position_message)
+            self.position_book.set_connected(self._private_ws.is_connected())
+            print("[BYBIT] Поток позиций запущен")
+            return True
+        except Exception as e:
+            print(f"[BYBIT] Не удалось запустить поток позиций: {e}")
+            self.position_book = None
+            return False
+
+    @staticmethod
+    def _hook_connection_state(ws, book):
+        """Передача разрывов и переподключений pybit в книгу позиций
+
+        У WebSocket pybit нет публичных колбэков соединения, поэтому
+        оборачиваются его _on_open/_on_close (вызываются при каждом
+        подключении, в том числе автоматическом переподключении).
+        """
+        on_open = getattr(ws, '_on_open', None)
+        on_close = getattr(ws, '_on_close', None)
+        if on_open is None or on_close is None:
+            print("[BYBIT] Не удалось отслеживать состояние потока позиций, используется is_connected()")
+            return
+
+        def opened(*args, **kwargs):
+            result = on_open(*args, **kwargs)
+            book.set_connected(True)
+            return result
+
+        def closed(*args, **kwargs):
+            book.set_connected(False)
+            return on_close(*args, **kwargs)
+
+        ws._on_open = opened
+        ws._on_close = closed
+
+    def _position_stream_alive(self):
+        ws = getattr(self, '_private_ws', None)
+        book = self.position_book
+        if book is None or ws is None:
+            return False
+        alive = ws.is_connected()
+        if book.connected != alive:
+            # Разрыв, о котором не сообщил колбэк
+            book.set_connected(alive)
+        return alive
+
+    def _handle_position_message(self, message):
+        """Обработка дельт позиций из WebSocket"""
+        positions = []
+        for position in message.get('data', []):
+            if position.get('category', 'linear') != 'linear':
+                continue
+            # В потоке цена входа может приходить как entryPrice
+            if 'avgPrice' not in position and 'entryPrice' in position:
+                position['avgPrice'] = position['entryPrice']
+            positions.append(position)
+        if positions:
+            self.position_book.apply_delta(positions)
+
+    def _apply_mark_price(self, raw_position):
+        quote = self.quotes.get(clean_symbol(raw_position['symbol']), MARKET_DATA['MAX_QUOTE_AGE'])
+        if quote is None or quote.mark is None:
+            return raw_position
+        direction = 1 if raw_position['side'] == 'Buy' else -1
+        position = dict(raw_position)
+        position['unrealisedPnl'] = (
+            (quote.mark - float(raw_position['avgPrice'])) * abs(float(raw_position['size'])) * direction
+        )
+        return position
 
-                    if self.last_reset_day is None or datetime.now().date() != self.last_reset_day:
-                        self.reset_daily_pnl(all_positions)
+    def start_market_data(self):
+        """Подписка на публичный поток тикеров Bybit"""
+        try:
+            self._public_ws = WebSocket(testnet=self.test_server, channel_type="linear")
+            with self._watch_lock:
+                self._market_data_started = True
+                if self.quotes.watched:
+                    self._subscribe_quotes(sorted(self.quotes.watched))
+            print("[BYBIT] Поток котировок запущен")
+            return True
+        except Exception as e:
+            print(f"[BYBIT] Не удалось запустить поток котировок: {e}")
+            return False
+
+    def _subscribe_quotes(self, symbols):
+        # pybit сам переподписывается после переподключения
+        for i in range(0, len(symbols), 10):
+            self._public_ws.ticker_stream(
+                symbol=[f"{symbol}USDT" for symbol in symbols[i:i + 10]],
+                callback=self._handle_ticker_message
+            )
+
+    def _handle_ticker_message(self, message):
+        """Обработка снимков и дельт тикеров (дельта содержит только изменившиеся поля)"""
+        data = message.get('data', {})
+        if not data.get('symbol'):
+            return
+        self.quotes.update(
+            clean_symbol(data['symbol']),
+            last=data.get('lastPrice'),
+            bid=data.get('bid1Price'),
+            ask=data.get('ask1Price'),
+            mark=data.get('markPrice')
+        )
+
+    def _fetch_raw_positions(self):
+        """Получение всех открытых позиций через REST с постраничной загрузкой"""
+        retries = 3
+        retry_delay = 5
+        
+        for attempt in range(retries):
+            try:
+                all_positions = []
+                cursor = None
+                
+                while True:
+                    params = {
+                        "category": "linear",
+                        "settleCoin": "USDT",
+                        "limit": 100
+                    }
+                    if cursor:
+                        params["cursor"] = cursor
                     
-                    processed_positions = []
-                    for position in all_positions:
-                        symbol = clean_symbol(position['symbol'])
-                        current_pnl = float(position['unrealisedPnl'])
-                        position_size = abs(float(position['size']))
-                        roi = (current_pnl / (float(position['avgPrice']) * position_size) * 100)
-                        
-                        if current_pnl > 0:
-                            if symbol not in self.max_profit_values or current_pnl > self.max_profit_values[symbol]:
-                                self.max_profit_values[symbol] = current_pnl
-                        else:
-                            if symbol not in self.max_loss_values or current_pnl < self.max_loss_values[symbol]:
-                                self.max_loss_values[symbol] = current_pnl
-                        
-                        position_info = {
-                            'symbol': symbol,
-                            'pnl': current_pnl,
-                            'max_profit': self.max_profit_values.get(symbol, 0),
-                            'max_loss': self.max_loss_values.get(symbol, 0),
-                            'roi': roi,
-                            'high_roi': roi > HIGH_ROI_THRESHOLD,
-                            'high_loss': current_pnl < HIGH_LOSS_THRESHOLD,
-                            'side': 'Long' if position['side'] == 'Buy' else 'Short',
-                            'size': position_size
-                        }
+                    try:
+                        response = self.client.get_positions(**params)
+                        positions = response['result']['list']
                         
-                        processed_positions.append(position_info)
+                        active_positions = [p for p in positions if abs(float(p['size'])) > 0]
+                        all_positions.extend(active_positions)
                         
-                        if symbol in self.daily_pnl:
-                            start_pnl = self.daily_pnl[symbol]
-                            if start_pnl > 0 and current_pnl > 0:
-                                growth_ratio = current_pnl / start_pnl
-                                if growth_ratio >= GROWTH_MULTIPLIER:
-                                    rapid_growth_positions.append({
-                                        'symbol': symbol,
-                                        'start_pnl': start_pnl,
-                                        'current_pnl': current_pnl,
-                                        'growth_ratio': growth_ratio
-                                    })
-                        else:
-                            self.daily_pnl[symbol] = current_pnl
-                    
-                    return processed_positions, rapid_growth_positions
-                    
-                except Exception as e:
-                    if attempt < retries - 1:
-                        print("Attempt {} failed: {}, retrying in {} seconds...".format(attempt + 1, str(e), retry_delay))
-                        time.sleep(retry_delay)
-                        continue
-                    raise
+                        cursor = response['result'].get('nextPageCursor')
+                        if not cursor:
+                            break
+                            
+                    except (ConnectionError, IncompleteRead, RemoteDisconnected, requests.exceptions.ConnectionError) as e:
+                        print("Connection error on attempt {}: {}".format(attempt + 1, str(e)))
+                        if attempt < retries - 1:
+                            time.sleep(retry_delay)
+                            continue
+                        raise
+                
+                return all_positions
+                
+            except Exception as e:
+                if attempt < retries - 1:
+                    print("Attempt {} failed: {}, retrying in {} seconds...".format(attempt + 1, str(e), retry_delay))
+                    time.sleep(retry_delay)
+                    continue
+                raise
+
+    def get_positions(self):
+        try:
+            all_positions = self._get_raw_positions()
+            rapid_growth_positions = []
+            
+            if not all_positions:
+                print("No active positions")
+                return [], []
+
+            if self.last_reset_day is None or datetime.now().date() != self.last_reset_day:
+                self.reset_daily_pnl(all_positions)
+            
+            processed_positions = []
+            for position in all_positions:
+                symbol = clean_symbol(position['symbol'])
+                current_pnl = float(position['unrealisedPnl'])
+                position_size = abs(float(position['size']))
+                roi = (current_pnl / (float(position['avgPrice']) * position_size) * 100)
+                
+                if current_pnl > 0:
+                    if symbol not in self.max_profit_values or current_pnl > self.max_profit_values[symbol]:
+                        self.max_profit_values[symbol] = current_pnl
+                else:
+                    if symbol not in self.max_loss_values or current_pnl < self.max_loss_values[symbol]:
+                        self.max_loss_values[symbol] = current_pnl
+                
+                position_info = {
+                    'symbol': symbol,
+                    'pnl': current_pnl,
+                    'max_profit': self.max_profit_values.get(symbol, 0),
+                    'max_loss': self.max_loss_values.get(symbol, 0),
+                    'roi': roi,
+                    'high_roi': roi > HIGH_ROI_THRESHOLD,
+                    'high_loss': current_pnl < HIGH_LOSS_THRESHOLD,
+                    'side': 'Long' if position['side'] == 'Buy' else 'Short',
+                    'size': position_size
+                }
+                
+                processed_positions.append(position_info)
+                
+                if symbol in self.daily_pnl:
+                    start_pnl = self.daily_pnl[symbol]
+                    if start_pnl > 0 and current_pnl > 0:
+                        growth_ratio = current_pnl / start_pnl
+                        if growth_ratio >= GROWTH_MULTIPLIER:
+                            rapid_growth_positions.append({
+                                'symbol': symbol,
+                                'start_pnl': start_pnl,
+                                'current_pnl': current_pnl,
+                                'growth_ratio': growth_ratio
+                            })
+                else:
+                    self.daily_pnl[symbol] = current_pnl
+            
+            return processed_positions, rapid_growth_positions
                     
         except Exception as e:
             print("Error getting positions: {}".format(str(e)))
@@ -214,22 +360,17 @@ class BybitExchange(BaseExchange):
         except Exception:
             return []
 
+    @single_flight
     def get_symbol_chart_data(self, symbol):
         """Получает исторические данные для графика"""
         try:
-            response = self.client.get_kline(
-                category="linear",
-                symbol=f"{symbol}USDT",
-                interval="5",  # 5 минут
-                limit=24  # 2 часа данных
-            )
-            if response['retCode'] == 0:
-                return [float(k[4]) for k in response['result']['list']]  # Берем цены закрытия
-            return []
+            candles = self.get_candles(symbol, '5m', 24)  # 2 часа данных
+            return [candle[4] for candle in candles]  # Берем цены закрытия
         except Exception as e:
             print(f"Error getting chart data for {symbol}: {e}")
             return []
 
+    @single_flight
     def get_sma200_position(self, symbol):
         """Определяет положение цены относительно SMA200"""
         retries = 3
@@ -237,20 +378,11 @@ class BybitExchange(BaseExchange):
         
         for attempt in range(retries):
             try:
-                response = self.client.get_kline(
-                    category="linear",
-                    symbol=f"{symbol}USDT",
-                    interval="D",
-                    limit=200
-                )
-                
-                if response['retCode'] == 0:
-                    closes = [float(k[4]) for k in response['result']['list']]
-                    if len(closes) >= 200:
-                        sma200 = sum(closes[:200]) / 200
-                        current_price = float(closes[0])
-                        result = current_price > sma200
-                        return result
+                closes = [candle[4] for candle in self.get_candles(symbol, '1d', 200)]
+                if len(closes) >= 200:
+                    sma200 = sum(closes[-200:]) / 200
+                    current_price = closes[-1]
+                    return current_price > sma200
                 return None
                 
             except (ConnectionError, IncompleteRead, RemoteDisconnected, requests.exceptions.ConnectionError) as e:
@@ -264,9 +396,14 @@ class BybitExchange(BaseExchange):
                 print(f"Error getting SMA200 for {symbol}: {e}")
                 return None
 
+    @single_flight
     def get_ticker(self, symbol):
         """Получение текущих данных тикера"""
         try:
+            ticker = self._get_cached_ticker(symbol)
+            if ticker:
+                return ticker
+            
             print(f"[BYBIT] Getting ticker for {symbol}")
             
             # Получаем данные тикера
@@ -396,34 +533,41 @@ class BybitExchange(BaseExchange):
                 'message': f"Ошибка при закрытии позиции: {str(e)}"
             }
 
-    def get_all_pairs(self):
-        """Получение списка всех доступных ессрочных фьючерсов"""
-        try:
-            response = self.client.get_instruments_info(
-                category="linear",
-                status="Trading"
-            )
-            
-            if response and response['result']['list']:
-                # Фильтруем только бессрочные контракты (USDT)
-                pairs = [
-                    clean_symbol(item['symbol'])  # Используем существующую функцию clean_symbol
-                    for item in response['result']['list']
-                    if item['symbol'].endswith('USDT')
-                ]
-                return sorted(pairs)
-            return []
-        except Exception as e:
-            print(f"Error getting Bybit pairs: {str(e)}")
-            return []
-
-    def get_chart_data(self, symbol, timeframe='1h', period='1w'):
+    def _load_instruments(self):
+        """Загрузка бессрочных USDT-фьючерсов (все страницы справочника)"""
+        instruments = []
+        cursor = None
+        while True:
+            params = {'category': 'linear', 'status': 'Trading', 'limit': 1000}
+            if cursor:
+                params['cursor'] = cursor
+            response = self.client.get_instruments_info(**params)
+            result = response['result']
+            for item in result['list']:
+                # Только бессрочные контракты (USDT)
+                if not item['symbol'].endswith('USDT'):
+                    continue
+                instruments.append(Instrument(
+                    symbol=clean_symbol(item['symbol']),
+                    exchange_symbol=item['symbol'],
+                    tick_size=float(item['priceFilter']['tickSize']),
+                    lot_size=float(item['lotSizeFilter']['qtyStep']),
+                    min_qty=float(item['lotSizeFilter']['minOrderQty']),
+                    contract_type=item.get('contractType')
+                ))
+            cursor = result.get('nextPageCursor')
+            if not cursor:
+                return instruments
+
+    @single_flight
+    def get_chart_data(self, symbol, timeframe='1h', period='1w', layout='rows'):
         """Получение данных для графика
         
         Args:
             symbol (str): Символ торговой пары
             timeframe (str): Таймфрейм ('1m', '5m', '15m', '30m', '1h', '4h', '1d', '1w', 'all')
             period (str): Период ('1d', '1w', '1M')
+            layout (str): Формат свечей ('rows', 'columns', 'binary')
             
         Returns:
             dict: Данные для построения графика
@@ -432,67 +576,35 @@ class BybitExchange(BaseExchange):
             # Специальная обработка для таймфрейма "all"
             if timeframe == 'all':
                 # Последовательно пробуем разные интервалы
-                intervals = [
-                    ('1', '1m'),
-                    ('5', '5m'),
-                    ('15', '15m'),
-                    ('30', '30m'),
-                    ('60', '1h'),
-                    ('240', '4h'),
-                    ('D', '1d'),
-                    ('W', '1w')
-                ]
+                intervals = ['1m', '5m', '15m', '30m', '1h', '4h', '1d', '1w']
                 
                 selected_interval = None
                 selected_klines = None
                 
-                for interval, interval_name in intervals:
+                for interval_name in intervals:
                     try:
                         print(f"[BYBIT] Пробуем интервал {interval_name}")
-                        response = self.client.get_kline(
-                            category="linear",
-                            symbol=f"{symbol}USDT",
-                            interval=interval,
-                            limit=1000
-                        )
+                        klines = self.get_candles(symbol, interval_name, 1000)
+                        if len(klines) <= 500:
+                            selected_interval = interval_name
+                            selected_klines = klines
+                            print(f"[BYBIT] Выбран интервал {interval_name} ({len(klines)} свечей)")
+                            break
                         
-                        if response['retCode'] == 0:
-                            klines = response['result']['list']
-                            if len(klines) <= 500:
-                                selected_interval = interval
-                                selected_klines = klines
-                                print(f"[BYBIT] Выбран интервал {interval_name} ({len(klines)} свечей)")
-                                break
-                            
-                            # Если это последний интервал, используем его независимо от количества свечей
-                            if interval == 'W':
-                                selected_interval = interval
-                                selected_klines = klines
-                                print(f"[BYBIT] Использован последний интервал {interval_name} ({len(klines)} свечей)")
+                        # Если это последний интервал, используем его независимо от количества свечей
+                        if interval_name == '1w':
+                            selected_interval = interval_name
+                            selected_klines = klines
+                            print(f"[BYBIT] Использован последний интервал {interval_name} ({len(klines)} свечей)")
                     except Exception as e:
                         print(f"[BYBIT] Ошибка при получении данных для интервала {interval_name}: {e}")
                         continue
                 
                 if selected_interval and selected_klines:
-                    candles = []
-                    for k in selected_klines:
-                        candle = {
-                            'time': int(k[0]),
-                            'open': float(k[1]),
-                            'high': float(k[2]),
-                            'low': float(k[3]),
-                            'close': float(k[4]),
-                            'volume': float(k[5])
-                        }
-                        candles.append(candle)
-                    
-                    # Сортируем свечи от старых к новым
-                    candles.sort(key=lambda x: x['time'])
-                    
                     return {
                         'success': True,
                         'data': {
-                            'candles': candles
+                            'candles': self._format_candles(selected_klines, layout)
                         }
                     }
                 else:
@@ -502,58 +614,18 @@ class BybitExchange(BaseExchange):
                     }
             else:
                 # Стандартная обработка для конкретного таймфрейма
-                timeframe_map = {
-                    '1m': '1',
-                    '5m': '5',
-                    '15m': '15',
-                    '30m': '30',
-                    '1h': '60',
-                    '4h': '240',
-                    '1d': 'D',
-                    '1w': 'W'
-                }
-                
-                interval = timeframe_map.get(timeframe)
-                if not interval:
+                if timeframe not in self.KLINE_INTERVALS:
                     print(f"[BYBIT] Неподдерживаемый таймфрейм: {timeframe}")
                     return {
                         'success': False,
                         'error': f'Неподдерживаемый таймфрейм: {timeframe}'
                     }
                 
-                response = self.client.get_kline(
-                    category="linear",
-                    symbol=f"{symbol}USDT",
-                    interval=interval,
-                    limit=1000
-                )
-                
-                if response['retCode'] == 0:
-                    candles = []
-                    for k in response['result']['list']:
-                        candle = {
-                            'time': int(k[0]),
-                            'open': float(k[1]),
-                            'high': float(k[2]),
-                            'low': float(k[3]),
-                            'close': float(k[4]),
-                            'volume': float(k[5])
-                        }
-                        candles.append(candle)
-                    
-                    # Сортируем свечи от старых к новым
-                    candles.sort(key=lambda x: x['time'])
-                    
-                    return {
-                        'success': True,
-                        'data': {
-                            'candles': candles
-                        }
-                    }
-                
                 return {
-                    'success': False,
-                    'error': f"Ошибка API: {response.get('retMsg', 'Неизвестная ошибка')}"
+                    'success': True,
+                    'data': {
+                        'candles': self._format_candles(self.get_candles(symbol, timeframe, 1000), layout)
+                    }
                 }
             
         except Exception as e:
@@ -563,335 +635,20 @@ class BybitExchange(BaseExchange):
                 'error': str(e)
             }
 
-    def get_indicators(self, symbol, timeframe='1h'):
-        """Получение значений индикаторов
-        
-        Args:
-            symbol (str): Символ торговой пары
-            timeframe (str): Таймфрейм
-            
-        Returns:
-            dict: Значения индикаторов
-        """
-        try:
-            print(f"[BYBIT] Запрос индикаторов для {symbol}, таймфрейм: {timeframe}")
-            
-            # Конвертируем таймфрейм в формат Bybit
-            timeframe_map = {
-                '1m': '1',
-                '5m': '5',
-                '15m': '15',
-                '30m': '30',
-                '1h': '60',
-                '4h': '240',
-                '1d': 'D',
-                '1w': 'W'
-            }
-            
-            interval = timeframe_map.get(timeframe)
-            if not interval:
-                print(f"[BYBIT] Неподдерживаемый таймфрейм: {timeframe}")
-                return {
-                    'success': False,
-                    'error': f'Неподдерживаемый таймфрейм: {timeframe}'
-                }
-
-            # Получаем последние 100 свечей для расчета индикаторов
-            response = self.client.get_kline(
-                category="linear",
-                symbol=f"{symbol}USDT",
-                interval=interval,
-                limit=100
-            )
-
-            if not response or response.get('retCode') != 0:
-                return {
-                    'success': False,
-                    'error': 'Не удалось получить данные свечей'
-                }
-
-            klines = response.get('result', {}).get('list', [])
-            if not klines:
-                return {
-                    'success': False,
-                    'error': 'Нет данных свечей'
-                }
-
-            # Преобразуем данные в массивы для расчетов
-            closes = np.array([float(k[4]) for k in klines])  # Цены закрытия
-            highs = np.array([float(k[2]) for k in klines])   # Максимумы
-            lows = np.array([float(k[3]) for k in klines])    # Минимумы
-            volumes = np.array([float(k[5]) for k in klines])  # Объемы
-            timestamps = [int(k[0]) for k in klines]          # Временные метки
-
-            # 1. Расчет RSI
-            rsi = self._calculate_rsi(closes)
-            current_rsi = rsi[-1]
-            
-            # Определение состояния RSI
-            rsi_status = "Нейтральный"
-            if current_rsi >= 70:
-                rsi_status = "Перекуплен"
-            elif current_rsi <= 30:
-                rsi_status = "Перепродан"
-
-            # 2. Расчет тренда
-            trend_info = self._calculate_trend(closes)
-            
-            # 3. Расчет объемов
-            volume_info = self._calculate_volume_metrics(volumes)
-
-            # 4. Расчет уровней поддержки и сопротивления
-            support_resistance = self._calculate_support_resistance(highs, lows, closes)
-
-            # 5. Расчет точек входа/выхода
-            entry_exit = self._calculate_entry_exit_points(
-                closes[-1], 
-                support_resistance['support'], 
-                support_resistance['resistance'],
-                trend_info['direction']
-            )
-
-            # 6. Расчет торгового канала
-            channel = self._calculate_trading_channel(highs, lows)
-
-            # Формируем рекомендацию
-            recommendation = self._generate_recommendation(
-                current_rsi,
-                trend_info['direction'],
-                closes[-1],
-                support_resistance,
-                volume_info['volume_trend']
-            )
-
-            return {
-                'success': True,
-                'data': {
-                    'time': {
-                        'timestamp': timestamps[-1],
-                        'datetime': datetime.fromtimestamp(timestamps[-1]/1000).strftime('%Y-%m-%d %H:%M:%S')
-                    },
-                    'price': {
-                        'current': closes[-1],
-                        'high_24h': max(highs[-24:]) if len(highs) >= 24 else highs[-1],
-                        'low_24h': min(lows[-24:]) if len(lows) >= 24 else lows[-1]
-                    },
-                    'rsi': {
-                        'value': round(current_rsi, 2),
-                        'status': rsi_status
-                    },
-                    'trend': {
-                        'direction': trend_info['direction'],
-                        'strength': trend_info['strength']
-                    },
-                    'volume': {
-                        'current_24h': volume_info['current_24h'],
-                        'change_percent': volume_info['change_percent'],
-                        'trend': volume_info['volume_trend']
-                    },
-                    'levels': {
-                        'support': support_resistance['support'],
-                        'resistance': support_resistance['resistance']
-                    },
-                    'entry_exit': {
-                        'entry_point': entry_exit['entry_point'],
-                        'stop_loss': entry_exit['stop_loss'],
-                        'target': entry_exit['target']
-                    },
-                    'channel': {
-                        'upper': channel['upper'],
-                        'lower': channel['lower'],
-                        'position': channel['position']
-                    },
-                    'recommendation': recommendation
-                }
-            }
-
-        except Exception as e:
-            print(f"[BYBIT] Ошибка при расчете индикаторов: {str(e)}")
-            return {
-                'success': False,
-                'error': str(e)
-            }
-
-    def _calculate_rsi(self, closes, period=14):
-        """Расчет RSI"""
-        deltas = np.diff(closes)
-        seed = deltas[:period+1]
-        up = seed[seed >= 0].sum()/period
-        down = -seed[seed < 0].sum()/period
-        rs = up/down
-        rsi = np.zeros_like(closes)
-        rsi[:period] = 100. - 100./(1. + rs)
-
-        for i in range(period, len(closes)):
-            delta = deltas[i-1]
-            if delta > 0:
-                upval = delta
-                downval = 0.
-            else:
-                upval = 0.
-                downval = -delta
-
-            up = (up*(period-1) + upval)/period
-            down = (down*(period-1) + downval)/period
-            rs = up/down
-            rsi[i] = 100. - 100./(1. + rs)
-
-        return rsi
-
-    def _calculate_trend(self, closes):
-        """Расчет тренда и его силы"""
-        # Используем 20-периодную SMA для определения тренда
-        sma20 = np.mean(closes[-20:])
-        current_price = closes[-1]
-        
-        # Определяем направление тренда
-        if current_price > sma20 * 1.02:  # Цена выше SMA на 2%
-            direction = "Восходящий"
-        elif current_price < sma20 * 0.98:  # Цена ниже SMA на 2%
-            direction = "Нисходящий"
-        else:
-            direction = "Боковой"
-
-        # Рассчитываем силу тренда на основе отклонения от SMA
-        deviation = abs((current_price - sma20) / sma20 * 100)
-        if deviation < 2:
-            strength = "Слабый"
-        elif deviation < 5:
-            strength = "Умеренный"
-        else:
-            strength = "Сильный"
-
-        return {
-            'direction': direction,
-            'strength': strength
-        }
-
-    def _calculate_volume_metrics(self, volumes):
-        """Расчет метрик объема"""
-        current_24h = sum(volumes[-24:]) if len(volumes) >= 24 else sum(volumes)
-        prev_24h = sum(volumes[-48:-24]) if len(volumes) >= 48 else sum(volumes)
-        
-        # Изменение объема
-        if prev_24h > 0:
-            change_percent = ((current_24h - prev_24h) / prev_24h) * 100
-        else:
-            change_percent = 0
-
-        # Определяем тренд объема
-        if change_percent > 10:
-            volume_trend = "Растущий"
-        elif change_percent < -10:
-            volume_trend = "Падающий"
-        else:
-            volume_trend = "Стабильный"
-
-        return {
-            'current_24h': current_24h,
-            'change_percent': round(change_percent, 2),
-            'volume_trend': volume_trend
-        }
-
-    def _calculate_support_resistance(self, highs, lows, closes):
-        """Расчет уровней поддержки и сопротивления"""
-        # Используем метод кластеризации цен
-        all_prices = np.concatenate([highs, lows, closes])
-        price_clusters = {}
-
-        # Группируем цены в кластеры с погрешностью 0.5%
-        for price in all_prices:
-            found_cluster = False
-            for cluster_price in list(price_clusters.keys()):
-                if abs(price - cluster_price) / cluster_price < 0.005:
-                    price_clusters[cluster_price] += 1
-                    found_cluster = True
-                    break
-            if not found_cluster:
-                price_clusters[price] = 1
-
-        # Сортируем кластеры по количеству точек
-        sorted_clusters = sorted(price_clusters.items(), key=lambda x: x[1], reverse=True)
-        
-        current_price = closes[-1]
-        support = current_price
-        resistance = current_price
-
-        # Находим ближайшие уровни поддержки и сопротивления
-        for price, _ in sorted_clusters:
-            if price < current_price and price > support:
-                support = price
-            elif price > current_price and price < resistance:
-                resistance = price
-
-        return {
-            'support': support,
-            'resistance': resistance
+    def _fetch_klines(self, symbol, timeframe, limit, end_time=None):
+        params = {
+            'category': "linear",
+            'symbol': f"{symbol}USDT",
+            'interval': self.KLINE_INTERVALS[timeframe],
+            'limit': limit
         }
-
-    def _calculate_entry_exit_points(self, current_price, support, resistance, trend):
-        """Расчет точек входа, выхода и стоп-лосса"""
-        # Расчет точки входа
-        if trend == "Восходящий":
-            entry_point = support + (resistance - support) * 0.382  # Уровень Фибоначчи
-        else:
-            entry_point = resistance - (resistance - support) * 0.382
-
-        # Расчет стоп-лосса (2% от точки входа)
-        stop_loss = entry_point * 0.98 if trend == "Восходящий" else entry_point * 1.02
-
-        # Расчет целевой цены (соотношение риск/прибыль 1:2)
-        risk = abs(entry_point - stop_loss)
-        target = entry_point + (risk * 2) if trend == "Восходящий" else entry_point - (risk * 2)
-
-        return {
-            'entry_point': round(entry_point, 8),
-            'stop_loss': round(stop_loss, 8),
-            'target': round(target, 8)
-        }
-
-    def _calculate_trading_channel(self, highs, lows):
-        """Расчет торгового канала"""
-        # Используем последние 20 свечей для канала
-        period = 20
-        recent_highs = highs[-period:]
-        recent_lows = lows[-period:]
-
-        upper = np.max(recent_highs)
-        lower = np.min(recent_lows)
-        current = (highs[-1] + lows[-1]) / 2
-
-        # Определяем положение текущей цены в канале
-        channel_height = upper - lower
-        if channel_height > 0:
-            position_percent = ((current - lower) / channel_height) * 100
-            if position_percent < 25:
-                position = "Нижняя часть канала"
-            elif position_percent > 75:
-                position = "Верхняя часть канала"
-            else:
-                position = "Середина канала"
-        else:
-            position = "Неопределено"
-
-        return {
-            'upper': upper,
-            'lower': lower,
-            'position': position
-        }
-
-    def _generate_recommendation(self, rsi, trend_direction, current_price, support_resistance, volume_trend):
-        """Генерация торговой рекомендации"""
-        if rsi >= 70 and trend_direction == "Восходящий" and volume_trend == "Падающий":
-            return "Возможна коррекция - рекомендуется фиксация прибыли"
-        elif rsi <= 30 and trend_direction == "Нисходящий" and volume_trend == "Растущий":
-            return "Возможен отскок - рекомендуется поиск точки входа"
-        elif trend_direction == "Восходящий" and current_price < support_resistance['resistance']:
-            return "Восходящий тренд - рассмотреть покупку на откате"
-        elif trend_direction == "Нисходящий" and current_price > support_resistance['support']:
-            return "Нисходящий тренд - рассмотреть продажу на росте"
-        else:
-            return "Нейтральная ситуация - рекомендуется наблюдение"
+        if end_time is not None:
+            params['end'] = end_time
+        response = self.client.get_kline(**params)
+        if response['retCode'] != 0:
+            raise Exception(f"Ошибка API: {response.get('retMsg', 'Неизвестная ошибка')}")
+        # Bybit возвращает свечи от новых к старым
+        return [self._parse_kline(k) for k in reversed(response['result']['list'])]
 
     def get_wallet_balance(self):
         """Получает общий баланс кошелька и реализованный PNL"""
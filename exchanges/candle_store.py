@@ -0,0 +1,106 @@
+import os
+import sqlite3
+import threading
+
+class CandleStore:
+    """Локальное хранилище свечей (SQLite)
+
+    Свечи хранятся по ключу биржа/символ/интервал и отдаются по возрастанию
+    времени. Таблица series хранит глубину уже загруженной истории, чтобы
+    не запрашивать ее повторно.
+
+    Args:
+        path (str): Путь к файлу базы данных
+        max_candles (int): Максимальное количество свечей одной серии
+    """
+
+    def __init__(self, path, max_candles=2000):
+        self.max_candles = max_candles
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS candles (
+                exchange TEXT NOT NULL,
+                symbol TEXT NOT NULL,
+                interval TEXT NOT NULL,
+                time INTEGER NOT NULL,
+                open REAL, high REAL, low REAL, close REAL, volume REAL,
+                PRIMARY KEY (exchange, symbol, interval, time)
+            ) WITHOUT ROWID
+        ''')
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS series (
+                exchange TEXT NOT NULL,
+                symbol TEXT NOT NULL,
+                interval TEXT NOT NULL,
+                depth INTEGER NOT NULL,
+                PRIMARY KEY (exchange, symbol, interval)
+            ) WITHOUT ROWID
+        ''')
+        self._conn.commit()
+
+    def last_time(self, exchange, symbol, interval):
+        """Время открытия последней сохраненной свечи или None"""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT MAX(time) FROM candles WHERE exchange=? AND symbol=? AND interval=?',
+                (exchange, symbol, interval)
+            ).fetchone()
+        return row[0]
+
+    def depth(self, exchange, symbol, interval):
+        """Глубина загруженной истории (сколько свечей уже запрашивалось)"""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT depth FROM series WHERE exchange=? AND symbol=? AND interval=?',
+                (exchange, symbol, interval)
+            ).fetchone()
+        return row[0] if row else 0
+
+    def save(self, exchange, symbol, interval, rows, depth=None):
+        """Добавление/обновление свечей (последняя свеча обычно еще не закрыта)
+
+        Args:
+            rows (list): Кортежи (time, open, high, low, close, volume)
+            depth (int, optional): Новая глубина загруженной истории
+        """
+        key = (exchange, symbol, interval)
+        with self._lock:
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO candles VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                [key + tuple(row) for row in rows]
+            )
+            if depth is not None:
+                self._conn.execute('INSERT OR REPLACE INTO series VALUES (?, ?, ?, ?)', key + (depth,))
+            # Ограничиваем размер серии
+            self._conn.execute('''
+                DELETE FROM candles WHERE exchange=? AND symbol=? AND interval=? AND time < (
+                    SELECT time FROM candles WHERE exchange=? AND symbol=? AND interval=?
+                    ORDER BY time DESC LIMIT 1 OFFSET ?
+                )
+            ''', key + key + (self.max_candles - 1,))
+            self._conn.commit()
+
+    def clear(self, exchange, symbol, interval):
+        """Удаление серии (например, после длинного разрыва в данных)"""
+        key = (exchange, symbol, interval)
+        with self._lock:
+            self._conn.execute('DELETE FROM candles WHERE exchange=? AND symbol=? AND interval=?', key)
+            self._conn.execute('DELETE FROM series WHERE exchange=? AND symbol=? AND interval=?', key)
+            self._conn.commit()
+
+    def load(self, exchange, symbol, interval, limit):
+        """Последние limit свечей по возрастанию времени"""
+        with self._lock:
+            rows = self._conn.execute('''
+                SELECT time, open, high, low, close, volume FROM candles
+                WHERE exchange=? AND symbol=? AND interval=?
+                ORDER BY time DESC LIMIT ?
+            ''', (exchange, symbol, interval, limit)).fetchall()
+        rows.reverse()
+        return rows
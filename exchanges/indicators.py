@@ -0,0 +1,415 @@
+from datetime import datetime
+import numpy as np
+from app.config import INDICATORS
+
+WILDER_BLOCK = 256  # Длина блока рекурсивного фильтра (ограничивает рост a^-k)
+
+def _as_array(values):
+    """Непрерывный массив float64 (без копии, если он уже такой)"""
+    return np.ascontiguousarray(values, dtype=np.float64)
+
+def wilder_smooth(initial, values, period):
+    """Сглаживание Уайлдера y[i] = (y[i-1] * (period - 1) + x[i]) / period
+
+    Рекурсия раскрывается в замкнутую форму по блокам:
+    y[k] = a^k * (y[0] + sum(x[m] * a^-m) / period), где a = (period - 1) / period.
+    Работает по последней оси, поэтому подходит и для матрицы рядов.
+
+    Args:
+        initial (float | np.ndarray): Начальное значение (по одному на ряд)
+        values (np.ndarray): Входные значения
+        period (int): Период сглаживания
+
+    Returns:
+        np.ndarray: Значения y[1..n] той же формы, что и values
+    """
+    values = _as_array(values)
+    out = np.empty_like(values)
+    length = values.shape[-1]
+    if length == 0:
+        return out
+    a = (period - 1) / period
+    powers = a ** np.arange(1, min(length, WILDER_BLOCK) + 1)
+    inverse = 1.0 / powers
+    previous = np.asarray(initial, dtype=np.float64)
+    for start in range(0, length, WILDER_BLOCK):
+        chunk = values[..., start:start + WILDER_BLOCK]
+        size = chunk.shape[-1]
+        accumulated = np.cumsum(chunk * inverse[:size], axis=-1) / period
+        out[..., start:start + size] = powers[:size] * (previous[..., None] + accumulated)
+        previous = out[..., start + size - 1]
+    return out
+
+def rsi(closes, period=14):
+    """Расчет RSI (по последней оси, поэтому принимает и матрицу рядов)
+
+    Начальные средние берутся по первым period + 1 изменениям цены,
+    далее - сглаживание Уайлдера начиная с изменения period - 1
+    (как в исходной реализации, чтобы значения не изменились).
+    """
+    closes = _as_array(closes)
+    deltas = np.diff(closes, axis=-1)
+    seed = deltas[..., :period + 1]
+    up = np.where(seed >= 0, seed, 0.0).sum(axis=-1) / period
+    down = -np.where(seed < 0, seed, 0.0).sum(axis=-1) / period
+
+    updates = deltas[..., period - 1:closes.shape[-1] - 1]
+    ups = wilder_smooth(up, np.where(updates > 0, updates, 0.0), period)
+    downs = wilder_smooth(down, np.where(updates > 0, 0.0, -updates), period)
+
+    result = np.empty_like(closes)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        result[..., :period] = (100. - 100. / (1. + up / down))[..., None]
+        result[..., period:] = 100. - 100. / (1. + ups / downs)
+    return result
+
+def rsi_status(value):
+    """Состояние RSI"""
+    return np.select([value >= 70, value <= 30], ["Перекуплен", "Перепродан"], "Нейтральный")
+
+def _trend_columns(closes, period=20):
+    """Направление и сила тренда по отклонению цены от SMA (по последней оси)"""
+    sma = np.mean(closes[..., -period:], axis=-1)
+    current_price = closes[..., -1]
+
+    # Цена выше/ниже SMA на 2%
+    direction = np.select(
+        [current_price > sma * 1.02, current_price < sma * 0.98],
+        ["Восходящий", "Нисходящий"],
+        "Боковой"
+    )
+    # Сила тренда на основе отклонения от SMA
+    deviation = np.abs((current_price - sma) / sma * 100)
+    strength = np.select([deviation < 2, deviation < 5], ["Слабый", "Умеренный"], "Сильный")
+    return direction, strength
+
+def trend(closes):
+    """Расчет тренда и его силы (20-периодная SMA)"""
+    direction, strength = _trend_columns(_as_array(closes))
+    return {
+        'direction': str(direction),
+        'strength': str(strength)
+    }
+
+def _volume_columns(volumes):
+    """Объем за 24 свечи, его изменение к предыдущим 24 и тренд (по последней оси)"""
+    current_24h = np.sum(volumes[..., -24:], axis=-1)
+    if volumes.shape[-1] >= 48:
+        prev_24h = np.sum(volumes[..., -48:-24], axis=-1)
+    else:
+        prev_24h = np.sum(volumes, axis=-1)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        change_percent = np.where(prev_24h > 0, (current_24h - prev_24h) / prev_24h * 100, 0.0)
+    volume_trend = np.select(
+        [change_percent > 10, change_percent < -10],
+        ["Растущий", "Падающий"],
+        "Стабильный"
+    )
+    return current_24h, np.round(change_percent, 2), volume_trend
+
+def volume_metrics(volumes):
+    """Расчет метрик объема"""
+    current_24h, change_percent, volume_trend = _volume_columns(_as_array(volumes))
+    return {
+        'current_24h': float(current_24h),
+        'change_percent': float(change_percent),
+        'volume_trend': str(volume_trend)
+    }
+
+def price_clusters(prices, tolerance=0.005):
+    """Кластеризация цен одним проходом по отсортированному массиву
+
+    Кластер начинается с наименьшей непокрытой цены и включает все цены,
+    отличающиеся от нее меньше чем на tolerance. Граница кластера ищется
+    бинарным поиском, поэтому сложность O(n log n).
+
+    Returns:
+        tuple: (уровни - средние цены кластеров, количество точек в кластерах)
+    """
+    prices = np.sort(_as_array(prices))
+    cumulative = np.concatenate(([0.0], np.cumsum(prices)))
+    bounds = [0]
+    while bounds[-1] < len(prices):
+        start = bounds[-1]
+        end = int(np.searchsorted(prices, prices[start] * (1 + tolerance), side='left'))
+        bounds.append(max(end, start + 1))
+    bounds = np.array(bounds)
+    counts = np.diff(bounds)
+    levels = (cumulative[bounds[1:]] - cumulative[bounds[:-1]]) / counts
+    return levels, counts
+
+def support_resistance(highs, lows, closes, lookback=None, tolerance=0.005, min_touches=2):
+    """Расчет уровней поддержки и сопротивления
+
+    Уровни - кластеры цен (highs, lows, closes) с погрешностью tolerance,
+    в которые попало не меньше min_touches точек. Кластеры ближе tolerance
+    к текущей цене не учитываются (последняя свеча всегда образует такой
+    кластер). Поддержка - уровень ниже цены с наибольшим числом касаний
+    (при равенстве - ближайший), сопротивление - так же выше цены.
+    Если подходящего уровня нет, используется минимум (максимум) цены за
+    период.
+
+    Args:
+        lookback (int, optional): Количество последних свечей для анализа
+    """
+    current_price = closes[-1]
+    if lookback:
+        highs, lows, closes = highs[-lookback:], lows[-lookback:], closes[-lookback:]
+    levels, counts = price_clusters(np.concatenate([highs, lows, closes]), tolerance)
+    distance = np.abs(levels - current_price)
+    valid = (counts >= min_touches) & (distance > current_price * tolerance)
+
+    def strongest(mask, fallback):
+        if not mask.any():
+            return float(fallback)
+        # Сортировка: сначала по числу касаний (убыв.), затем по расстоянию
+        order = np.lexsort((distance[mask], -counts[mask]))
+        return float(levels[mask][order[0]])
+
+    return {
+        'support': strongest(valid & (levels < current_price), min(np.min(lows), current_price)),
+        'resistance': strongest(valid & (levels > current_price), max(np.max(highs), current_price))
+    }
+
+def entry_exit_points(current_price, support, resistance, trend):
+    """Расчет точек входа, выхода и стоп-лосса"""
+    # Расчет точки входа
+    if trend == "Восходящий":
+        entry_point = support + (resistance - support) * 0.382  # Уровень Фибоначчи
+    else:
+        entry_point = resistance - (resistance - support) * 0.382
+
+    # Расчет стоп-лосса (2% от точки входа)
+    stop_loss = entry_point * 0.98 if trend == "Восходящий" else entry_point * 1.02
+
+    # Расчет целевой цены (соотношение риск/прибыль 1:2)
+    risk = abs(entry_point - stop_loss)
+    target = entry_point + (risk * 2) if trend == "Восходящий" else entry_point - (risk * 2)
+
+    return {
+        'entry_point': round(entry_point, 8),
+        'stop_loss': round(stop_loss, 8),
+        'target': round(target, 8)
+    }
+
+def _channel_columns(highs, lows, period=20):
+    """Границы канала за period свечей и положение текущей цены в нем (по последней оси)"""
+    upper = np.max(highs[..., -period:], axis=-1)
+    lower = np.min(lows[..., -period:], axis=-1)
+    current = (highs[..., -1] + lows[..., -1]) / 2
+
+    channel_height = upper - lower
+    with np.errstate(divide='ignore', invalid='ignore'):
+        position_percent = (current - lower) / channel_height * 100
+    position = np.select(
+        [channel_height <= 0, position_percent < 25, position_percent > 75],
+        ["Неопределено", "Нижняя часть канала", "Верхняя часть канала"],
+        "Середина канала"
+    )
+    return upper, lower, position
+
+def trading_channel(highs, lows, period=20):
+    """Расчет торгового канала по последним period свечам"""
+    upper, lower, position = _channel_columns(_as_array(highs), _as_array(lows), period)
+    return {
+        'upper': upper,
+        'lower': lower,
+        'position': str(position)
+    }
+
+def recommendation(rsi_value, trend_direction, current_price, levels, volume_trend):
+    """Генерация торговой рекомендации"""
+    if rsi_value >= 70 and trend_direction == "Восходящий" and volume_trend == "Падающий":
+        return "Возможна коррекция - рекомендуется фиксация прибыли"
+    elif rsi_value <= 30 and trend_direction == "Нисходящий" and volume_trend == "Растущий":
+        return "Возможен отскок - рекомендуется поиск точки входа"
+    elif trend_direction == "Восходящий" and current_price < levels['resistance']:
+        return "Восходящий тренд - рассмотреть покупку на откате"
+    elif trend_direction == "Нисходящий" and current_price > levels['support']:
+        return "Нисходящий тренд - рассмотреть продажу на росте"
+    else:
+        return "Нейтральная ситуация - рекомендуется наблюдение"
+
+def _time_info(timestamp):
+    """Время последней свечи в формате ответа get_indicators"""
+    return {
+        'timestamp': timestamp,
+        'datetime': datetime.fromtimestamp(timestamp / 1000).strftime('%Y-%m-%d %H:%M:%S')
+    }
+
+def _levels(highs, lows, closes):
+    """Поддержка и сопротивление с настройками INDICATORS"""
+    return support_resistance(
+        highs, lows, closes,
+        lookback=INDICATORS['SR_LOOKBACK'],
+        tolerance=INDICATORS['SR_TOLERANCE'],
+        min_touches=INDICATORS['SR_MIN_TOUCHES']
+    )
+
+def compute_indicators(candles):
+    """Расчет всех индикаторов по свечам
+
+    Args:
+        candles (list): Свечи (time, open, high, low, close, volume) по возрастанию времени
+
+    Returns:
+        dict: Данные ответа get_indicators
+    """
+    data = _as_array(candles)
+    timestamps = data[:, 0]
+    highs = data[:, 2]
+    lows = data[:, 3]
+    closes = data[:, 4]
+    volumes = data[:, 5]
+    current_price = closes[-1]
+    last_timestamp = int(timestamps[-1])
+
+    # 1. Расчет RSI
+    current_rsi = rsi(closes)[-1]
+
+    # 2. Расчет тренда
+    trend_info = trend(closes)
+
+    # 3. Расчет объемов
+    volume_info = volume_metrics(volumes)
+
+    # 4. Расчет уровней поддержки и сопротивления
+    levels = _levels(highs, lows, closes)
+
+    # 5. Расчет точек входа/выхода
+    entry_exit = entry_exit_points(
+        current_price,
+        levels['support'],
+        levels['resistance'],
+        trend_info['direction']
+    )
+
+    # 6. Расчет торгового канала
+    channel = trading_channel(highs, lows)
+
+    return {
+        'time': _time_info(last_timestamp),
+        'price': {
+            'current': current_price,
+            'high_24h': np.max(highs[-24:]) if len(highs) >= 24 else highs[-1],
+            'low_24h': np.min(lows[-24:]) if len(lows) >= 24 else lows[-1]
+        },
+        'rsi': {
+            'value': round(current_rsi, 2),
+            'status': str(rsi_status(current_rsi))
+        },
+        'trend': {
+            'direction': trend_info['direction'],
+            'strength': trend_info['strength']
+        },
+        'volume': {
+            'current_24h': volume_info['current_24h'],
+            'change_percent': volume_info['change_percent'],
+            'trend': volume_info['volume_trend']
+        },
+        'levels': {
+            'support': levels['support'],
+            'resistance': levels['resistance']
+        },
+        'entry_exit': {
+            'entry_point': entry_exit['entry_point'],
+            'stop_loss': entry_exit['stop_loss'],
+            'target': entry_exit['target']
+        },
+        'channel': {
+            'upper': channel['upper'],
+            'lower': channel['lower'],
+            'position': channel['position']
+        },
+        'recommendation': recommendation(
+            current_rsi,
+            trend_info['direction'],
+            current_price,
+            levels,
+            volume_info['volume_trend']
+        )
+    }
+
+def compute_indicators_batch(series):
+    """Расчет индикаторов сразу для многих символов
+
+    Ряды одинаковой длины собираются в матрицу (строка - символ), и RSI,
+    тренд, канал и объемы считаются одним проходом. Уровни, точки входа и
+    рекомендация считаются по строкам (кластеризация цен не векторизуется).
+    Формат и значения совпадают с compute_indicators.
+
+    Args:
+        series (list): Свечи каждого символа (time, open, high, low, close, volume)
+
+    Returns:
+        list: Индикаторы для каждого ряда (None, если свечей нет)
+    """
+    results = [None] * len(series)
+    groups = {}
+    for index, candles in enumerate(series):
+        if candles:
+            groups.setdefault(len(candles), []).append(index)
+
+    for indexes in groups.values():
+        data = _as_array([series[index] for index in indexes])
+        highs = data[..., 2]
+        lows = data[..., 3]
+        closes = data[..., 4]
+        volumes = data[..., 5]
+
+        rsi_values = rsi(closes)[:, -1]
+        rsi_states = rsi_status(rsi_values)
+        directions, strengths = _trend_columns(closes)
+        volume_24h, volume_change, volume_trends = _volume_columns(volumes)
+        uppers, lowers, positions = _channel_columns(highs, lows)
+        if closes.shape[1] >= 24:
+            highs_24h = highs[:, -24:].max(axis=1)
+            lows_24h = lows[:, -24:].min(axis=1)
+        else:
+            highs_24h = highs[:, -1]
+            lows_24h = lows[:, -1]
+
+        for row, index in enumerate(indexes):
+            levels = _levels(highs[row], lows[row], closes[row])
+            current_price = float(closes[row, -1])
+            entry_exit = entry_exit_points(current_price, levels['support'], levels['resistance'], str(directions[row]))
+            results[index] = {
+                'time': _time_info(int(data[row, -1, 0])),
+                'price': {
+                    'current': float(closes[row, -1]),
+                    'high_24h': float(highs_24h[row]),
+                    'low_24h': float(lows_24h[row])
+                },
+                'rsi': {
+                    'value': round(float(rsi_values[row]), 2),
+                    'status': str(rsi_states[row])
+                },
+                'trend': {
+                    'direction': str(directions[row]),
+                    'strength': str(strengths[row])
+                },
+                'volume': {
+                    'current_24h': float(volume_24h[row]),
+                    'change_percent': float(volume_change[row]),
+                    'trend': str(volume_trends[row])
+                },
+                'levels': {
+                    'support': levels['support'],
+                    'resistance': levels['resistance']
+                },
+                'entry_exit': entry_exit,
+                'channel': {
+                    'upper': float(uppers[row]),
+                    'lower': float(lowers[row]),
+                    'position': str(positions[row])
+                },
+                'recommendation': recommendation(
+                    rsi_values[row],
+                    str(directions[row]),
+                    current_price,
+                    levels,
+                    str(volume_trends[row])
+                )
+            }
+    return results
@@ -0,0 +1,94 @@
+import threading
+import time
+from collections import namedtuple
+
+RETRY_INTERVAL = 30  # Пауза между попытками, пока справочник не загружен (сек)
+
+Instrument = namedtuple('Instrument', ['symbol', 'exchange_symbol', 'tick_size', 'lot_size', 'min_qty', 'contract_type'])
+
+class InstrumentCatalog:
+    """Справочник инструментов биржи (бессрочные USDT-фьючерсы)
+
+    Загружается при первом обращении, далее обновляется внешним
+    планировщиком через refresh_if_due() раз в refresh_interval (пока
+    справочник не загружен - попытки не чаще RETRY_INTERVAL).
+    Справочник заменяется целиком, поэтому поиск символа - один dict.get
+    без блокировок.
+
+    Args:
+        name (str): Название биржи (для логов)
+        loader (callable): Загрузка списка Instrument с биржи
+        refresh_interval (int): Интервал обновления (сек)
+    """
+
+    def __init__(self, name, loader, refresh_interval=3600):
+        self.name = name
+        self._loader = loader
+        self.refresh_interval = refresh_interval
+        self._instruments = {}
+        self._pairs = []
+        self._load_lock = threading.Lock()
+        self._last_attempt = 0
+        self.last_update = None
+
+    @property
+    def loaded(self):
+        """Загружен ли справочник хотя бы один раз"""
+        return self.last_update is not None
+
+    def refresh(self):
+        """Загрузка справочника с биржи
+
+        Returns:
+            bool: True, если справочник обновлен (при ошибке остается прежний)
+        """
+        with self._load_lock:
+            self._last_attempt = time.time()
+            try:
+                instruments = self._loader()
+            except Exception as e:
+                print(f"[{self.name}] Ошибка загрузки справочника инструментов: {e}")
+                return False
+            if not instruments:
+                print(f"[{self.name}] Биржа вернула пустой справочник инструментов")
+                return False
+            self._instruments = {item.symbol: item for item in instruments}
+            self._pairs = sorted(self._instruments)
+            self.last_update = time.time()
+            print(f"[{self.name}] Справочник инструментов обновлен: {len(self._pairs)} пар")
+            return True
+
+    def _ensure_loaded(self):
+        """Первая загрузка при обращении до запуска фонового обновления"""
+        if not self.loaded and time.time() - self._last_attempt >= RETRY_INTERVAL:
+            self.refresh()
+
+    def refresh_if_due(self):
+        """Обновление, если пора (задача планировщика)"""
+        if not self.loaded:
+            self._ensure_loaded()
+        elif time.time() - self.last_update >= self.refresh_interval:
+            self.refresh()
+
+    def get(self, symbol):
+        """Инструмент по символу без USDT или None"""
+        self._ensure_loaded()
+        return self._instruments.get(symbol)
+
+    def __contains__(self, symbol):
+        return self.get(symbol) is not None
+
+    def pairs(self):
+        """Отсортированный список символов (без USDT)"""
+        self._ensure_loaded()
+        return list(self._pairs)
+
+    def tick_size(self, symbol):
+        """Шаг цены символа или None"""
+        instrument = self.get(symbol)
+        return instrument.tick_size if instrument else None
+
+    def lot_size(self, symbol):
+        """Шаг количества символа или None"""
+        instrument = self.get(symbol)
+        return instrument.lot_size if instrument else None
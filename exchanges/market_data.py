@@ -0,0 +1,59 @@
+import time
+from collections import namedtuple
+
+# timestamp - последнее обновление любого поля, book_timestamp - последнее обновление bid/ask
+Quote = namedtuple('Quote', ['last', 'bid', 'ask', 'mark', 'timestamp', 'book_timestamp'])
+Quote.__new__.__defaults__ = (None, None, None, None, None, None)
+
+def _is_stale(timestamp, max_age):
+    return timestamp is None or time.time() * 1000 - timestamp > max_age * 1000
+
+class QuoteTable:
+    """Таблица последних котировок из публичных WebSocket-потоков
+
+    Каждая котировка - неизменяемый кортеж, который заменяется целиком.
+    Чтение - один dict.get (атомарен в CPython), поэтому читателям
+    (get_ticker, close_position, пересчет PnL) блокировка не нужна.
+    Писатель - один поток WebSocket биржи.
+    """
+
+    def __init__(self):
+        self._quotes = {}
+        self.watched = set()
+
+    def get(self, symbol, max_age=None):
+        """Котировка символа или None, если ее нет или она старше max_age секунд"""
+        quote = self._quotes.get(symbol)
+        if quote is None:
+            return None
+        if max_age is not None and _is_stale(quote.timestamp, max_age):
+            return None
+        return quote
+
+    def update(self, symbol, **fields):
+        """Обновление полей котировки (дельты содержат только изменившиеся поля)"""
+        fields = {k: float(v) for k, v in fields.items() if v not in (None, '')}
+        fields['timestamp'] = int(time.time() * 1000)
+        if 'bid' in fields or 'ask' in fields:
+            fields['book_timestamp'] = fields['timestamp']
+        previous = self._quotes.get(symbol)
+        self._quotes[symbol] = previous._replace(**fields) if previous else Quote(**fields)
+
+    def ticker(self, symbol, max_age=None):
+        """Котировка в формате get_ticker или None, если bid/ask неизвестны
+
+        Возраст проверяется по bid/ask: частые обновления mark price не
+        делают устаревший стакан свежим.
+        """
+        quote = self._quotes.get(symbol)
+        if quote is None or quote.bid is None or quote.ask is None:
+            return None
+        if max_age is not None and _is_stale(quote.book_timestamp, max_age):
+            return None
+        return {
+            'symbol': symbol,
+            'last': quote.last if quote.last is not None else quote.mark,
+            'bid': quote.bid,
+            'ask': quote.ask,
+            'timestamp': quote.book_timestamp
+        }
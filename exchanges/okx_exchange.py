@@ -1,11 +1,18 @@
 from .base_exchange import BaseExchange
+from .position_book import PositionBook
+from .single_flight import single_flight
+from .websocket_client import WebSocketWorker
+from .instruments import Instrument
+from app import http_pool
 import ccxt
+import base64
+import hashlib
+import hmac
 from datetime import datetime
 import time
 import traceback
 import pandas as pd
 import math
-import numpy as np
 
 def clean_symbol(symbol):
     """Очищает символ от USDT и форматирования OKX"""
@@ -20,6 +27,21 @@ def clean_symbol(symbol):
     return base.replace('USDT', '')
 
 class OkxExchange(BaseExchange):
+    PRIVATE_WS_URL = 'wss://ws.okx.com:8443/ws/v5/private'
+    PUBLIC_WS_URL = 'wss://ws.okx.com:8443/ws/v5/public'
+    EXCHANGE_NAME = 'OKX'
+    KLINE_INTERVALS = {
+        '1m': '1m',
+        '5m': '5m',
+        '15m': '15m',
+        '30m': '30m',
+        '1h': '1H',
+        '4h': '4H',
+        '1d': '1D',
+        '1w': '1W'
+    }
+    KLINE_FETCH_LIMIT = 300  # Ограничение /market/candles
+
     def __init__(self, api_key, api_secret, passphrase, position_mode='Hedge', limit_order_offset=0.01):
         super().__init__(api_key, api_secret, position_mode, limit_order_offset)
         try:
@@ -40,6 +62,7 @@ class OkxExchange(BaseExchange):
                     }
                 }
             })
+            http_pool.mount(getattr(self.client, 'session', None))
             
             self.daily_pnl = {}
             self.last_reset_day = None
@@ -73,9 +96,147 @@ class OkxExchange(BaseExchange):
             print(f"Error initializing OKX exchange: {str(e)}")
             raise Exception(f"Failed to initialize OKX exchange: {str(e)}")
 
+    def start_position_stream(self):
+        """Подписка на приватный канал positions OKX"""
+        try:
+            self.position_book = PositionBook(
+                key_func=self._position_key,
+                is_active_func=lambda p: float(p['contracts'] or 0) != 0
+            )
+            self._private_ws = WebSocketWorker(
+                'okx-private',
+                url=self.PRIVATE_WS_URL,
+                on_message=self._handle_private_message,
+                on_open=self._login_private_ws,
+                on_close=lambda: self.position_book.set_connected(False),
+                keepalive=lambda: self._private_ws.send('ping'),
+                keepalive_interval=20  # OKX закрывает соединение без активности 30 секунд
+            )
+            self._private_ws.start()
+            print("[OKX] Поток позиций запущен")
+            return True
+        except Exception as e:
+            print(f"[OKX] Не удалось запустить поток позиций: {e}")
+            self.position_book = None
+            return False
+
+    @staticmethod
+    def _position_key(position):
+        """Ключ позиции в книге (одинаковый для REST ccxt и потока)
+
+        В режиме net у инструмента одна позиция, а ее сторона зависит от
+        знака pos и меняется при перевороте, поэтому ключ - символ без
+        стороны: закрытие (pos=0) и переворот обновляют ту же запись.
+        """
+        info = position.get('info') or {}
+        if info.get('posSide') in ('long', 'short'):
+            return clean_symbol(position['symbol']), info['posSide']
+        return clean_symbol(position['symbol']), 'net'
+
+    def _login_private_ws(self):
+        timestamp = str(int(time.time()))
+        signature = base64.b64encode(hmac.new(
+            self.client.secret.encode(),
+            f"{timestamp}GET/users/self/verify".encode(),
+            hashlib.sha256
+        ).digest()).decode()
+        self._private_ws.send({
+            'op': 'login',
+            'args': [{
+                'apiKey': self.client.apiKey,
+                'passphrase': self.client.password,
+                'timestamp': timestamp,
+                'sign': signature
+            }]
+        })
+
+    def _handle_private_message(self, message):
+        """Обработка сообщений приватного канала"""
+        event = message.get('event')
+        if event == 'login':
+            if message.get('code') == '0':
+                self._private_ws.send({
+                    'op': 'subscribe',
+                    'args': [{'channel': 'positions', 'instType': 'SWAP'}]
+                })
+            else:
+                print(f"[OKX] Ошибка авторизации WebSocket: {message.get('msg')}")
+            return
+        if event == 'subscribe':
+            self.position_book.set_connected(True)
+            return
+        if event == 'error':
+            print(f"[OKX] Ошибка WebSocket: {message.get('msg')}")
+            return
+        if message.get('arg', {}).get('channel') != 'positions':
+            return
+        # Приводим позиции потока к формату ccxt fetch_positions
+        positions = []
+        for data in message.get('data', []):
+            pos = float(data.get('pos') or 0)
+            side = data.get('posSide')
+            if side not in ('long', 'short'):
+                side = 'long' if pos > 0 else 'short'
+            positions.append({
+                'symbol': data['instId'],
+                'contracts': abs(pos),
+                'unrealizedPnl': float(data.get('upl') or 0),
+                'notional': float(data.get('notionalUsd') or 0),
+                'side': side,
+                'info': data
+            })
+        if positions:
+            self.position_book.apply_delta(positions)
+
+    def start_market_data(self):
+        """Подписка на публичные каналы tickers и mark-price OKX
+
+        Пересчет PnL не нужен: канал positions сам присылает актуальный upl.
+        """
+        try:
+            self._public_ws = WebSocketWorker(
+                'okx-public',
+                url=self.PUBLIC_WS_URL,
+                on_message=self._handle_public_message,
+                on_open=lambda: self._subscribe_quotes(self._watched_symbols()),
+                keepalive=lambda: self._public_ws.send('ping'),
+                keepalive_interval=20
+            )
+            with self._watch_lock:
+                self._market_data_started = True
+            self._public_ws.start()
+            print("[OKX] Поток котировок запущен")
+            return True
+        except Exception as e:
+            print(f"[OKX] Не удалось запустить поток котировок: {e}")
+            return False
+
+    def _subscribe_quotes(self, symbols):
+        args = []
+        for symbol in symbols:
+            inst_id = f"{symbol}-USDT-SWAP"
+            args.append({'channel': 'tickers', 'instId': inst_id})
+            args.append({'channel': 'mark-price', 'instId': inst_id})
+        for i in range(0, len(args), 50):
+            self._public_ws.send({'op': 'subscribe', 'args': args[i:i + 50]})
+
+    def _handle_public_message(self, message):
+        """Обработка публичных каналов котировок"""
+        channel = message.get('arg', {}).get('channel')
+        for data in message.get('data', []):
+            symbol = clean_symbol(data.get('instId'))
+            if channel == 'tickers':
+                self.quotes.update(symbol, last=data.get('last'), bid=data.get('bidPx'), ask=data.get('askPx'))
+            elif channel == 'mark-price':
+                self.quotes.update(symbol, mark=data.get('markPx'))
+
+    def _fetch_raw_positions(self):
+        """Получение открытых позиций через REST"""
+        return self.client.fetch_positions()
+
     def get_positions(self):
         try:
-            positions = self.client.fetch_positions()
+            positions = self._get_raw_positions()
             processed_positions = []
             rapid_growth_positions = []
             
@@ -237,53 +398,25 @@ class OkxExchange(BaseExchange):
         except Exception:
             return []
 
+    @single_flight
     def get_symbol_chart_data(self, symbol):
         """Получает исторические данные для графика"""
         try:
-            # Используем тот же формат, что в позициях: XRP-USDT-SWAP
-            market_symbol = f"{symbol}-USDT-SWAP"
-            print(f"\nGetting chart data for {market_symbol}")
-            
-            try:
-                # Используем параметры OKX API
-                params = {
-                    'instId': market_symbol,
-                    'bar': '5m',
-                    'limit': '24'
-                }
-                candles = self.client.publicGetMarketCandles(params)
-                
-                if candles and candles.get('data'):
-                    print(f"Got {len(candles['data'])} candles")
-                    return [float(candle[4]) for candle in reversed(candles['data'])]
-                    
-                print(f"No candles data")
-                return []
-                
-            except Exception as e:
-                print(f"Error fetching OHLCV: {str(e)}")
-                return []
-                
+            candles = self.get_candles(symbol, '5m', 24)
+            return [candle[4] for candle in candles]
         except Exception as e:
             print(f"Error getting OKX chart data: {str(e)}")
             return []
 
+    @single_flight
     def get_sma200_position(self, symbol):
         """Определяет положение цены относительно SMA200"""
         try:
-            # Используем тот же формат, что в позициях: XRP-USDT-SWAP
-            market_symbol = f"{symbol}-USDT-SWAP"
-            
-            klines = self.client.fetch_ohlcv(
-                market_symbol,
-                timeframe='1d',
-                limit=200
-            )
+            closes = [candle[4] for candle in self.get_candles(symbol, '1d', 200)]
             
-            if len(klines) >= 200:
-                closes = [float(k[4]) for k in klines]
-                sma200 = sum(closes[:200]) / 200
-                current_price = float(klines[0][4])
+            if len(closes) >= 200:
+                sma200 = sum(closes[-200:]) / 200
+                current_price = closes[-1]
                 return current_price > sma200
                 
             return None
@@ -292,9 +425,14 @@ class OkxExchange(BaseExchange):
             print(f"Error getting OKX SMA200 for {symbol}: {e}")
             return None
 
+    @single_flight
     def get_ticker(self, symbol):
         """Получение текущих данных тикера"""
         try:
+            cached = self._get_cached_ticker(symbol)
+            if cached:
+                return cached
+            
             market_symbol = f"{symbol}-USDT-SWAP"
             ticker = self.client.fetch_ticker(market_symbol)
             return {
@@ -422,39 +560,29 @@ class OkxExchange(BaseExchange):
                 'message': f'Error closing position: {str(e)}'
             }
 
-    def get_all_pairs(self):
-        """Получение списка всех доступных бессрочных фьючерсов"""
-        try:
-            instruments = self.client.fetch_markets()
-            
-            # Фильтруем только бессрочные фьючерсы
-            pairs = [
-                clean_symbol(market['id'])  # Используем существующую функцию clean_symbol
-                for market in instruments
-                if market['type'] == 'swap'  # swap = бессрочный контракт в OKX
-                and market['quote'] == 'USDT'
-                and market['active']
-            ]
-            return sorted(pairs)
-        except Exception as e:
-            print(f"Error getting OKX pairs: {str(e)}")
-            return []
-
-    def get_chart_data(self, symbol, timeframe='1h', period='1w'):
+    def _load_instruments(self):
+        """Загрузка активных бессрочных USDT-фьючерсов (swap)"""
+        instruments = []
+        for market in self.client.fetch_markets():
+            # swap = бессрочный контракт в OKX
+            if market['type'] != 'swap' or market['quote'] != 'USDT' or not market['active']:
+                continue
+            precision = market.get('precision') or {}
+            limits = (market.get('limits') or {}).get('amount') or {}
+            instruments.append(Instrument(
+                symbol=clean_symbol(market['id']),
+                exchange_symbol=market['id'],
+                tick_size=precision.get('price'),
+                lot_size=precision.get('amount'),
+                min_qty=limits.get('min'),
+                contract_type=market['type']
+            ))
+        return instruments
+
+    @single_flight
+    def get_chart_data(self, symbol, timeframe='1h', period='1w', layout='rows'):
         """Получает данные для графика"""
         try:
-            # Маппинг таймфреймов OKX
-            timeframe_map = {
-                '1m': '1m',
-                '5m': '5m',
-                '15m': '15m',
-                '30m': '30m',
-                '1h': '1H',
-                '4h': '4H',
-                '1d': '1D',
-                '1w': '1W'
-            }
-            
             # Обработка таймфрейма "all"
             if timeframe == 'all':
                 intervals = ['1m', '5m', '15m', '30m', '1h', '4h', '1d']
@@ -464,47 +592,21 @@ class OkxExchange(BaseExchange):
 
                 for interval in intervals:
                     try:
-                        market_symbol = f"{symbol}-USDT-SWAP"
-                        params = {
-                            'instId': market_symbol,
-                            'bar': timeframe_map[interval],
-                            'limit': '1000'
-                        }
-                        response = self.client.publicGetMarketCandles(params)
-                        
-                        if response and response.get('data'):
-                            klines = response['data']
-                            if len(klines) > max_klines:
-                                max_klines = len(klines)
-                                selected_interval = interval
-                                selected_klines = klines
+                        klines = self.get_candles(symbol, interval, 1000)
+                        if len(klines) > max_klines:
+                            max_klines = len(klines)
+                            selected_interval = interval
+                            selected_klines = klines
                     except Exception as e:
                         print(f"[OKX] Ошибка при получении данных для интервала {interval}: {str(e)}")
                         continue
 
                 if selected_interval and selected_klines:
                     print(f"[OKX] Выбран интервал {selected_interval} с {len(selected_klines)} свечами")
-                    candles = []
-                    for k in reversed(selected_klines):
-                        try:
-                            candle = {
-                                'time': int(float(k[0])),
-                                'open': float(k[1]),
-                                'high': float(k[2]),
-                                'low': float(k[3]),
-                                'close': float(k[4]),
-                                'volume': float(k[5])
-                            }
-                            candles.append(candle)
-                        except (ValueError, IndexError) as e:
-                            print(f"[OKX] Ошибка при обработке свечи: {e}, данные: {k}")
-                            continue
-                    
-                    candles.sort(key=lambda x: x['time'])
                     return {
                         'success': True,
                         'data': {
-                            'candles': candles
+                            'candles': self._format_candles(selected_klines, layout)
                         }
                     }
                 else:
@@ -514,55 +616,29 @@ class OkxExchange(BaseExchange):
                     }
             
             # Стандартная обработка для конкретного таймфрейма
-            interval = timeframe_map.get(timeframe)
-            if not interval:
+            if timeframe not in self.KLINE_INTERVALS:
                 print(f"[OKX] Неподдерживаемый таймфрейм: {timeframe}")
                 return {
                     'success': False,
                     'error': f'Неподдерживаемый таймфрейм: {timeframe}'
                 }
             
-            market_symbol = f"{symbol}-USDT-SWAP"
-            print(f"[OKX] Getting chart data for {market_symbol} with interval {interval}")
+            print(f"[OKX] Getting chart data for {symbol}-USDT-SWAP with interval {timeframe}")
             
             try:
-                params = {
-                    'instId': market_symbol,
-                    'bar': interval,
-                    'limit': '1000'
-                }
-                response = self.client.publicGetMarketCandles(params)
-                
-                if not response or not response.get('data'):
+                klines = self.get_candles(symbol, timeframe, 1000)
+                if not klines:
                     print(f"[OKX] Нет данных свечей")
                     return {
                         'success': False,
                         'error': 'Нет данных свечей'
                     }
                 
-                candles = []
-                for k in reversed(response['data']):
-                    try:
-                        candle = {
-                            'time': int(float(k[0])),
-                            'open': float(k[1]),
-                            'high': float(k[2]),
-                            'low': float(k[3]),
-                            'close': float(k[4]),
-                            'volume': float(k[5])
-                        }
-                        candles.append(candle)
-                    except (ValueError, IndexError) as e:
-                        print(f"[OKX] Ошибка при обработке свечи: {e}, данные: {k}")
-                        continue
-                
-                candles.sort(key=lambda x: x['time'])
-                
-                print(f"[OKX] Подготовлен ответ с {len(candles)} свечами")
+                print(f"[OKX] Подготовлен ответ с {len(klines)} свечами")
                 return {
                     'success': True,
                     'data': {
-                        'candles': candles
+                        'candles': self._format_candles(klines, layout)
                     }
                 }
                 
@@ -580,334 +656,17 @@ class OkxExchange(BaseExchange):
                 'error': str(e)
             }
 
-    def get_indicators(self, symbol, timeframe='1h'):
-        """Получение значений индикаторов
-        
-        Args:
-            symbol (str): Символ торговой пары
-            timeframe (str): Таймфрейм
-            
-        Returns:
-            dict: Значения индикаторов
-        """
-        try:
-            print(f"[OKX] Запрос индикаторов для {symbol}, таймфрейм: {timeframe}")
-            
-            # Конвертируем таймфрейм в формат OKX
-            timeframe_map = {
-                '1m': '1m',
-                '5m': '5m',
-                '15m': '15m',
-                '30m': '30m',
-                '1h': '1H',
-                '4h': '4H',
-                '1d': '1D',
-                '1w': '1W'
-            }
-            
-            interval = timeframe_map.get(timeframe)
-            if not interval:
-                print(f"[OKX] Неподдерживаемый таймфрейм: {timeframe}")
-                return {
-                    'success': False,
-                    'error': f'Неподдерживаемый таймфрейм: {timeframe}'
-                }
-
-            # Получаем последние 100 свечей для расчета индикаторов
-            response = self.client.get_candlesticks(
-                instId=f"{symbol}-USDT-SWAP",
-                bar=interval,
-                limit=100
-            )
-
-            if not response or response.get('code') != '0':
-                return {
-                    'success': False,
-                    'error': 'Не удалось получить данные свечей'
-                }
-
-            klines = response.get('data', [])
-            if not klines:
-                return {
-                    'success': False,
-                    'error': 'Нет данных свечей'
-                }
-
-            # Преобразуем данные в массивы для расчетов
-            closes = np.array([float(k[4]) for k in klines])  # Цены закрытия
-            highs = np.array([float(k[2]) for k in klines])   # Максимумы
-            lows = np.array([float(k[3]) for k in klines])    # Минимумы
-            volumes = np.array([float(k[5]) for k in klines])  # Объемы
-            timestamps = [int(k[0]) for k in klines]          # Временные метки
-
-            # 1. Расчет RSI
-            rsi = self._calculate_rsi(closes)
-            current_rsi = rsi[-1]
-            
-            # Определение состояния RSI
-            rsi_status = "Нейтральный"
-            if current_rsi >= 70:
-                rsi_status = "Перекуплен"
-            elif current_rsi <= 30:
-                rsi_status = "Перепродан"
-
-            # 2. Расчет тренда
-            trend_info = self._calculate_trend(closes)
-            
-            # 3. Расчет объемов
-            volume_info = self._calculate_volume_metrics(volumes)
-
-            # 4. Расчет уровней поддержки и сопротивления
-            support_resistance = self._calculate_support_resistance(highs, lows, closes)
-
-            # 5. Расчет точек входа/выхода
-            entry_exit = self._calculate_entry_exit_points(
-                closes[-1], 
-                support_resistance['support'], 
-                support_resistance['resistance'],
-                trend_info['direction']
-            )
-
-            # 6. Расчет торгового канала
-            channel = self._calculate_trading_channel(highs, lows)
-
-            # Формируем рекомендацию
-            recommendation = self._generate_recommendation(
-                current_rsi,
-                trend_info['direction'],
-                closes[-1],
-                support_resistance,
-                volume_info['volume_trend']
-            )
-
-            return {
-                'success': True,
-                'data': {
-                    'time': {
-                        'timestamp': timestamps[-1],
-                        'datetime': datetime.fromtimestamp(timestamps[-1]/1000).strftime('%Y-%m-%d %H:%M:%S')
-                    },
-                    'price': {
-                        'current': closes[-1],
-                        'high_24h': max(highs[-24:]) if len(highs) >= 24 else highs[-1],
-                        'low_24h': min(lows[-24:]) if len(lows) >= 24 else lows[-1]
-                    },
-                    'rsi': {
-                        'value': round(current_rsi, 2),
-                        'status': rsi_status
-                    },
-                    'trend': {
-                        'direction': trend_info['direction'],
-                        'strength': trend_info['strength']
-                    },
-                    'volume': {
-                        'current_24h': volume_info['current_24h'],
-                        'change_percent': volume_info['change_percent'],
-                        'trend': volume_info['volume_trend']
-                    },
-                    'levels': {
-                        'support': support_resistance['support'],
-                        'resistance': support_resistance['resistance']
-                    },
-                    'entry_exit': {
-                        'entry_point': entry_exit['entry_point'],
-                        'stop_loss': entry_exit['stop_loss'],
-                        'target': entry_exit['target']
-                    },
-                    'channel': {
-                        'upper': channel['upper'],
-                        'lower': channel['lower'],
-                        'position': channel['position']
-                    },
-                    'recommendation': recommendation
-                }
-            }
-
-        except Exception as e:
-            print(f"[OKX] Ошибка при расчете индикаторов: {str(e)}")
-            return {
-                'success': False,
-                'error': str(e)
-            }
-
-    def _calculate_rsi(self, closes, period=14):
-        """Расчет RSI"""
-        deltas = np.diff(closes)
-        seed = deltas[:period+1]
-        up = seed[seed >= 0].sum()/period
-        down = -seed[seed < 0].sum()/period
-        rs = up/down
-        rsi = np.zeros_like(closes)
-        rsi[:period] = 100. - 100./(1. + rs)
-
-        for i in range(period, len(closes)):
-            delta = deltas[i-1]
-            if delta > 0:
-                upval = delta
-                downval = 0.
-            else:
-                upval = 0.
-                downval = -delta
-
-            up = (up*(period-1) + upval)/period
-            down = (down*(period-1) + downval)/period
-            rs = up/down
-            rsi[i] = 100. - 100./(1. + rs)
-
-        return rsi
-
-    def _calculate_trend(self, closes):
-        """Расчет тренда и его силы"""
-        # Используем 20-периодную SMA для определения тренда
-        sma20 = np.mean(closes[-20:])
-        current_price = closes[-1]
-        
-        # Определяем направление тренда
-        if current_price > sma20 * 1.02:  # Цена выше SMA на 2%
-            direction = "Восходящий"
-        elif current_price < sma20 * 0.98:  # Цена ниже SMA на 2%
-            direction = "Нисходящий"
-        else:
-            direction = "Боковой"
-
-        # Рассчитываем силу тренда на основе отклонения от SMA
-        deviation = abs((current_price - sma20) / sma20 * 100)
-        if deviation < 2:
-            strength = "Слабый"
-        elif deviation < 5:
-            strength = "Умеренный"
-        else:
-            strength = "Сильный"
-
-        return {
-            'direction': direction,
-            'strength': strength
-        }
-
-    def _calculate_volume_metrics(self, volumes):
-        """Расчет метрик объема"""
-        current_24h = sum(volumes[-24:]) if len(volumes) >= 24 else sum(volumes)
-        prev_24h = sum(volumes[-48:-24]) if len(volumes) >= 48 else sum(volumes)
-        
-        # Изменение объема
-        if prev_24h > 0:
-            change_percent = ((current_24h - prev_24h) / prev_24h) * 100
-        else:
-            change_percent = 0
-
-        # Определяем тренд объема
-        if change_percent > 10:
-            volume_trend = "Растущий"
-        elif change_percent < -10:
-            volume_trend = "Падающий"
-        else:
-            volume_trend = "Стабильный"
-
-        return {
-            'current_24h': current_24h,
-            'change_percent': round(change_percent, 2),
-            'volume_trend': volume_trend
-        }
-
-    def _calculate_support_resistance(self, highs, lows, closes):
-        """Расчет уровней поддержки и сопротивления"""
-        # Используем метод кластеризации цен
-        all_prices = np.concatenate([highs, lows, closes])
-        price_clusters = {}
-
-        # Группируем цены в кластеры с погрешностью 0.5%
-        for price in all_prices:
-            found_cluster = False
-            for cluster_price in list(price_clusters.keys()):
-                if abs(price - cluster_price) / cluster_price < 0.005:
-                    price_clusters[cluster_price] += 1
-                    found_cluster = True
-                    break
-            if not found_cluster:
-                price_clusters[price] = 1
-
-        # Сортируем кластеры по количеству точек
-        sorted_clusters = sorted(price_clusters.items(), key=lambda x: x[1], reverse=True)
-        
-        current_price = closes[-1]
-        support = current_price
-        resistance = current_price
-
-        # Находим ближайшие уровни поддержки и сопротивления
-        for price, _ in sorted_clusters:
-            if price < current_price and price > support:
-                support = price
-            elif price > current_price and price < resistance:
-                resistance = price
-
-        return {
-            'support': support,
-            'resistance': resistance
-        }
-
-    def _calculate_entry_exit_points(self, current_price, support, resistance, trend):
-        """Расчет точек входа, выхода и стоп-лосса"""
-        # Расчет точки входа
-        if trend == "Восходящий":
-            entry_point = support + (resistance - support) * 0.382  # Уровень Фибоначчи
-        else:
-            entry_point = resistance - (resistance - support) * 0.382
-
-        # Расчет стоп-лосса (2% от точки входа)
-        stop_loss = entry_point * 0.98 if trend == "Восходящий" else entry_point * 1.02
-
-        # Расчет целевой цены (соотношение риск/прибыль 1:2)
-        risk = abs(entry_point - stop_loss)
-        target = entry_point + (risk * 2) if trend == "Восходящий" else entry_point - (risk * 2)
-
-        return {
-            'entry_point': round(entry_point, 8),
-            'stop_loss': round(stop_loss, 8),
-            'target': round(target, 8)
-        }
-
-    def _calculate_trading_channel(self, highs, lows):
-        """Расчет торгового канала"""
-        # Используем последние 20 свечей для канала
-        period = 20
-        recent_highs = highs[-period:]
-        recent_lows = lows[-period:]
-
-        upper = np.max(recent_highs)
-        lower = np.min(recent_lows)
-        current = (highs[-1] + lows[-1]) / 2
-
-        # Определяем положение текущей цены в канале
-        channel_height = upper - lower
-        if channel_height > 0:
-            position_percent = ((current - lower) / channel_height) * 100
-            if position_percent < 25:
-                position = "Нижняя часть канала"
-            elif position_percent > 75:
-                position = "Верхняя часть канала"
-            else:
-                position = "Середина канала"
-        else:
-            position = "Неопределено"
-
-        return {
-            'upper': upper,
-            'lower': lower,
-            'position': position
+    def _fetch_klines(self, symbol, timeframe, limit, end_time=None):
+        params = {
+            'instId': f"{symbol}-USDT-SWAP",
+            'bar': self.KLINE_INTERVALS[timeframe],
+            'limit': str(limit)
         }
-
-    def _generate_recommendation(self, rsi, trend_direction, current_price, support_resistance, volume_trend):
-        """Генерация торговой рекомендации"""
-        if rsi >= 70 and trend_direction == "Восходящий" and volume_trend == "Падающий":
-            return "Возможна коррекция - рекомендуется фиксация прибыли"
-        elif rsi <= 30 and trend_direction == "Нисходящий" and volume_trend == "Растущий":
-            return "Возможен отскок - рекомендуется поиск точки входа"
-        elif trend_direction == "Восходящий" and current_price < support_resistance['resistance']:
-            return "Восходящий тренд - рассмотреть покупку на откате"
-        elif trend_direction == "Нисходящий" and current_price > support_resistance['support']:
-            return "Нисходящий тренд - рассмотреть продажу на росте"
-        else:
-            return "Нейтральная ситуация - рекомендуется наблюдение"
+        if end_time is not None:
+            params['after'] = str(end_time + 1)  # after - свечи строго раньше указанного времени
+        response = self.client.publicGetMarketCandles(params)
+        # OKX возвращает свечи от новых к старым
+        return [self._parse_kline(k) for k in reversed(response.get('data') or [])]
 
     def get_wallet_balance(self):
         """Получает общий баланс кошелька и реализованный PNL"""
@@ -0,0 +1,115 @@
+import threading
+import time
+
+class PositionBook:
+    """Книга позиций в памяти, обновляемая дельтами из WebSocket
+
+    Хранит сырые позиции в формате REST-ответа биржи, поэтому обработка
+    позиций одинакова для снимка и для потока. REST используется только
+    для начального снимка и периодической сверки.
+
+    Пока выполняется REST-запрос снимка (begin_snapshot - load_snapshot),
+    дельты запоминаются и применяются повторно поверх загруженного
+    снимка, чтобы изменения, пришедшие во время запроса, не терялись.
+
+    Args:
+        key_func (callable): Ключ позиции (например, символ + сторона)
+        is_active_func (callable): True, если позиция открыта (размер != 0)
+    """
+
+    def __init__(self, key_func, is_active_func):
+        self._key = key_func
+        self._is_active = is_active_func
+        self._positions = {}
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self.connected = False
+        self.version = 0
+        self.last_snapshot_time = None
+        self.last_event_time = None
+        self._pending = None  # Дельты, пришедшие во время запроса снимка: [(время, позиции)]
+
+    def begin_snapshot(self):
+        """Начало запроса REST-снимка; возвращает время запроса для load_snapshot"""
+        with self._lock:
+            self._pending = []
+            return time.time()
+
+    def cancel_snapshot(self):
+        """Запрос снимка не удался - дельты больше не запоминаются"""
+        with self._lock:
+            self._pending = None
+
+    def load_snapshot(self, raw_positions, requested_at=None):
+        """Полная замена содержимого книги REST-снимком
+
+        Дельты, пришедшие после requested_at (см. begin_snapshot),
+        применяются повторно поверх снимка.
+        """
+        with self._changed:
+            self._positions = {
+                self._key(p): p for p in raw_positions if self._is_active(p)
+            }
+            pending, self._pending = self._pending, None
+            if requested_at is not None and pending:
+                for received_at, positions in pending:
+                    if received_at >= requested_at:
+                        self._merge(positions)
+            self.last_snapshot_time = time.time()
+            self._bump()
+
+    def apply_delta(self, raw_positions):
+        """Применение изменений из WebSocket: обновление или удаление закрытых позиций"""
+        with self._changed:
+            self._merge(raw_positions)
+            self.last_event_time = time.time()
+            if self._pending is not None:
+                self._pending.append((self.last_event_time, raw_positions))
+            self._bump()
+
+    def _merge(self, raw_positions):
+        for position in raw_positions:
+            key = self._key(position)
+            if self._is_active(position):
+                merged = dict(self._positions.get(key, {}))
+                merged.update(position)
+                self._positions[key] = merged
+            else:
+                self._positions.pop(key, None)
+
+    def positions(self):
+        """Копия текущего списка позиций"""
+        with self._lock:
+            return list(self._positions.values())
+
+    def set_connected(self, connected):
+        """Изменение состояния соединения; после разрыва нужен новый снимок"""
+        with self._changed:
+            self.connected = connected
+            if not connected:
+                self.last_snapshot_time = None
+            self._bump()
+
+    def invalidate(self):
+        """Сброс снимка: следующее чтение выполнит сверку через REST"""
+        with self._lock:
+            self.last_snapshot_time = None
+
+    def is_live(self):
+        """Книга подключена и содержит актуальный снимок"""
+        return self.connected and self.last_snapshot_time is not None
+
+    def needs_reconcile(self, interval):
+        """Пора ли сверить книгу с REST"""
+        return (self.last_snapshot_time is None or
+                time.time() - self.last_snapshot_time >= interval)
+
+    def wait_for_update(self, since_version, timeout):
+        """Ожидание новой версии книги; возвращает текущую версию"""
+        with self._changed:
+            self._changed.wait_for(lambda: self.version != since_version, timeout)
+            return self.version
+
+    def _bump(self):
+        self.version += 1
+        self._changed.notify_all()
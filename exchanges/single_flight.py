@@ -0,0 +1,63 @@
+import functools
+import threading
+
+class _Call:
+    """Выполняющийся запрос и его результат"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class SingleFlight:
+    """Объединение одинаковых одновременных запросов
+
+    Первый поток с данным ключом выполняет запрос, остальные ждут и
+    получают тот же результат (или то же исключение). Результат общий,
+    поэтому вызывающие не должны его изменять.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.calls = 0   # Выполненные запросы
+        self.shared = 0  # Запросы, получившие чужой результат
+
+    def do(self, key, func, *args, **kwargs):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.calls += 1
+            else:
+                self.shared += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func(*args, **kwargs)
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+def single_flight(method):
+    """Декоратор метода биржи: одинаковые одновременные вызовы выполняются один раз
+
+    Ключ - имя метода и аргументы; группа запросов у каждой биржи своя
+    (self._single_flight).
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        key = (method.__name__, args, tuple(sorted(kwargs.items())))
+        return self._single_flight.do(key, method, self, *args, **kwargs)
+    return wrapper
@@ -0,0 +1,134 @@
+import json
+import threading
+import time
+import websocket
+
+class WebSocketWorker:
+    """Фоновое WebSocket-соединение с автоматическим переподключением
+
+    Args:
+        name (str): Имя соединения для логов
+        url (str | callable): URL или функция, возвращающая URL при каждом подключении
+            (например, Binance listenKey)
+        on_message (callable): Обработчик разобранного JSON-сообщения
+        on_open (callable, optional): Вызывается после установки соединения
+        on_close (callable, optional): Вызывается после разрыва соединения
+        keepalive (callable, optional): Периодическое действие, пока соединение активно
+        keepalive_interval (int): Интервал вызова keepalive в секундах
+    """
+
+    def __init__(self, name, url, on_message, on_open=None, on_close=None,
+                 keepalive=None, keepalive_interval=20, ping_interval=20, reconnect_delay=5):
+        self.name = name
+        self.url = url
+        self.on_message = on_message
+        self.on_open = on_open
+        self.on_close = on_close
+        self.keepalive = keepalive
+        self.keepalive_interval = keepalive_interval
+        self.ping_interval = ping_interval
+        self.reconnect_delay = reconnect_delay
+        self.connected = False
+        self._ws = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Запуск соединения в фоновом потоке"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=f"ws-{self.name}", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Остановка соединения без переподключения"""
+        self._stop.set()
+        self.reconnect()
+
+    def reconnect(self):
+        """Принудительный разрыв соединения (поток переподключится сам)"""
+        ws = self._ws
+        if ws:
+            try:
+                ws.close()
+            except Exception:
+                pass
+
+    def send(self, payload):
+        """Отправка сообщения (dict сериализуется в JSON)"""
+        ws = self._ws
+        if not ws or not self.connected:
+            return False
+        try:
+            ws.send(payload if isinstance(payload, str) else json.dumps(payload))
+            return True
+        except Exception as e:
+            print(f"[WS:{self.name}] Ошибка отправки: {e}")
+            return False
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                url = self.url() if callable(self.url) else self.url
+                self._ws = websocket.WebSocketApp(
+                    url,
+                    on_open=self._handle_open,
+                    on_message=self._handle_message,
+                    on_error=self._handle_error,
+                    on_close=self._handle_close
+                )
+                self._ws.run_forever(ping_interval=self.ping_interval, ping_timeout=self.ping_interval // 2)
+            except Exception as e:
+                print(f"[WS:{self.name}] Ошибка соединения: {e}")
+            self._set_disconnected()
+            self._stop.wait(self.reconnect_delay)
+
+    def _handle_open(self, ws):
+        print(f"[WS:{self.name}] Соединение установлено")
+        self.connected = True
+        if self.keepalive:
+            threading.Thread(target=self._keepalive_loop, args=(ws,), daemon=True).start()
+        if self.on_open:
+            try:
+                self.on_open()
+            except Exception as e:
+                print(f"[WS:{self.name}] Ошибка в on_open: {e}")
+
+    def _handle_message(self, ws, message):
+        try:
+            data = json.loads(message)
+        except ValueError:
+            # Служебные текстовые ответы (например, 'pong' у OKX)
+            return
+        try:
+            self.on_message(data)
+        except Exception as e:
+            print(f"[WS:{self.name}] Ошибка обработки сообщения: {e}")
+
+    def _handle_error(self, ws, error):
+        print(f"[WS:{self.name}] Ошибка: {error}")
+
+    def _handle_close(self, ws, status_code=None, message=None):
+        print(f"[WS:{self.name}] Соединение закрыто ({status_code})")
+        self._set_disconnected()
+
+    def _set_disconnected(self):
+        if not self.connected:
+            return
+        self.connected = False
+        if self.on_close:
+            try:
+                self.on_close()
+            except Exception as e:
+                print(f"[WS:{self.name}] Ошибка в on_close: {e}")
+
+    def _keepalive_loop(self, ws):
+        # Работает, пока активно именно это соединение
+        while not self._stop.wait(self.keepalive_interval):
+            if ws is not self._ws or not self.connected:
+                return
+            try:
+                self.keepalive()
+            except Exception as e:
+                print(f"[WS:{self.name}] Ошибка keepalive: {e}")
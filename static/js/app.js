@@ -329,6 +329,10 @@ class App {
                 console.log('Update already in progress, skipping...');
                 return;
             }
+            // Позиции приходят через Socket.IO - опрос не нужен
+            if (this.positionsManager?.pushActive) {
+                return;
+            }
 
             try {
                 isUpdating = true;
@@ -608,36 +612,19 @@ class App {
                     if (loadingElement) loadingElement.style.display = 'block';
                     if (progressBar) progressBar.style.width = '0%';
                     
-                    const total = pairs.length;
-                    let completed = 0;
-                    
                     try {
-                        const batchSize = 5; // Анализируем по 5 тикеров одновременно
-                        for (let i = 0; i < pairs.length; i += batchSize) {
-                            const batch = pairs.slice(i, i + batchSize);
-                            await Promise.all(batch.map(async (symbol) => {
-                                try {
-                                    const chartResponse = await fetch(`/api/chart/${symbol}?timeframe=1d&period=1M`);
-                                    const chartData = await chartResponse.json();
-                                    
-                                    if (chartData.success && chartData.data && chartData.data.candles) {
-                                        window.tradingFilters.analyzeTicker(symbol, chartData.data.candles);
-                                    }
-                                } catch (error) {
-                                    console.error(`[TRADING] Error analyzing ${symbol}:`, error);
-                                } finally {
-                                    completed++;
-                                    if (progressBar) {
-                                        const progress = (completed / total) * 100;
-                                        progressBar.style.width = `${progress}%`;
-                                        console.log(`[TRADING] Analysis progress: ${progress.toFixed(1)}%`);
-                                    }
-                                }
-                            }));
-                            
-                            // Небольшая задержка между батчами
-                            await new Promise(resolve => setTimeout(resolve, 100));
+                        // Весь анализ считается на сервере одним запросом
+                        const screenerResponse = await fetch('/api/screener');
+                        const screenerData = await screenerResponse.json();
+                        
+                        if (screenerData.success) {
+                            window.tradingFilters.setScreenerData(screenerData.data);
+                        } else {
+                            console.error('[TRADING] Screener error:', screenerData.error);
                         }
+                        if (progressBar) progressBar.style.width = '100%';
+                    } catch (error) {
+                        console.error('[TRADING] Error loading screener:', error);
                     } finally {
                         if (loadingElement) loadingElement.style.display = 'none';
                         if (progressBar) progressBar.style.width = '0%';
@@ -283,7 +283,7 @@ class CanvasTradingChart {
         }
 
         // Преобразуем данные в нужный формат
-        this.data.candles = data.times.map((time, i) => {
+        this.data.candles = Array.from(data.times, (time, i) => {
             // Проверяем и преобразуем временную метку
             let timestamp = time;
             if (typeof time === 'string') {
@@ -310,7 +310,7 @@ class CanvasTradingChart {
             return candle;
         });
 
-        this.data.volume = data.times.map((time, i) => {
+        this.data.volume = Array.from(data.times, (time, i) => {
             // Используем ту же логику для временных меток
             let timestamp = time;
             if (typeof time === 'string') {
@@ -104,6 +104,25 @@ class TradingFilters {
         console.log(`[FILTERS] Filter applied: ${visibleCount} of ${allTickers.length} visible`);
     }
 
+    // Загрузка результатов серверного скринера (/api/screener)
+    setScreenerData(rows) {
+        rows.forEach(row => {
+            this.tickersData.set(row.symbol, {
+                trend: row.trend,
+                positionPercent: row.position_percent,
+                state: row.state,
+                indicators: {
+                    rsi: row.rsi !== null ? row.rsi : 50,
+                    volumeStrength: row.volume_strength
+                }
+            });
+        });
+        console.log(`[FILTERS] Screener data loaded for ${rows.length} tickers`);
+
+        // Применяем текущий фильтр
+        this.applyFilter(this.currentFilter);
+    }
+
     analyzeTicker(symbol, candles) {
         try {
             // Проверка на пустой массив свечей
@@ -11,7 +11,8 @@ const CSS_CLASSES = {
 const API_ENDPOINTS = {
     GET_POSITIONS: '/get_positions',
     GET_CLOSED_PNL: '/get_closed_pnl',
-    GET_SYMBOL_CHART: '/get_symbol_chart'
+    GET_SYMBOL_CHART: '/get_symbol_chart',
+    GET_SPARKLINES: '/api/sparklines'
 };
 
 // DOM элементы
@@ -177,10 +177,16 @@ class ExchangeManager {
     async getChartData(symbol, timeframe = '1h', period = '1w') {
         try {
             console.log(`[EXCHANGE] Getting chart data for ${symbol} with timeframe ${timeframe}`);
-            const response = await fetch(`/api/chart/${symbol}?timeframe=${timeframe}&period=${period}`);
+            const response = await fetch(`/api/chart/${symbol}?timeframe=${timeframe}&period=${period}&format=binary`);
             if (!response.ok) {
                 throw new Error(`HTTP error! status: ${response.status}`);
             }
+
+            // Столбцы свечей одним буфером float64 - без разбора JSON и объектов на каждую свечу
+            if (response.headers.get('Content-Type')?.startsWith('application/octet-stream')) {
+                return this.parseBinaryCandles(response.headers, await response.arrayBuffer());
+            }
+
             const data = await response.json();
             console.log(`[EXCHANGE] Received raw chart data:`, JSON.stringify(data, null, 2));
 
@@ -286,6 +292,23 @@ class ExchangeManager {
         }
     }
 
+    parseBinaryCandles(headers, buffer) {
+        const count = parseInt(headers.get('X-Candle-Count'), 10);
+        const names = (headers.get('X-Candle-Columns') || 'times,open,high,low,close,volume').split(',');
+        const values = new Float64Array(buffer);
+        if (!count || values.length !== count * names.length) {
+            throw new Error('No valid candles');
+        }
+
+        // Свечи уже отсортированы по времени на сервере, столбцы - представления одного буфера
+        const columns = {};
+        names.forEach((name, index) => {
+            columns[name] = values.subarray(index * count, (index + 1) * count);
+        });
+        console.log(`[EXCHANGE] Received ${count} candles (binary)`);
+        return { success: true, data: columns };
+    }
+
     async getIndicators(symbol, timeframe = '1h') {
         try {
             console.log(`[EXCHANGE] Getting indicators for ${symbol} with timeframe ${timeframe}`);
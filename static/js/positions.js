@@ -2,6 +2,8 @@ class PositionsManager {
     constructor() {
         this.pnlThreshold = parseFloat(storageUtils.get('pnl_threshold', DEFAULTS.PNL_THRESHOLD));
         this.lastData = null;
+        this.positionsVersion = null;  // Версия снимка позиций на сервере (для запроса дельт)
+        this.positionsByKey = new Map();  // Позиции по ключу символ_сторона
         this.sortSettings = {
             'high-profitable-positions': storageUtils.get('sort_#high-profitable-positions', 'pnl_desc'),
             'profitable-positions': storageUtils.get('sort_#profitable-positions', 'pnl_desc'),
@@ -17,6 +19,9 @@ class PositionsManager {
         this.currentTheme = document.body.getAttribute('data-theme') === 'light' ? 'light' : 'dark';
         this.initializeThemeListener();
         this.initializeDataUpdater();
+        this.socket = null;
+        this.pushActive = false;  // Снимки позиций приходят через Socket.IO, опрос не нужен
+        this.initializePush();
         this.previousRoi = new Map();  // Добавляем хранилище для предыдущих значений ROI
         this.reduceLoad = storageUtils.get('reduceLoad', false);
         this.initializeLoadSettings();
@@ -35,6 +40,7 @@ class PositionsManager {
                 this.pnlThreshold = newValue;
                 storageUtils.set('pnl_threshold', newValue);
                 this.updateHighProfitableLabel();
+                this.subscribePositions();
                 if (this.lastData) {
                     this.updateData();
                 }
@@ -89,6 +95,36 @@ class PositionsManager {
         setInterval(() => this.updateAllData(), this.updateInterval);
     }
 
+    initializePush() {
+        // Без клиента Socket.IO остается обычный опрос по таймеру
+        if (typeof io === 'undefined') return;
+        this.socket = io();
+        this.socket.on('connect', () => {
+            this.pushActive = true;
+            this.subscribePositions();
+        });
+        this.socket.on('disconnect', () => {
+            this.pushActive = false;
+        });
+        this.socket.on('positions', (body) => {
+            const data = JSON.parse(body);
+            // Пропустили версию - догоняем обычным запросом дельты
+            if (data.diff && data.since !== this.positionsVersion) {
+                this.updateData();
+                return;
+            }
+            this.applyPositionsResponse(data);
+        });
+    }
+
+    subscribePositions() {
+        if (!this.socket?.connected) return;
+        this.socket.emit('subscribe_positions', {
+            pnl_threshold: this.pnlThreshold,
+            since: this.positionsVersion
+        });
+    }
+
     initializeLoadSettings() {
         const checkbox = document.getElementById('reduceLoadCheckbox');
         if (checkbox) {
@@ -214,22 +250,39 @@ class PositionsManager {
         console.log('SMA200 update completed');
     }
 
-    async updateTickerData(symbol) {
+    async updateTickersData(symbols) {
         if (this.reduceLoad) return; // Не обновляем данные если включено снижение нагрузки
+        if (symbols.length === 0) return;
         try {
-            console.log(`Updating data for ${symbol}...`);
+            console.log(`Updating data for ${symbols.length} symbols...`);
+            
+            // Миниграфики и SMA200 всех символов одним запросом
+            const response = await fetch(API_ENDPOINTS.GET_SPARKLINES, {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({ symbols, theme: this.currentTheme })
+            });
+            const result = await response.json();
             
-            // Загружаем миниграфик и SMA200 параллельно
-            const [chartResponse, sma200Response] = await Promise.all([
-                fetch(`/get_symbol_chart/${symbol}?theme=${this.currentTheme}`),
-                fetch(`/get_sma200_position/${symbol}`)
-            ]);
+            if (!result.success) {
+                console.error('Error updating ticker data:', result.error);
+                return;
+            }
+            
+            Object.entries(result.data).forEach(([symbol, data]) => {
+                this.applyTickerData(symbol, data, data);
+            });
+        } catch (error) {
+            console.error('Error updating ticker data:', error);
+        }
+    }
 
-            const [chartData, sma200Data] = await Promise.all([
-                chartResponse.json(),
-                sma200Response.json()
-            ]);
+    async updateTickerData(symbol) {
+        await this.updateTickersData([symbol]);
+    }
 
+    applyTickerData(symbol, chartData, sma200Data) {
+        try {
             // Обноляем миниграфик
             if (chartData.chart) {
                 const cacheKey = `${symbol}_${this.currentTheme}`;
@@ -238,7 +291,7 @@ class PositionsManager {
                 document.querySelectorAll(`.mini-chart[data-symbol="${symbol}"]`)
                     .forEach(elem => {
                         if (elem) {
-                            elem.src = `data:image/png;base64,${chartData.chart}`;
+                            elem.src = `data:image/svg+xml;base64,${chartData.chart}`;
                         }
                     });
                 console.log(`Chart updated for ${symbol}`);
@@ -294,10 +347,7 @@ class PositionsManager {
 
         console.log(`Starting data update for ${symbols.size} symbols:`, [...symbols]);
         
-        // Обновляем данные для каждого символа последовательно
-        for (const symbol of symbols) {
-            await this.updateTickerData(symbol);
-        }
+        await this.updateTickersData([...symbols]);
         
         console.log('All data updates completed');
     }
@@ -322,9 +372,7 @@ class PositionsManager {
         console.log(`Updating charts for ${symbols.size} symbols:`, [...symbols]);
         
         // Обновляем данные для всех символов
-        for (const symbol of symbols) {
-            await this.updateTickerData(symbol);
-        }
+        await this.updateTickersData([...symbols]);
     }
 
     updatePositionsDisplay() {
@@ -360,15 +408,36 @@ class PositionsManager {
     async updateData() {
         try {
             console.log('PositionsManager: Fetching positions data...');
-            const data = await apiUtils.fetchData(API_ENDPOINTS.GET_POSITIONS, {
-                pnl_threshold: this.pnlThreshold
-            });
+            const params = { pnl_threshold: this.pnlThreshold };
+            if (this.positionsVersion !== null) {
+                params.since = this.positionsVersion;
+            }
+            const data = await apiUtils.fetchData(API_ENDPOINTS.GET_POSITIONS, params);
             
             if (!data) {
                 console.warn('PositionsManager: No positions data received');
                 return;
             }
 
+            return this.applyPositionsResponse(data);
+        } catch (error) {
+            console.error("PositionsManager: Error updating positions:", error);
+        }
+    }
+
+    applyPositionsResponse(data) {
+        try {
+            // Дельта от другой версии устарела: пока она шла, пришел более новый снимок
+            if (data.diff && data.since !== this.positionsVersion) {
+                return this.lastData;
+            }
+
+            // Сервер вернул только изменения - применяем их к текущим позициям
+            data = data.diff ? this.applyPositionsDiff(data) : this.storePositions(data);
+            if (!data) {
+                return;
+            }
+
             console.log('PositionsManager: Received positions data:', data);
             console.log('Full position data:', {
                 high_profitable: data.high_profitable?.[0],
@@ -412,6 +481,48 @@ class PositionsManager {
         }
     }
 
+    positionKey(position) {
+        return `${position.symbol}_${position.side || ''}`;
+    }
+
+    storePositions(data) {
+        this.positionsByKey = new Map();
+        [...(data.high_profitable || []), ...(data.profitable || []), ...(data.losing || [])]
+            .forEach(position => this.positionsByKey.set(this.positionKey(position), position));
+        this.positionsVersion = data.version ?? null;
+        return data;
+    }
+
+    applyPositionsDiff(diff) {
+        diff.removed.forEach(key => this.positionsByKey.delete(key));
+        diff.added.forEach(position => this.positionsByKey.set(this.positionKey(position), position));
+        for (const { key, ...fields } of diff.changed) {
+            const position = this.positionsByKey.get(key);
+            if (!position) {
+                // Локальные данные разошлись с сервером - запросим полный снимок
+                console.warn(`PositionsManager: Unknown position in diff: ${key}`);
+                this.positionsVersion = null;
+                return null;
+            }
+            this.positionsByKey.set(key, { ...position, ...fields });
+        }
+        this.positionsVersion = diff.version;
+
+        // Раскладываем позиции по категориям так же, как сервер
+        const positions = [...this.positionsByKey.values()].sort((a, b) => b.pnl - a.pnl);
+        return {
+            high_profitable: positions.filter(p => p.pnl > 0 && p.pnl >= this.pnlThreshold),
+            profitable: positions.filter(p => p.pnl > 0 && p.pnl < this.pnlThreshold),
+            losing: positions.filter(p => p.pnl < 0).reverse(),
+            stats: diff.stats,
+            rapid_growth: diff.rapid_growth,
+            last_update: diff.last_update,
+            growth_multiplier: diff.growth_multiplier,
+            all_pairs: diff.all_pairs ?? this.lastData?.all_pairs ?? [],
+            version: diff.version
+        };
+    }
+
     generatePositionsHtml(positions, blockType) {
         if (!positions || positions.length === 0) {
             return `<div class="no-positions">${languageUtils.translate('noPositions')}</div>`;
@@ -490,7 +601,7 @@ class PositionsManager {
                         <img class="mini-chart" 
                              data-symbol="${pos.symbol}" 
                              src="${this.chartCache.has(cacheKey) ? 
-                                 `data:image/png;base64,${this.chartCache.get(cacheKey)}` : 
+                                 `data:image/svg+xml;base64,${this.chartCache.get(cacheKey)}` : 
                                  'data:image/gif;base64,R0lGODlhAQABAIAAAAAAAP///yH5BAEAAAAALAAAAAABAAEAAAIBRAA7'}"
                              alt="Chart ${pos.symbol}"
                              style="background-color: ${currentTheme === 'dark' ? '#2d2d2d' : '#ffffff'}"
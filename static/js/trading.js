@@ -247,50 +247,28 @@ async function analyzeAllTickers(tickers) {
         loadingElement.style.display = 'block';
     }
     
-    const total = tickers.length;
-    let completed = 0;
-    
     try {
-        const batchSize = 5; // Анализируем по 5 тикеров одновременно
-        for (let i = 0; i < tickers.length; i += batchSize) {
-            const batch = tickers.slice(i, i + batchSize);
-            await Promise.all(batch.map(async (ticker) => {
-                try {
-                    // Проверяем кэш
-                    const cachedData = tickersCache.get(ticker);
-                    if (isCacheValid(cachedData)) {
-                        console.log(`Using cached data for ${ticker}`);
-                        tickersData.set(ticker, cachedData);
-                    } else {
-                        console.log(`Fetching data for ${ticker}`);
-                        const response = await fetch(`/api/candles/${ticker}`);
-                        const data = await response.json();
-                        
-                        if (data.success && data.data && data.data.candles) {
-                            const analysis = analyzeTicker(data.data.candles);
-                            if (analysis) {
-                                console.log(`Analysis completed for ${ticker}:`, analysis);
-                                tickersData.set(ticker, analysis);
-                                tickersCache.set(ticker, analysis);
-                            }
-                        }
-                    }
-                } catch (error) {
-                    console.error(`Error analyzing ${ticker}:`, error);
-                }
-                
-                completed++;
-                updateProgress(completed, total);
-            }));
-            
-            // Применяем текущий фильтр после каждой партии
-            applyFilter(currentFilter);
-            
-            // Небольшая задержка между партиями для снижения нагрузки
-            await new Promise(resolve => setTimeout(resolve, 100));
+        // Анализ всех тикеров выполняется на сервере одним запросом
+        const response = await fetch('/api/screener');
+        const data = await response.json();
+        
+        if (data.success) {
+            const requested = new Set(tickers);
+            data.data.forEach(row => {
+                if (!requested.has(row.symbol)) return;
+                const analysis = {
+                    trend: row.trend,
+                    positionPercent: row.position_percent,
+                    state: row.state,
+                    timestamp: data.timestamp
+                };
+                tickersData.set(row.symbol, analysis);
+                tickersCache.set(row.symbol, analysis);
+            });
         }
+        updateProgress(1, 1);
     } catch (error) {
-        console.error('Error during batch processing:', error);
+        console.error('Error loading screener:', error);
     } finally {
         analysisInProgress = false;
         if (loadingElement) {